@@ -31,3 +31,14 @@ class ShippingMethod(str, Enum):
 class FulfillStatus(str, Enum):
     unfulfilled = "unfulfilled"
     fulfilled = "fulfilled"
+
+
+class ExportFormat(str, Enum):
+    csv = "csv"
+    parquet = "parquet"
+
+
+class CountMode(str, Enum):
+    exact = "exact"
+    estimated = "estimated"
+    cached = "cached"
@@ -1,7 +1,21 @@
+import asyncio
 from fastapi import FastAPI
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from app.api.routes import router as api_router
+from app.core.admission import AdmissionMiddleware, pool_timeout_handler
+from app.core import handlers  # noqa: F401  (registers event handlers)
 from app.core.config import settings
+from app.core.events import event_bus
+from app.core.idempotency import IdempotencyMiddleware
+from app.core.order_feed import order_feed
+from app.core.profiling import ProfilingMiddleware
+from app.core.tracing import setup_tracing, shutdown_tracing
+from app.core.ratelimit import RateLimitMiddleware
+from app.core.typeahead import build_product_index, refresh_product_index
+from app.db.cache import row_cache
+from app.db.redis import redis_client
 from app.db.session import engine
+from app.repository.order import order_batcher
 from app.db.utils import create_db_and_tables
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
@@ -21,20 +35,55 @@ def get_application():
 
 
 app = get_application()
+if settings.PROFILING_ENABLED:
+    #   Innermost: its admin lookup only runs for admitted, rate-limited requests
+    app.add_middleware(ProfilingMiddleware)
+if settings.ADMISSION_ENABLED:
+    app.add_middleware(
+        AdmissionMiddleware,
+        pool_capacity=engine.pool.size() + settings.POSTGRES_MAX_OVERFLOW,
+    )
+app.add_middleware(IdempotencyMiddleware, redis=redis_client)
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware, redis=redis_client)
+app.add_exception_handler(PoolTimeoutError, pool_timeout_handler)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "X-Total-Count-Mode"],
 )
 app.add_middleware(EventHandlerASGIMiddleware, handlers=[local_handler])
+setup_tracing(settings.PROJECT_NAME, app=app)
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 
 @app.on_event("startup")
 async def on_startup():
     await create_db_and_tables(engine)
+    app.state.event_tasks = [
+        asyncio.create_task(event_bus.run(redis_client)),
+        asyncio.create_task(order_feed.run()),
+    ]
+    if settings.EVENTS_FANOUT_ENABLED:
+        app.state.event_tasks.append(asyncio.create_task(event_bus.listen()))
+    if settings.TYPEAHEAD_ENABLED:
+        await build_product_index()
+        app.state.typeahead_refresh = asyncio.create_task(refresh_product_index())
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    if getattr(app.state, "typeahead_refresh", None):
+        app.state.typeahead_refresh.cancel()
+    for task in getattr(app.state, "event_tasks", []):
+        task.cancel()
+    await order_batcher.drain()
+    await event_bus.drain()
+    await redis_client.aclose()
+    shutdown_tracing()
 
 
 @app.get("/", tags=["health"])
@@ -45,3 +94,9 @@ async def health():
         status="OK",
         message="Visit /docs for more information.",
     )
+
+
+@app.get("/stats/cache", tags=["health"])
+async def cache_stats():
+    """Row cache hits and misses per table, for this worker."""
+    return row_cache.stats()
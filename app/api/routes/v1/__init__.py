@@ -3,7 +3,7 @@ from importlib import import_module
 from fastapi import APIRouter
 
 router = APIRouter(prefix="/v1")
-routes = ("user", "group", "product", "order", "store")
+routes = ("user", "group", "product", "order", "store", "report", "profile")
 for module_name in routes:
     api_module = import_module(f"app.api.routes.v1.{module_name}")
     api_module_router = api_module.router
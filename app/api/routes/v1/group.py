@@ -1,12 +1,24 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 
+from app.api.enums import CountMode
 from app.db.session import get_session
-from app.core.deps import get_current_user
-from app.models.user import User, Group, GroupBase, UpdateGroup
+from app.core.deps import get_current_admin, get_current_user
+from app.core.events import UserUpdated, publish
+from app.core.revocation import revoke_tokens
+from app.models.base import UpdateResponse
+from app.models.user import (
+    CurrentUser,
+    User,
+    Group,
+    GroupBase,
+    GroupReassign,
+    UpdateGroup,
+)
 from app.repository.base import BaseRepository
+from app.repository.count import set_total_count
 
 router = APIRouter(prefix="/groups", tags=["groups"])
 
@@ -33,9 +45,23 @@ async def create_group(
 
 
 @router.get("", response_model=List[Group], status_code=200, summary="Get all groups")
-async def list_group(session: AsyncSession = Depends(get_session)) -> List[Group]:
-    groups = await BaseRepository(Group).get_all(session=session)
-    return groups
+async def list_group(
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    total: Optional[CountMode] = Query(
+        None, description="Return the number of groups in X-Total-Count."
+    ),
+    session: AsyncSession = Depends(get_session),
+) -> List[Group]:
+    repository = BaseRepository(Group)
+    if total is not None:
+        set_total_count(response, await repository.count(session, mode=total))
+    if skip or limit:
+        return await repository.get_all_paginated_by(
+            session=session, skip=skip, limit=limit
+        )
+    return await repository.get_all(session=session)
 
 
 @router.get(
@@ -66,9 +92,45 @@ async def update_group(
     group_db = await BaseRepository(Group).update(
         session=session, item=group, **data_to_update
     )
+    await revoke_tokens(group_ids=[group_id])
     return group_db
 
 
+@router.post(
+    "/{group_id}/members",
+    response_model=UpdateResponse,
+    status_code=200,
+    summary="Move many users into a group.",
+    description="Select users by user_ids and/or from_group_id.",
+)
+async def reassign_group(
+    group_id: UUID,
+    data: GroupReassign,
+    session: AsyncSession = Depends(get_session),
+    user: CurrentUser = Depends(get_current_admin),
+) -> UpdateResponse:
+    _ = await BaseRepository(Group).get_by_id(session=session, id=group_id)
+    criteria = []
+    if data.user_ids is not None:
+        criteria.append(User.id.in_(data.user_ids))
+    if data.from_group_id is not None:
+        criteria.append(User.group_id == data.from_group_id)
+    if not criteria:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Select users with user_ids or from_group_id!",
+        )
+    ids = await BaseRepository(User).update_where(
+        session, *criteria, values={"group_id": group_id}
+    )
+    #   Before responding, as update_group/delete_group do: claims tokens of the
+    #   moved users must not keep the old group or discount
+    await revoke_tokens(user_ids=ids)
+    for user_id in ids:
+        publish(UserUpdated(user_id=user_id))
+    return UpdateResponse(updated=len(ids))
+
+
 @router.delete("/{group_id}", status_code=200, summary="Delete group.")
 async def delete_group(
     group_id: UUID,
@@ -81,4 +143,5 @@ async def delete_group(
             detail="Group not found!",
         )
     await BaseRepository(Group).delete(session=session, item=group)
+    await revoke_tokens(group_ids=[group_id])
     return {"message": "Delete group successfully!"}
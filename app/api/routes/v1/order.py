@@ -1,33 +1,50 @@
 from uuid import UUID
-from typing import Dict
+from typing import Dict, Optional
 from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
-from fastapi import APIRouter, Depends, HTTPException, status
-
-from app.db.session import get_session
-from app.core.deps import get_current_user
-from app.core.tasks import send_email_task
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+
+from app.core.config import settings
+from app.db.session import SessionLocal, get_session
+from app.core.deps import get_current_admin, get_current_user
+from app.core.events import OrderCreated, OrderDeleted, OrderFulfilled, publish
+from app.core.order_feed import order_feed
+from app.db.redis import redis_client
 from app.api.enums import (
+    CountMode,
+    ExportFormat,
     FulfillStatus as FulfillStatusEnum,
     ShippingMethod as ShippingMethodEnum,
 )
 from app.repository import (
     BaseRepository,
+    count_rows,
     get_list_order,
+    list_order_statement,
+    set_total_count,
     generate_shipping_label,
     get_user_order,
+    PendingOrder,
+    order_batcher,
+    reserve_stock,
+    release_stock,
+    remove_order_from_rollups,
+    iter_order_rows,
+    iter_csv,
+    iter_parquet,
 )
+from app.repository.export import PARQUET_AVAILABLE
 from app.models import (
+    CurrentUser,
     User,
     Order,
-    Product,
     OrderCreate,
     OrderProduct,
     OrderResponse,
     ShippingLabel,
 )
 
-
 router = APIRouter(prefix="/orders", tags=["orders"])
 
 
@@ -64,32 +81,47 @@ async def create_order(
         )
         from_admin = True
 
-    #   Check whether product is in stock?
-    for item in data.items:
-        try:
-            _ = await BaseRepository(Product).get_by_id(
-                session=session, id=item.product_id
-            )
-        except:
-            raise HTTPException(
-                status_code=404,
-                detail=f"Product #{item.product_id} is not available now!",
-            )
-
-    #   Place an order
-    order_db = await BaseRepository(Order).create(
-        session=session,
-        user_id=user.id,
-        total_price=data.total_price,
-        shipping_method=data.shipping_method,
-        shipping_location=data.shipping_location,
-        from_admin=from_admin,
-    )
+    if settings.ORDER_BATCH_ENABLED:
+        #   Reserved and written together with concurrent orders, in one transaction.
+        #   Hand the connection back first: the batch checks out its own
+        pending = PendingOrder(user.id, from_admin, data)
+        await session.close()
+        order_db = await order_batcher.submit(pending)
+    else:
+        #   Check whether product is in stock and reserve it, committed with the order
+        await reserve_stock(session=session, items=data.items, store_id=data.store_id)
+
+        #   Place an order
+        order_db = await BaseRepository(Order).create(
+            session=session,
+            user_id=user.id,
+            total_price=data.total_price,
+            shipping_method=data.shipping_method,
+            shipping_location=data.shipping_location,
+            from_admin=from_admin,
+            store_id=data.store_id,
+        )
 
-    #   Attach order with products
-    data_to_add = [{**dict(item), "order_id": order_db.id} for item in data.items]
-    _ = await BaseRepository(OrderProduct).create_all(
-        session=session, data_lst=data_to_add
+        #   Attach order with products
+        data_to_add = [
+            {
+                **dict(item),
+                "order_id": order_db.id,
+                "order_created_at": order_db.created_at,
+            }
+            for item in data.items
+        ]
+        _ = await BaseRepository(OrderProduct).create_all(
+            session=session, data_lst=data_to_add
+        )
+    publish(
+        OrderCreated(
+            order_id=order_db.id,
+            user_id=order_db.user_id,
+            total_price=order_db.total_price,
+            from_admin=from_admin,
+            store_id=order_db.store_id,
+        )
     )
 
     return order_db
@@ -102,13 +134,94 @@ async def create_order(
     summary="Get all orders according to specific users",
 )
 async def list_order(
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    total: Optional[CountMode] = Query(
+        None, description="Return the number of orders in X-Total-Count."
+    ),
     session: AsyncSession = Depends(get_session),
     user: User = Depends(get_current_user),
 ) -> list[OrderResponse]:
-    orders = await get_list_order(session=session, user=user)
+    if total is not None:
+        set_total_count(
+            response, await count_rows(session, list_order_statement(user), total)
+        )
+    orders = await get_list_order(session=session, user=user, skip=skip, limit=limit)
     return orders
 
 
+@router.get(
+    "/export",
+    status_code=200,
+    summary="Export orders with their line items.",
+    description="Streams one row per ordered product as CSV (optionally gzipped) "
+    "or Parquet, without loading the whole result in memory.",
+)
+async def export_orders(
+    format: ExportFormat = ExportFormat.csv,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    gzip: bool = False,
+    chunk_size: int = Query(default=10_000, ge=100, le=100_000),
+    user: CurrentUser = Depends(get_current_admin),
+) -> StreamingResponse:
+    if format == ExportFormat.parquet and not PARQUET_AVAILABLE:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Parquet export is not available on this server!",
+        )
+
+    async def content():
+        #   Own session: request dependencies are closed before the body streams
+        async with SessionLocal() as session:
+            chunks = iter_order_rows(session, start, end, chunk_size)
+            if format == ExportFormat.parquet:
+                encoded = iter_parquet(chunks)
+            else:
+                encoded = iter_csv(chunks, gzip=gzip)
+            async for data in encoded:
+                yield data
+
+    if format == ExportFormat.parquet:
+        media_type, filename = "application/vnd.apache.parquet", "orders.parquet"
+    elif gzip:
+        media_type, filename = "application/gzip", "orders.csv.gz"
+    else:
+        media_type, filename = "text/csv", "orders.csv"
+    return StreamingResponse(
+        content(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get(
+    "/events",
+    status_code=200,
+    summary="Stream order status changes.",
+    description="Server-sent events for the user's orders (every order for "
+    "admins), optionally just `order_id`. Reconnecting with `Last-Event-ID` "
+    "replays what was missed; a `reset` event means some of it is gone and "
+    "the orders should be fetched again.",
+)
+async def order_events(
+    order_id: Optional[UUID] = None,
+    last_event_id: Optional[str] = Header(None),
+    user: User = Depends(get_current_user),
+) -> StreamingResponse:
+    return StreamingResponse(
+        order_feed.stream(
+            redis_client,
+            user_id=None if user.is_admin else str(user.id),
+            order_id=str(order_id) if order_id else None,
+            last_event_id=last_event_id,
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get(
     "/{order_id}",
     response_model=Order,
@@ -116,15 +229,31 @@ async def list_order(
     summary="Get order detail.",
 )
 async def get_user_emails(
-    order_id: UUID, session: AsyncSession = Depends(get_session)
+    order_id: UUID,
+    created_at: Optional[datetime] = Query(
+        None, description="The order's created_at, to search its month only."
+    ),
+    session: AsyncSession = Depends(get_session),
 ) -> Order:
-    order = await BaseRepository(Order).get_by_id(session=session, id=order_id)
+    criteria = {"id": order_id}
+    #   The primary key is (id, created_at), so no lookup by id alone
+    if created_at is not None:
+        criteria["created_at"] = created_at
+    order = await BaseRepository(Order).get_by_item(session=session, **criteria)
+    if not order:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No record found with id: {order_id}",
+        )
     return order
 
 
 @router.delete("/{order_id}", status_code=200, summary="Delete order.")
 async def delete_order(
     order_id: UUID,
+    created_at: Optional[datetime] = Query(
+        None, description="The order's created_at, to search its month only."
+    ),
     session: AsyncSession = Depends(get_session),
     user: User = Depends(get_current_user),
 ) -> Dict:
@@ -133,13 +262,28 @@ async def delete_order(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Do not have sufficient rights!",
         )
-    order = await BaseRepository(Order).get_by_id(session=session, id=order_id)
+    criteria = {"id": order_id}
+    if created_at is not None:
+        criteria["created_at"] = created_at
+    order = await BaseRepository(Order).get_by_item(session=session, **criteria)
     if not order:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Order not found!",
         )
-    await BaseRepository(Order).delete(session=session, item=order)
+    #   Unfulfilled orders give their reserved stock back
+    if order.fulfill_status != FulfillStatusEnum.fulfilled:
+        items = await BaseRepository(OrderProduct).get_all_by(
+            session=session, order_id=order.id, order_created_at=order.created_at
+        )
+        await release_stock(session=session, items=items, store_id=order.store_id)
+    #   Reports must not keep counting it; same transaction as the delete
+    await remove_order_from_rollups(session=session, order=order)
+    #   Bounded by the partition key; a delete by id alone probes every month
+    await BaseRepository(Order).delete_where(
+        session, Order.created_at == order.created_at, id=order.id
+    )
+    publish(OrderDeleted(order_id=order.id, user_id=order.user_id))
     return {"message": "Delete order successfully!"}
 
 
@@ -149,10 +293,17 @@ async def delete_order(
     summary="Fulfill an order.",
 )
 async def fulfill_order(
-    order_id: UUID, data: ShippingLabel, session: AsyncSession = Depends(get_session)
+    order_id: UUID,
+    data: ShippingLabel,
+    created_at: Optional[datetime] = Query(
+        None, description="The order's created_at, to search its month only."
+    ),
+    session: AsyncSession = Depends(get_session),
 ) -> Dict:
 
-    user_order = await get_user_order(session=session, order_id=order_id)
+    user_order = await get_user_order(
+        session=session, order_id=order_id, created_at=created_at
+    )
 
     #   Specify mail content based on shipping location/method
     mail_subject = f"The Order {user_order.Order.id} has been fulfilled."
@@ -198,15 +349,26 @@ async def fulfill_order(
             Best regards,
             {data.ship_from.company_name}
         """
-    #   Use celery to send mail
-    _ = send_email_task.delay(mail_subject, mail_body, user_order.User.email)
-
     #   Update order status
-    _ = await BaseRepository(Order).update_by_id(
-        session=session,
+    _ = await BaseRepository(Order).update_where(
+        session,
+        Order.created_at == user_order.Order.created_at,
+        values={
+            "fulfill_status": FulfillStatusEnum.fulfilled,
+            "fulfill_at": datetime.now(),
+        },
         id=order_id,
-        fulfill_status=FulfillStatusEnum.fulfilled,
-        fulfill_at=datetime.now(),
+    )
+
+    #   Mail is queued to celery once the response is sent
+    publish(
+        OrderFulfilled(
+            order_id=order_id,
+            user_id=user_order.User.id,
+            email=user_order.User.email,
+            mail_subject=mail_subject,
+            mail_body=mail_body,
+        )
     )
 
     return response
@@ -1,19 +1,48 @@
+import io
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Dict
+from typing import List, Dict, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    HTTPException,
+    Query,
+    Response,
+    UploadFile,
+    status,
+)
 
 from app.db.session import get_session
-from app.core.deps import get_current_user
-from app.repository import BaseRepository, get_user_group
+from app.api.enums import CountMode
+from app.core.deps import get_current_admin, get_current_claims
+from app.core.events import ProductUpdated, publish
+from app.core.typeahead import build_product_index, product_index
+from app.repository import (
+    BaseRepository,
+    get_user_group,
+    get_stock,
+    set_stock,
+    search_products,
+    import_products,
+    set_total_count,
+)
 from app.models import (
+    CurrentUser,
     User,
     Product,
     ProductBase,
+    ProductImportResult,
+    ProductReprice,
     UpdateProduct,
     ProductDiscountPrice,
     ProductPrice,
+    ProductSearchResult,
+    ProductSuggestion,
+    StockResponse,
+    StockUpdate,
 )
+from app.models.base import UpdateResponse
 
 router = APIRouter(prefix="/products", tags=["products"])
 
@@ -27,15 +56,145 @@ async def create_product(
 ) -> Product:
     data_to_add = dict(data)
     product_db = await BaseRepository(Product).create(session=session, **data_to_add)
+    publish(ProductUpdated(product_id=product_db.id, name=product_db.name))
     return product_db
 
 
+@router.post(
+    "/import",
+    response_model=ProductImportResult,
+    status_code=200,
+    summary="Bulk import products from CSV or NDJSON.",
+    description="Columns/keys: sku, name, base_price and optionally description and "
+    "stock. Files ending in .ndjson or .jsonl are read as NDJSON, anything else as "
+    "CSV. Existing products are matched by sku, or by name for rows without one.",
+)
+async def import_product(
+    file: UploadFile = File(...),
+    session: AsyncSession = Depends(get_session),
+    user: CurrentUser = Depends(get_current_admin),
+) -> ProductImportResult:
+    report = await import_products(
+        session=session,
+        file=io.TextIOWrapper(file.file, encoding="utf-8-sig"),
+        ndjson=(file.filename or "").endswith((".ndjson", ".jsonl")),
+    )
+    if product_index.ready and (report.inserted or report.updated):
+        await build_product_index()
+    return report
+
+
+@router.post(
+    "/reprice",
+    response_model=UpdateResponse,
+    status_code=200,
+    summary="Change the price of many products at once.",
+    description="Select products by product_ids and/or sku_prefix, then either set "
+    "base_price or apply percent (e.g. -10 for 10% off).",
+)
+async def reprice_products(
+    data: ProductReprice,
+    chunk_size: Optional[int] = Query(default=None, ge=100),
+    session: AsyncSession = Depends(get_session),
+    user: CurrentUser = Depends(get_current_admin),
+) -> UpdateResponse:
+    criteria = []
+    if data.product_ids is not None:
+        criteria.append(Product.id.in_(data.product_ids))
+    if data.sku_prefix:
+        criteria.append(Product.sku.startswith(data.sku_prefix, autoescape=True))
+    if not criteria:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Select products with product_ids or sku_prefix!",
+        )
+    if (data.base_price is None) == (data.percent is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Give either base_price or percent!",
+        )
+    if (data.base_price or 0) < 0 or (data.percent or 0) < -100:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Prices cannot become negative!",
+        )
+    if data.base_price is not None:
+        base_price = data.base_price
+    else:
+        base_price = Product.base_price * (1 + data.percent / 100)
+    ids = await BaseRepository(Product).update_where(
+        session, *criteria, values={"base_price": base_price}, chunk_size=chunk_size
+    )
+    return UpdateResponse(updated=len(ids))
+
+
 @router.get(
     "", response_model=List[Product], status_code=200, summary="Get all products"
 )
-async def list_product(session: AsyncSession = Depends(get_session)) -> List[Product]:
-    products = await BaseRepository(Product).get_all(session=session)
-    return products
+async def list_product(
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    total: Optional[CountMode] = Query(
+        None, description="Return the number of products in X-Total-Count."
+    ),
+    session: AsyncSession = Depends(get_session),
+) -> List[Product]:
+    repository = BaseRepository(Product)
+    if total is not None:
+        set_total_count(response, await repository.count(session, mode=total))
+    if skip or limit:
+        return await repository.get_all_paginated_by(
+            session=session, skip=skip, limit=limit
+        )
+    return await repository.get_all(session=session)
+
+
+@router.get(
+    "/search",
+    response_model=ProductSearchResult,
+    status_code=200,
+    summary="Search products by name and description.",
+    description="The last word matches as a prefix. Pass next_cursor back as cursor.",
+)
+async def search_product(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_session),
+) -> ProductSearchResult:
+    items, next_cursor = await search_products(
+        session=session, text=q, limit=limit, cursor=cursor
+    )
+    return ProductSearchResult(items=items, next_cursor=next_cursor)
+
+
+@router.get(
+    "/suggest",
+    response_model=List[ProductSuggestion],
+    status_code=200,
+    summary="Suggest product names while typing.",
+)
+async def suggest_product(
+    q: str = Query(..., min_length=1, max_length=100),
+    k: int = Query(10, ge=1, le=50),
+    session: AsyncSession = Depends(get_session),
+) -> List[ProductSuggestion]:
+    if product_index.ready:
+        return [
+            ProductSuggestion(id=id, name=name)
+            for id, name in product_index.suggest(q, k)
+        ]
+    #   Index disabled or still building: fall back to the database
+    items, _ = await search_products(session=session, text=q, limit=k)
+    return [ProductSuggestion(id=item.id, name=item.name) for item in items]
+
+
+@router.get(
+    "/suggest/stats", status_code=200, summary="Typeahead index statistics."
+)
+async def suggest_stats() -> Dict:
+    return product_index.stats()
 
 
 @router.get(
@@ -72,9 +231,51 @@ async def update_product(
     product_db = await BaseRepository(Product).update(
         session=session, item=product, **data_to_update
     )
+    publish(ProductUpdated(product_id=product_db.id, name=product_db.name))
     return product_db
 
 
+@router.get(
+    "/{product_id}/stock",
+    response_model=StockResponse,
+    status_code=200,
+    summary="Get stock of a product.",
+)
+async def get_product_stock(
+    product_id: UUID,
+    store_id: Optional[UUID] = None,
+    session: AsyncSession = Depends(get_session),
+) -> StockResponse:
+    #   Reservations do not invalidate cached products, so read the row itself
+    product = await BaseRepository(Product).get_by_id(
+        session=session, id=product_id, cached=False
+    )
+    return await get_stock(session=session, product=product, store_id=store_id)
+
+
+@router.put(
+    "/{product_id}/stock",
+    response_model=StockResponse,
+    status_code=200,
+    summary="Set stock of a product.",
+    description="shards > 1 splits the stock of a best-seller over several rows.",
+)
+async def update_product_stock(
+    product_id: UUID,
+    data: StockUpdate,
+    session: AsyncSession = Depends(get_session),
+    user: CurrentUser = Depends(get_current_admin),
+) -> StockResponse:
+    _ = await BaseRepository(Product).get_by_id(session=session, id=product_id)
+    return await set_stock(
+        session=session,
+        product_id=product_id,
+        quantity=data.quantity,
+        shards=data.shards,
+        store_id=data.store_id,
+    )
+
+
 @router.delete("/{product_id}", status_code=200, summary="Delete product.")
 async def delete_product(
     product_id: UUID,
@@ -87,6 +288,7 @@ async def delete_product(
             detail="Product not found!",
         )
     await BaseRepository(Product).delete(session=session, item=product)
+    publish(ProductUpdated(product_id=product_id, deleted=True))
     return {"message": "Delete product successfully!"}
 
 
@@ -98,21 +300,23 @@ async def delete_product(
 async def get_product_discount_price(
     data: ProductDiscountPrice,
     session: AsyncSession = Depends(get_session),
-    user: User = Depends(get_current_user),
+    user: CurrentUser = Depends(get_current_claims),
 ) -> Dict:
+    discount_percent = user.discount_percent
     #   Admin place order for customer, so we must get customer information, not Admin
     if user.is_admin and data.customer_email:
-        user = await BaseRepository(User).get_by_item(
+        customer = await BaseRepository(User).get_by_item(
             session=session, email=data.customer_email
         )
-    #   Get added user information
-    user_join_group = await get_user_group(session=session, user_id=user.id)
+        #   Get added user information
+        user_join_group = await get_user_group(session=session, user_id=customer.id)
+        discount_percent = user_join_group.Group.discount_percent
     product = await BaseRepository(Product).get_by_id(
         session=session, id=data.product_id
     )
 
     #   Calculate discount amount
-    discount_amount = product.base_price * user_join_group.Group.discount_percent
+    discount_amount = product.base_price * discount_percent
     return {"price": product.base_price - discount_amount}
 
 
@@ -0,0 +1,42 @@
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse
+
+from app.core.deps import get_current_admin
+from app.core.profiling import list_profiles, profile_path
+from app.models import CurrentUser, ProfileInfo
+
+router = APIRouter(prefix="/profiles", tags=["profiles"])
+
+
+@router.get(
+    "",
+    response_model=List[ProfileInfo],
+    status_code=200,
+    summary="List recent request profiles.",
+    description="Profiles are recorded by the profiling middleware "
+    "(PROFILING_ENABLED) for admin requests sending the profiling header.",
+)
+async def get_profiles(
+    limit: int = 50, user: CurrentUser = Depends(get_current_admin)
+) -> List[ProfileInfo]:
+    return list_profiles()[:limit]
+
+
+@router.get(
+    "/{name}",
+    status_code=200,
+    summary="Download a request profile.",
+    description="`.speedscope.json` files open in speedscope; `.prof` files in "
+    "snakeviz or flameprof.",
+)
+async def get_profile(
+    name: str, user: CurrentUser = Depends(get_current_admin)
+) -> FileResponse:
+    path = profile_path(name)
+    if path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found!",
+        )
+    return FileResponse(path, filename=name)
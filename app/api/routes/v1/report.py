@@ -0,0 +1,64 @@
+from datetime import date, timedelta
+from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, Depends, Query
+
+from app.db.session import get_session
+from app.core.deps import get_current_admin
+from app.models import CurrentUser, SalesDaily, ProductSales, GroupSales
+from app.repository import get_daily_sales, get_product_sales, get_group_sales
+
+router = APIRouter(prefix="/reports", tags=["reports"])
+
+
+def date_range(
+    start: Optional[date] = None, end: Optional[date] = None
+) -> tuple[date, date]:
+    """Defaults to the last 30 days."""
+    end = end or date.today()
+    return start or end - timedelta(days=30), end
+
+
+@router.get(
+    "/sales/daily",
+    response_model=List[SalesDaily],
+    status_code=200,
+    summary="Revenue per day.",
+)
+async def daily_sales(
+    period: tuple = Depends(date_range),
+    session: AsyncSession = Depends(get_session),
+    user: CurrentUser = Depends(get_current_admin),
+) -> List[SalesDaily]:
+    return await get_daily_sales(session=session, start=period[0], end=period[1])
+
+
+@router.get(
+    "/sales/products",
+    response_model=List[ProductSales],
+    status_code=200,
+    summary="Best-selling products.",
+)
+async def product_sales(
+    period: tuple = Depends(date_range),
+    limit: int = Query(50, ge=1, le=1000),
+    session: AsyncSession = Depends(get_session),
+    user: CurrentUser = Depends(get_current_admin),
+) -> List[ProductSales]:
+    return await get_product_sales(
+        session=session, start=period[0], end=period[1], limit=limit
+    )
+
+
+@router.get(
+    "/sales/groups",
+    response_model=List[GroupSales],
+    status_code=200,
+    summary="Revenue per customer group.",
+)
+async def group_sales(
+    period: tuple = Depends(date_range),
+    session: AsyncSession = Depends(get_session),
+    user: CurrentUser = Depends(get_current_admin),
+) -> List[GroupSales]:
+    return await get_group_sales(session=session, start=period[0], end=period[1])
@@ -1,13 +1,26 @@
+import io
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Dict
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
 
 from app.db.session import get_session
-from app.core.deps import get_current_user
+from app.core.deps import get_current_admin, get_current_user
 from app.api.enums import ShippingMethod as ShippingMethodEnum
-from app.models import User, Store, StoreBase, ShippingMethod
-from app.repository import BaseRepository
+from app.models import (
+    CurrentUser,
+    User,
+    Store,
+    StoreBase,
+    ShippingMethod,
+    NearestStore,
+    StoreImportResult,
+)
+from app.repository import (
+    BaseRepository,
+    get_nearest_stores,
+    import_store_locations,
+)
 
 router = APIRouter(prefix="/stores", tags=["stores"])
 
@@ -44,6 +57,46 @@ async def list_store_address(
     return stores
 
 
+@router.get(
+    "/nearest",
+    response_model=List[NearestStore],
+    status_code=200,
+    summary="Get the nearest stores or warehouses to a point.",
+)
+async def list_nearest_store(
+    latitude: float = Query(..., ge=-90, le=90),
+    longitude: float = Query(..., ge=-180, le=180),
+    is_store: bool = True,
+    limit: int = Query(5, ge=1, le=50),
+    session: AsyncSession = Depends(get_session),
+) -> List[NearestStore]:
+    return await get_nearest_stores(
+        session=session,
+        latitude=latitude,
+        longitude=longitude,
+        is_store=is_store,
+        limit=limit,
+    )
+
+
+@router.post(
+    "/import",
+    response_model=StoreImportResult,
+    status_code=200,
+    summary="Import store coordinates from CSV.",
+    description="Columns: name, address, latitude, longitude and optionally is_store. "
+    "Existing stores are matched by address.",
+)
+async def import_store(
+    file: UploadFile = File(...),
+    session: AsyncSession = Depends(get_session),
+    user: CurrentUser = Depends(get_current_admin),
+) -> StoreImportResult:
+    return await import_store_locations(
+        session=session, file=io.TextIOWrapper(file.file, encoding="utf-8-sig")
+    )
+
+
 @router.delete("/{store_id}", status_code=200, summary="Delete store.")
 async def delete_store(
     store_id: UUID,
@@ -1,23 +1,62 @@
-from typing import List
+from typing import List, Optional
+from datetime import timedelta
+from redis.exceptions import RedisError
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.security import OAuth2PasswordRequestForm
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 
+from app.api.enums import CountMode
+from app.core.config import settings
 from app.db.session import get_session
 from app.repository.base import BaseRepository
-from app.models.user import User, UserSignUp, UserResponse, TokenSchema
+from app.repository.count import set_total_count
+from app.models.user import (
+    Group,
+    RefreshRequest,
+    User,
+    UserSignUp,
+    UserResponse,
+    TokenSchema,
+)
 from app.crud.user import create_user, get_user_by_email
-from app.core.deps import get_current_user
+from app.core.deps import decode_refresh_token, get_current_user
+from app.core.revocation import use_refresh_token
 from app.core.security import (
     get_hashed_password,
     verify_password,
     create_access_token,
     create_refresh_token,
+    user_claims,
 )
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 
+async def issue_tokens(
+    session: AsyncSession,
+    user: User,
+    provider: Optional[str] = None,
+    family: Optional[str] = None,
+) -> TokenSchema:
+    if settings.JWT_CLAIMS_ENABLED:
+        #   Short-lived token carrying what authorization and pricing need
+        group = await session.get(Group, user.group_id) if user.group_id else None
+        access_token = create_access_token(
+            subject=user.email,
+            provider=provider,
+            expires_delta=timedelta(minutes=settings.JWT_CLAIMS_EXPIRE_MINUTES),
+            claims=user_claims(user, group.discount_percent if group else 0),
+        )
+    else:
+        access_token = create_access_token(subject=user.email, provider=provider)
+    return TokenSchema(
+        access_token=access_token,
+        refresh_token=create_refresh_token(
+            subject=user.email, provider=provider, family=family
+        ),
+    )
+
+
 @router.post("/signup", response_model=UserResponse, summary="Create a new user.")
 async def signup(
     data: UserSignUp, session: AsyncSession = Depends(get_session)
@@ -54,9 +93,44 @@ async def login(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Incorrect email or password",
         )
-    return TokenSchema(
-        access_token=create_access_token(subject=user.email),
-        refresh_token=create_refresh_token(subject=user.email),
+    return await issue_tokens(session=session, user=user)
+
+
+@router.post(
+    "/refresh",
+    response_model=TokenSchema,
+    summary="Exchange a refresh token for new access and refresh tokens",
+    description="Each refresh token works once. Reusing one revokes every token "
+    "rotated from the same login.",
+)
+async def refresh(
+    data: RefreshRequest, session: AsyncSession = Depends(get_session)
+) -> TokenSchema:
+    token_data = decode_refresh_token(data.refresh_token)
+    try:
+        fresh = await use_refresh_token(token_data)
+    except RedisError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Cannot refresh tokens right now, please try again",
+            headers={"Retry-After": "1"},
+        )
+    if not fresh:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Refresh token was already used",
+        )
+    user = await get_user_by_email(session=session, email=token_data.sub)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+        )
+    return await issue_tokens(
+        session=session,
+        user=user,
+        provider=token_data.provider,
+        family=token_data.fam,
     )
 
 
@@ -68,6 +142,20 @@ async def get_me(user: User = Depends(get_current_user)):
 @router.get(
     "", response_model=List[UserResponse], status_code=200, summary="Get all users"
 )
-async def list_user(session: AsyncSession = Depends(get_session)) -> List[UserResponse]:
-    users = await BaseRepository(User).get_all(session=session)
-    return users
+async def list_user(
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    total: Optional[CountMode] = Query(
+        None, description="Return the number of users in X-Total-Count."
+    ),
+    session: AsyncSession = Depends(get_session),
+) -> List[UserResponse]:
+    repository = BaseRepository(User)
+    if total is not None:
+        set_total_count(response, await repository.count(session, mode=total))
+    if skip or limit:
+        return await repository.get_all_paginated_by(
+            session=session, skip=skip, limit=limit
+        )
+    return await repository.get_all(session=session)
@@ -0,0 +1,168 @@
+"""Maintenance commands.
+
+python -m app.cli <command> --help
+"""
+
+import argparse
+import asyncio
+import sys
+from datetime import date, datetime
+
+from app.db.session import standalone_session
+from app.repository.catalog import import_products
+from app.repository.export import iter_csv, iter_order_rows, iter_parquet
+from app.repository.partitions import (
+    archive_order_partitions,
+    create_order_partitions,
+)
+from app.repository.report import backfill_sales_rollups, refresh_sales_rollups
+
+
+async def rollups_refresh(args):
+    async with standalone_session() as session:
+        high_water = await refresh_sales_rollups(session)
+    print(f"Sales rollups up to date until {high_water.isoformat()}")
+
+
+async def rollups_backfill(args):
+    async with standalone_session() as session:
+        high_water = await backfill_sales_rollups(session, since=args.since)
+    print(f"Sales rollups rebuilt until {high_water.isoformat()}")
+
+
+async def orders_export(args):
+    output = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        async with standalone_session() as session:
+            chunks = iter_order_rows(session, args.start, args.end, args.chunk_size)
+            if args.format == "parquet":
+                encoded = iter_parquet(chunks)
+            else:
+                encoded = iter_csv(chunks, gzip=args.gzip)
+            async for data in encoded:
+                output.write(data)
+    finally:
+        if args.output:
+            output.close()
+
+
+async def orders_partitions(args):
+    async with standalone_session() as session:
+        created = await create_order_partitions(session, args.start, args.end)
+    print(f"Order partitions created: {created}")
+
+
+async def orders_archive(args):
+    async with standalone_session() as session:
+        archived = await archive_order_partitions(session, args.before, args.schema)
+    for month in archived:
+        print(f"Archived {month:%Y-%m}")
+    print(f"Order partitions archived: {len(archived)}")
+
+
+async def products_import(args):
+    with open(args.path, encoding="utf-8-sig") as file:
+        async with standalone_session() as session:
+            report = await import_products(
+                session,
+                file,
+                ndjson=args.path.endswith((".ndjson", ".jsonl")),
+                batch_size=args.batch_size,
+            )
+    print(
+        f"Products inserted: {report.inserted}, updated: {report.updated}, "
+        f"rejected: {report.rejected}"
+    )
+    for error in report.errors:
+        print(f"  {error}")
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser(
+        "rollups-refresh", help="Fold new orders into the sales rollups."
+    )
+    command.set_defaults(handler=rollups_refresh)
+
+    command = commands.add_parser(
+        "rollups-backfill", help="Rebuild the sales rollups from order history."
+    )
+    command.add_argument(
+        "--since",
+        type=date.fromisoformat,
+        default=None,
+        help="only rebuild days from this date (YYYY-MM-DD); default: everything",
+    )
+    command.set_defaults(handler=rollups_backfill)
+
+    command = commands.add_parser(
+        "orders-export", help="Stream orders with their line items to a file."
+    )
+    command.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    command.add_argument(
+        "--output", default=None, help="file to write; default: standard output"
+    )
+    command.add_argument(
+        "--start",
+        type=datetime.fromisoformat,
+        default=None,
+        help="only orders created at or after this time",
+    )
+    command.add_argument(
+        "--end",
+        type=datetime.fromisoformat,
+        default=None,
+        help="only orders created before this time",
+    )
+    command.add_argument("--gzip", action="store_true", help="gzip the CSV output")
+    command.add_argument("--chunk-size", type=int, default=10_000)
+    command.set_defaults(handler=orders_export)
+
+    command = commands.add_parser(
+        "orders-partitions", help="Create the monthly order partitions ahead of time."
+    )
+    command.add_argument(
+        "--start",
+        type=date.fromisoformat,
+        default=None,
+        help="first month to create (YYYY-MM-DD); default: this month",
+    )
+    command.add_argument(
+        "--end",
+        type=date.fromisoformat,
+        default=None,
+        help="last month to create; default: ORDER_PARTITIONS_AHEAD months ahead",
+    )
+    command.set_defaults(handler=orders_partitions)
+
+    command = commands.add_parser(
+        "orders-archive",
+        help="Detach old order partitions and move them to the archive schema.",
+    )
+    command.add_argument(
+        "--before",
+        type=date.fromisoformat,
+        required=True,
+        help="archive every month before this date (YYYY-MM-DD)",
+    )
+    command.add_argument("--schema", default=None, help="default: ORDER_ARCHIVE_SCHEMA")
+    command.set_defaults(handler=orders_archive)
+
+    command = commands.add_parser(
+        "products-import", help="Bulk load a product catalog from CSV or NDJSON."
+    )
+    command.add_argument("path", help="a .csv, .ndjson or .jsonl file")
+    command.add_argument("--batch-size", type=int, default=5000)
+    command.set_defaults(handler=products_import)
+    return parser
+
+
+def main():
+    args = get_parser().parse_args()
+    asyncio.run(args.handler(args))
+
+
+if __name__ == "__main__":
+    main()
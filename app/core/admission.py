@@ -0,0 +1,123 @@
+import asyncio
+from collections import deque
+from typing import Deque, Dict
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+from app.core.config import settings
+from app.core.routing import route_template
+
+
+class Overloaded(Exception):
+    pass
+
+
+class Limiter:
+    """FIFO concurrency limiter with a bounded wait queue.
+
+    Requests beyond `limit` wait in line; once `max_waiting` are already
+    waiting (or a waiter times out) `acquire` raises `Overloaded` instead.
+    """
+
+    def __init__(self, limit: int, max_waiting: int):
+        self.limit = limit
+        self.max_waiting = max_waiting
+        self.active = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+
+    async def acquire(self, timeout: float):
+        if self.active < self.limit and not self.waiters:
+            self.active += 1
+            return
+        if len(self.waiters) >= self.max_waiting:
+            raise Overloaded
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            self._forget(waiter)
+            raise Overloaded
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()  #   Slot was handed over just before cancellation
+            else:
+                self._forget(waiter)
+            raise
+
+    def release(self):
+        #   Hand the slot straight to the next live waiter, if any
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def _forget(self, waiter: asyncio.Future):
+        try:
+            self.waiters.remove(waiter)
+        except ValueError:
+            pass
+
+
+def overloaded_response() -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server is busy, please retry shortly."},
+        headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER)},
+    )
+
+
+async def pool_timeout_handler(request: Request, exc: Exception) -> JSONResponse:
+    """Turn a connection pool checkout timeout into a fast 503."""
+    return overloaded_response()
+
+
+class AdmissionMiddleware:
+    """Per-route concurrency limits plus a global cap sized to the DB pool.
+
+    Cheap routes listed in `ADMISSION_EXEMPT_PATHS` never queue, so they keep
+    answering while database-bound routes are being shed.
+    """
+
+    def __init__(self, app, pool_capacity: int):
+        self.app = app
+        self.pool = Limiter(pool_capacity, settings.ADMISSION_MAX_WAITING)
+        self.routes: Dict[str, Limiter] = {
+            key: Limiter(limit, settings.ADMISSION_MAX_WAITING)
+            for key, limit in settings.ADMISSION_ROUTE_LIMITS.items()
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self._exempt(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        route = self.routes.get(f"{scope['method']} {route_template(scope)}")
+        acquired = []
+        try:
+            for limiter in (route, self.pool):
+                if limiter is None:
+                    continue
+                await limiter.acquire(settings.ADMISSION_QUEUE_TIMEOUT)
+                acquired.append(limiter)
+        except Overloaded:
+            for limiter in acquired:
+                limiter.release()
+            await overloaded_response()(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            for limiter in acquired:
+                limiter.release()
+
+    @staticmethod
+    def _exempt(path: str) -> bool:
+        return any(
+            path == prefix or (prefix != "/" and path.startswith(prefix + "/"))
+            for prefix in settings.ADMISSION_EXEMPT_PATHS
+        )
@@ -1,6 +1,7 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field, PostgresDsn
 from functools import cached_property
+from typing import Dict, List
 from pydantic import PostgresDsn, computed_field
 
 
@@ -22,6 +23,132 @@ class Settings(BaseSettings):
     POSTGRES_PORT: int = Field(5432, env="POSTGRES_PORT")
     POSTGRES_ECHO: bool = Field(False, env="POSTGRES_ECHO")
     POSTGRES_POOL_SIZE: int = Field(10, env="POSTGRES_POOL_SIZE")
+    POSTGRES_MAX_OVERFLOW: int = Field(10, env="POSTGRES_MAX_OVERFLOW")
+    POSTGRES_POOL_TIMEOUT: float = Field(10, env="POSTGRES_POOL_TIMEOUT")
+
+    #   Admission control: shed load before the connection pool is exhausted
+    ADMISSION_ENABLED: bool = Field(True)
+    ADMISSION_MAX_WAITING: int = Field(50)
+    ADMISSION_QUEUE_TIMEOUT: float = Field(5)
+    ADMISSION_RETRY_AFTER: int = Field(1)
+    ADMISSION_EXEMPT_PATHS: List[str] = Field(
+        [
+            "/",
+            "/v1/products/price",
+            "/v1/products/suggest",
+            "/v1/orders/events",
+            "/docs",
+            "/openapi.json",
+            "/static",
+        ]
+    )
+    ADMISSION_ROUTE_LIMITS: Dict[str, int] = Field(
+        {
+            "POST /v1/users/login": 8,
+            "POST /v1/users/signup": 8,
+            "GET /v1/products": 16,
+            "GET /v1/orders": 16,
+            "GET /v1/orders/emails": 4,
+        }
+    )
+
+    #   Redis (cache, rate limits); Celery keeps using CELERY_BROKER_URL
+    REDIS_URL: str = Field("redis://localhost:6379/1")
+    REDIS_SOCKET_TIMEOUT: float = Field(0.1)
+
+    #   Token-bucket rate limits per client, as "<requests>/<seconds>"
+    RATE_LIMIT_ENABLED: bool = Field(True)
+    RATE_LIMIT_REDIS_RETRY: float = Field(5)
+    RATE_LIMIT_ROUTES: Dict[str, str] = Field(
+        {
+            "POST /v1/users/login": "10/60",
+            "POST /v1/users/refresh": "30/60",
+            "POST /v1/users/signup": "5/60",
+            "POST /v1/products/discount-price": "60/60",
+            "GET /v1/orders/emails": "10/60",
+        }
+    )
+
+    #   Idempotency-Key support for retried writes
+    IDEMPOTENCY_ROUTES: List[str] = Field(
+        ["POST /v1/orders", "POST /v1/orders/{order_id}/fulfill"]
+    )
+    IDEMPOTENCY_TTL: int = Field(24 * 60 * 60)
+    IDEMPOTENCY_LOCK_TTL: int = Field(60)
+    IDEMPOTENCY_WAIT_TIMEOUT: float = Field(30)
+    IDEMPOTENCY_POLL_INTERVAL: float = Field(0.05)
+
+    #   In-memory product name typeahead
+    TYPEAHEAD_ENABLED: bool = Field(True)
+    TYPEAHEAD_REFRESH_SECONDS: float = Field(300)
+
+    #   Domain events, handled in batches after the response is sent
+    EVENTS_BATCH_SIZE: int = Field(100)
+    EVENTS_BATCH_WINDOW: float = Field(0.05)
+    EVENTS_FANOUT_ENABLED: bool = Field(False)
+    EVENTS_CHANNEL: str = Field("events")
+
+    #   Order status changes streamed to clients as server-sent events, from a
+    #   capped Redis stream that also serves reconnects with Last-Event-ID
+    ORDER_FEED_STREAM: str = Field("order-feed")
+    ORDER_FEED_MAXLEN: int = Field(10000)
+    ORDER_FEED_HEARTBEAT: float = Field(15)
+    ORDER_FEED_QUEUE_SIZE: int = Field(100)
+    ORDER_FEED_RETRY_MS: int = Field(3000)
+
+    #   Group commit: concurrent order placements in a worker are gathered for
+    #   up to ORDER_BATCH_WINDOW seconds and written in one transaction
+    ORDER_BATCH_ENABLED: bool = Field(False)
+    ORDER_BATCH_WINDOW: float = Field(0.005)
+    ORDER_BATCH_SIZE: int = Field(100)
+
+    #   Per-request profiling for admins sending PROFILING_HEADER, and for a
+    #   sampled share of requests; profiles are written to PROFILING_DIR
+    PROFILING_ENABLED: bool = Field(False)
+    PROFILING_HEADER: str = Field("X-Profile")
+    PROFILING_SAMPLE_RATE: float = Field(0.0)
+    PROFILING_MODE: str = Field("sampling")
+    PROFILING_INTERVAL: float = Field(0.001)
+    PROFILING_DIR: str = Field("profiles")
+    PROFILING_KEEP: int = Field(200)
+
+    #   OpenTelemetry spans for routes, repository methods, SQL, HTTP and Celery,
+    #   exported as OTLP to a collector ("otlp") or to a JSON lines file ("file")
+    TRACING_ENABLED: bool = Field(False)
+    TRACING_EXPORTER: str = Field("otlp")
+    TRACING_OTLP_ENDPOINT: str = Field("http://localhost:4318/v1/traces")
+    TRACING_FILE: str = Field("traces.jsonl")
+    TRACING_SAMPLE_RATE: float = Field(0.1)
+    TRACING_MAX_QUEUE_SIZE: int = Field(2048)
+    TRACING_STATEMENT_LENGTH: int = Field(2000)
+
+    #   Concurrent identical BaseRepository reads share one query per worker
+    SINGLE_FLIGHT_ENABLED: bool = Field(False)
+
+    #   Reuse prebuilt statements for BaseRepository's keyword filters
+    STATEMENT_CACHE_ENABLED: bool = Field(True)
+
+    #   Read-through row cache for BaseRepository.get_by_id (process LRU + Redis)
+    ROW_CACHE_ENABLED: bool = Field(False)
+    ROW_CACHE_MODELS: List[str] = Field(["products", "groups", "stores"])
+    ROW_CACHE_TTL: int = Field(300)
+    ROW_CACHE_LOCAL_TTL: float = Field(5)
+    ROW_CACHE_LOCAL_SIZE: int = Field(10_000)
+    ROW_CACHE_TOMBSTONE_SECONDS: int = Field(10)
+
+    #   Totals of list endpoints (X-Total-Count): planner estimates below the
+    #   threshold are counted exactly; cached exact counts live this long
+    COUNT_EXACT_THRESHOLD: int = Field(10_000)
+    COUNT_CACHE_TTL: int = Field(60)
+
+    #   Monthly partitions of orders/order_products, created ahead by Celery beat
+    ORDER_PARTITIONS_AHEAD: int = Field(3)
+    ORDER_PARTITIONS_REFRESH_SECONDS: float = Field(86400)
+    ORDER_ARCHIVE_SCHEMA: str = Field("archive")
+
+    #   Sales rollups refreshed by Celery beat
+    ROLLUP_REFRESH_SECONDS: float = Field(300)
+    ROLLUP_LAG_SECONDS: float = Field(60)
 
     ACCESS_TOKEN_EXPIRE_MINUTES: str
     REFRESH_TOKEN_EXPIRE_MINUTES: str
@@ -30,6 +157,11 @@ class Settings(BaseSettings):
     JWT_SECRET_KEY: str
     JWT_REFRESH_SECRET_KEY: str
 
+    #   Access tokens carrying user id, admin flag, group and discount as claims,
+    #   so authorization and pricing skip the user lookup
+    JWT_CLAIMS_ENABLED: bool = Field(False)
+    JWT_CLAIMS_EXPIRE_MINUTES: int = Field(5)
+
     #   Single Sign On (SSO)
     GOOGLE_CLIENT_ID: str
     GOOGLE_CLIENT_SECRET: str
@@ -6,16 +6,15 @@ from jose import jwt
 from pydantic import ValidationError
 
 from app.core.config import settings
+from app.core.revocation import is_revoked
 from app.db.session import get_session
 from app.repository.base import BaseRepository
-from app.models.user import User, TokenPayload
+from app.models.user import CurrentUser, Group, User, TokenPayload
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="v1/users/login", scheme_name="JWT")
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme), session: AsyncSession = Depends(get_session)
-) -> User:
+def decode_access_token(token: str) -> TokenPayload:
     try:
         payload = jwt.decode(
             token, settings.JWT_SECRET_KEY, algorithms=[settings.ALGORITHM]
@@ -34,6 +33,78 @@ async def get_current_user(
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    return token_data
+
+
+def decode_refresh_token(token: str) -> TokenPayload:
+    try:
+        payload = jwt.decode(
+            token, settings.JWT_REFRESH_SECRET_KEY, algorithms=[settings.ALGORITHM]
+        )
+        token_data = TokenPayload(**payload)
+    except (jwt.JWTError, ValidationError):
+        token_data = None
+    if token_data is None or token_data.jti is None or token_data.fam is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+        )
+    return token_data
+
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme), session: AsyncSession = Depends(get_session)
+) -> User:
+    token_data = decode_access_token(token)
     #   Get user from parsed token
     user = await BaseRepository(User).get_by_item(session=session, email=token_data.sub)
     return user
+
+
+async def get_current_claims(
+    token: str = Depends(oauth2_scheme), session: AsyncSession = Depends(get_session)
+) -> CurrentUser:
+    """The caller from the token's claims, falling back to the database."""
+    token_data = decode_access_token(token)
+    if settings.JWT_CLAIMS_ENABLED and token_data.uid is not None:
+        revoked = await is_revoked(token_data)
+        if revoked:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token revoked",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        if revoked is False:
+            return CurrentUser(
+                id=token_data.uid,
+                email=token_data.sub,
+                is_admin=token_data.adm,
+                group_id=token_data.gid,
+                discount_percent=token_data.dsc or 0,
+            )
+
+    #   Plain token, or revocations could not be checked
+    user = await BaseRepository(User).get_by_item(session=session, email=token_data.sub)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    group = await session.get(Group, user.group_id) if user.group_id else None
+    return CurrentUser(
+        id=user.id,
+        email=user.email,
+        is_admin=user.is_admin,
+        group_id=user.group_id,
+        discount_percent=group.discount_percent if group else 0,
+    )
+
+
+def get_current_admin(user: CurrentUser = Depends(get_current_claims)) -> CurrentUser:
+    if not user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Do not have sufficient rights!",
+        )
+    return user
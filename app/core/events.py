@@ -0,0 +1,174 @@
+import asyncio
+import json
+import uuid
+from collections import defaultdict
+from typing import Awaitable, Callable, ClassVar, Dict, List, Optional, Tuple, Type
+from uuid import UUID
+
+from fastapi_events import in_req_res_cycle
+from fastapi_events.dispatcher import dispatch
+from fastapi_events.handlers.local import local_handler
+from fastapi_events.typing import Event
+from pydantic import BaseModel
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+
+Handler = Callable[[List[dict]], Awaitable[None]]
+
+
+class DomainEvent(BaseModel):
+    event_name: ClassVar[str]
+
+
+class OrderCreated(DomainEvent):
+    event_name: ClassVar[str] = "order.created"
+
+    order_id: UUID
+    user_id: UUID
+    total_price: float
+    from_admin: bool = False
+    store_id: Optional[UUID] = None
+
+
+class OrderFulfilled(DomainEvent):
+    event_name: ClassVar[str] = "order.fulfilled"
+
+    order_id: UUID
+    user_id: UUID
+    email: str
+    mail_subject: str
+    mail_body: str
+
+
+class OrderDeleted(DomainEvent):
+    event_name: ClassVar[str] = "order.deleted"
+
+    order_id: UUID
+    user_id: UUID
+
+
+class ProductUpdated(DomainEvent):
+    event_name: ClassVar[str] = "product.updated"
+
+    product_id: UUID
+    name: Optional[str] = None
+    deleted: bool = False
+
+
+class UserUpdated(DomainEvent):
+    event_name: ClassVar[str] = "user.updated"
+
+    user_id: UUID
+
+
+class EventBus:
+    """Runs domain event handlers in the background, a batch at a time.
+
+    Events published during a request are handed over by fastapi_events once
+    the response has been sent. Each handler receives all payloads of its event
+    collected within `EVENTS_BATCH_WINDOW` seconds (at most `EVENTS_BATCH_SIZE`).
+    Handlers subscribed with `fanout=True` maintain per-worker state; with
+    `EVENTS_FANOUT_ENABLED` they also run for events relayed through Redis
+    from the other workers.
+    """
+
+    def __init__(self):
+        self.handlers: Dict[str, List[Tuple[Handler, bool]]] = defaultdict(list)
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.origin = uuid.uuid4().hex
+
+    def subscribe(self, event: Type[DomainEvent], fanout: bool = False):
+        def decorator(handler: Handler) -> Handler:
+            self.handlers[event.event_name].append((handler, fanout))
+            return handler
+
+        return decorator
+
+    def enqueue(self, event_name: str, payload: dict):
+        self.queue.put_nowait((event_name, payload))
+
+    async def run(self, redis: Redis):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + settings.EVENTS_BATCH_WINDOW
+            while len(batch) < settings.EVENTS_BATCH_SIZE:
+                try:
+                    batch.append(
+                        await asyncio.wait_for(self.queue.get(), deadline - loop.time())
+                    )
+                except asyncio.TimeoutError:
+                    break
+            await self.handle(batch)
+            if settings.EVENTS_FANOUT_ENABLED:
+                await self.relay(redis, batch)
+
+    async def drain(self):
+        """Handle whatever is still queued, e.g. on shutdown."""
+        batch = []
+        while not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+        if batch:
+            await self.handle(batch)
+
+    async def handle(self, batch: List[Tuple[str, dict]], remote: bool = False):
+        grouped: Dict[str, List[dict]] = defaultdict(list)
+        for event_name, payload in batch:
+            grouped[event_name].append(payload)
+        for event_name, payloads in grouped.items():
+            for handler, fanout in self.handlers.get(event_name, ()):
+                if remote and not fanout:
+                    continue
+                try:
+                    await handler(payloads)
+                except Exception as e:
+                    print(f"Error handling {event_name} events: {e}")
+
+    async def relay(self, redis: Redis, batch: List[Tuple[str, dict]]):
+        message = json.dumps({"origin": self.origin, "events": batch})
+        try:
+            await redis.publish(settings.EVENTS_CHANNEL, message)
+        except RedisError as e:
+            print(f"Error relaying events: {e}")
+
+    async def listen(self):
+        """Run the fan-out handlers for events published by other workers."""
+        #   Own connection: pub/sub reads block and must not hit the socket timeout
+        redis = Redis.from_url(settings.REDIS_URL)
+        try:
+            while True:
+                try:
+                    async with redis.pubsub() as pubsub:
+                        await pubsub.subscribe(settings.EVENTS_CHANNEL)
+                        async for message in pubsub.listen():
+                            if message["type"] != "message":
+                                continue
+                            data = json.loads(message["data"])
+                            if data["origin"] != self.origin:
+                                events = [tuple(event) for event in data["events"]]
+                                await self.handle(events, remote=True)
+                except RedisError as e:
+                    print(f"Error listening for events: {e}")
+                    await asyncio.sleep(1)
+        finally:
+            await redis.aclose()
+
+
+event_bus = EventBus()
+
+
+def publish(event: DomainEvent):
+    """Publish after the change is committed; handlers never delay the response."""
+    payload = event.model_dump(mode="json")
+    if in_req_res_cycle.get():
+        dispatch(event.event_name, payload, validate_payload=False)
+    else:
+        event_bus.enqueue(event.event_name, payload)
+
+
+@local_handler.register(event_name="*")
+async def enqueue_event(event: Event):
+    event_name, payload = event
+    event_bus.enqueue(event_name, payload)
@@ -0,0 +1,63 @@
+"""Side effects of domain events, run by `event_bus` after the response."""
+
+import asyncio
+from typing import List, Optional
+from uuid import UUID
+
+from app.api.enums import FulfillStatus
+from app.core.events import (
+    OrderCreated,
+    OrderDeleted,
+    OrderFulfilled,
+    ProductUpdated,
+    event_bus,
+)
+from app.core.order_feed import order_feed
+from app.core.tasks import send_email_task
+from app.core.typeahead import product_index
+from app.db.redis import redis_client
+
+
+@event_bus.subscribe(OrderFulfilled)
+async def send_fulfillment_emails(payloads: List[dict]):
+    for payload in payloads:
+        #   Queueing to the broker is blocking I/O
+        await asyncio.to_thread(
+            send_email_task.delay,
+            payload["mail_subject"],
+            payload["mail_body"],
+            payload["email"],
+        )
+
+
+@event_bus.subscribe(ProductUpdated, fanout=True)
+async def update_typeahead_index(payloads: List[dict]):
+    for payload in payloads:
+        if payload["deleted"]:
+            product_index.remove(UUID(payload["product_id"]))
+        else:
+            product_index.add(UUID(payload["product_id"]), payload["name"])
+
+
+def feed_order_status(event_name: str, fulfill_status: Optional[str]):
+    async def handler(payloads: List[dict]):
+        changes = [
+            {
+                "order_id": payload["order_id"],
+                "user_id": payload["user_id"],
+                "fulfill_status": fulfill_status,
+            }
+            for payload in payloads
+        ]
+        await order_feed.append(redis_client, event_name, changes)
+
+    return handler
+
+
+#   Pushed to the order status event streams of every worker
+for event, fulfill_status in (
+    (OrderCreated, FulfillStatus.unfulfilled.value),
+    (OrderFulfilled, FulfillStatus.fulfilled.value),
+    (OrderDeleted, None),
+):
+    event_bus.subscribe(event)(feed_order_status(event.event_name, fulfill_status))
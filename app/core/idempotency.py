@@ -0,0 +1,226 @@
+import asyncio
+import base64
+import hashlib
+import json
+import time
+from typing import Dict, List, Optional
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from starlette.responses import JSONResponse
+
+from app.core.config import settings
+from app.core.ratelimit import client_identity
+from app.core.routing import route_template
+
+PENDING = "pending"
+DONE = "done"
+
+
+async def read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+
+class IdempotencyMiddleware:
+    """Honour `Idempotency-Key` on the routes listed in `IDEMPOTENCY_ROUTES`.
+
+    The first request with a key runs normally and its response is stored in
+    Redis for `IDEMPOTENCY_TTL` seconds. Duplicates that arrive while it is
+    still running wait for it (in-process through a shared future, across
+    workers by polling Redis) and every later duplicate gets the stored
+    response back without touching the database. If Redis is unreachable
+    the key is only enforced within the worker.
+    """
+
+    def __init__(self, app, redis: Redis):
+        self.app = app
+        self.redis = redis
+        self.routes = set(settings.IDEMPOTENCY_ROUTES)
+        self.inflight: Dict[str, asyncio.Future] = {}
+
+    async def __call__(self, scope, receive, send):
+        key = self._header(scope) if scope["type"] == "http" else None
+        route = f"{scope.get('method')} {route_template(scope)}" if key else None
+        if route not in self.routes:
+            await self.app(scope, receive, send)
+            return
+        if len(key) > 255:
+            response = JSONResponse(
+                status_code=400, content={"detail": "Idempotency-Key is too long."}
+            )
+            await response(scope, receive, send)
+            return
+
+        body = await read_body(receive)
+        fingerprint = hashlib.sha256(body).hexdigest()
+        cache_key = f"idempotency:{route}:{client_identity(scope)}:{key}"
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_TIMEOUT
+
+        while True:
+            inflight = self.inflight.get(cache_key)
+            if inflight is not None:
+                #   Shielded so a disconnecting duplicate never cancels the original
+                try:
+                    record = await asyncio.wait_for(
+                        asyncio.shield(inflight), deadline - time.monotonic()
+                    )
+                except asyncio.TimeoutError:
+                    await self._conflict(scope, receive, send)
+                    return
+            else:
+                record = None
+
+            record = record or await self._load(cache_key)
+            if record is not None:
+                if record["fingerprint"] != fingerprint:
+                    response = JSONResponse(
+                        status_code=422,
+                        content={
+                            "detail": "Idempotency-Key was already used with a "
+                            "different request body."
+                        },
+                    )
+                    await response(scope, receive, send)
+                    return
+                if record["state"] == DONE:
+                    await self._replay(record, send)
+                    return
+                #   Running in another worker
+                if time.monotonic() >= deadline:
+                    await self._conflict(scope, receive, send)
+                    return
+                await asyncio.sleep(settings.IDEMPOTENCY_POLL_INTERVAL)
+                continue
+
+            if cache_key in self.inflight:
+                continue
+            future = asyncio.get_running_loop().create_future()
+            self.inflight[cache_key] = future
+            if await self._claim(cache_key, fingerprint):
+                break
+            self._resolve(cache_key, future)
+
+        record = None
+        try:
+            record = await self._run(scope, body, receive, send, cache_key, fingerprint)
+        finally:
+            self._resolve(cache_key, future, record)
+
+    async def _run(self, scope, body, receive, send, cache_key, fingerprint):
+        response: dict = {"status": 500, "headers": [], "body": []}
+        body_sent = False
+
+        async def replay_receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                response["body"].append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, capture)
+        except BaseException:
+            await self._forget(cache_key)
+            raise
+
+        if response["status"] >= 500:
+            #   Let the client retry server errors for real
+            await self._forget(cache_key)
+            return None
+        record = {
+            "state": DONE,
+            "fingerprint": fingerprint,
+            "status": response["status"],
+            "headers": [
+                [name.decode("latin-1"), value.decode("latin-1")]
+                for name, value in response["headers"]
+            ],
+            "body": base64.b64encode(b"".join(response["body"])).decode(),
+        }
+        await self._store(cache_key, record, settings.IDEMPOTENCY_TTL)
+        return record
+
+    @staticmethod
+    def _header(scope) -> Optional[str]:
+        for name, value in scope["headers"]:
+            if name == b"idempotency-key":
+                return value.decode("latin-1").strip() or None
+        return None
+
+    @staticmethod
+    async def _replay(record: dict, send):
+        headers: List = [
+            (name.encode("latin-1"), value.encode("latin-1"))
+            for name, value in record["headers"]
+        ]
+        headers.append((b"idempotent-replayed", b"true"))
+        await send(
+            {
+                "type": "http.response.start",
+                "status": record["status"],
+                "headers": headers,
+            }
+        )
+        await send(
+            {"type": "http.response.body", "body": base64.b64decode(record["body"])}
+        )
+
+    @staticmethod
+    async def _conflict(scope, receive, send):
+        response = JSONResponse(
+            status_code=409,
+            content={"detail": "A request with this Idempotency-Key is in progress."},
+            headers={"Retry-After": "1"},
+        )
+        await response(scope, receive, send)
+
+    def _resolve(
+        self, cache_key: str, future: asyncio.Future, record: Optional[dict] = None
+    ):
+        if self.inflight.get(cache_key) is future:
+            del self.inflight[cache_key]
+        if not future.done():
+            future.set_result(record)
+
+    async def _load(self, cache_key: str) -> Optional[dict]:
+        try:
+            raw = await self.redis.get(cache_key)
+        except RedisError:
+            return None
+        return json.loads(raw) if raw else None
+
+    async def _claim(self, cache_key: str, fingerprint: str) -> bool:
+        record = json.dumps({"state": PENDING, "fingerprint": fingerprint})
+        try:
+            return bool(
+                await self.redis.set(
+                    cache_key, record, nx=True, ex=settings.IDEMPOTENCY_LOCK_TTL
+                )
+            )
+        except RedisError:
+            return True
+
+    async def _store(self, cache_key: str, record: dict, ttl: int):
+        try:
+            await self.redis.set(cache_key, json.dumps(record), ex=ttl)
+        except RedisError:
+            pass
+
+    async def _forget(self, cache_key: str):
+        try:
+            await self.redis.delete(cache_key)
+        except RedisError:
+            pass
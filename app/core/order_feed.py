@@ -0,0 +1,177 @@
+import asyncio
+import json
+import re
+from collections import defaultdict
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+
+#   Redis stream entry ids, also the SSE event ids: "<ms>-<seq>"
+ENTRY_ID = re.compile(r"^\d+-\d+$")
+
+
+def entry_key(entry_id: str) -> Tuple[int, int]:
+    ms, seq = entry_id.split("-")
+    return int(ms), int(seq)
+
+
+def sse(data: str, event: Optional[str] = None, id: Optional[str] = None) -> str:
+    lines = [f"id: {id}"] if id else []
+    if event:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {data}")
+    return "\n".join(lines) + "\n\n"
+
+
+class Subscriber:
+    """One open event stream: a customer's own orders, or every order for admins."""
+
+    def __init__(self, user_id: Optional[str], order_id: Optional[str]):
+        self.user_id = user_id
+        self.order_id = order_id
+        self.queue: asyncio.Queue = asyncio.Queue(settings.ORDER_FEED_QUEUE_SIZE)
+        self.overflowed = False
+
+    def wants(self, change: dict) -> bool:
+        return self.user_id in (None, change["user_id"]) and (
+            self.order_id is None or change["order_id"] == self.order_id
+        )
+
+
+class OrderFeed:
+    """Order status changes, fanned out to server-sent event streams.
+
+    Changes are appended to a capped Redis stream by the worker that made
+    them. Every worker tails that stream on one connection and hands each
+    change to its own open streams, so an idle client costs a queue and a
+    suspended coroutine, not a connection. Entry ids double as event ids: a
+    client that reconnects with `Last-Event-ID` first gets what it missed,
+    or a `reset` event once that has been trimmed away. A client too slow to
+    keep up is disconnected and resumes the same way.
+    """
+
+    def __init__(self):
+        #   Keyed by customer id, None for admins
+        self.subscribers: Dict[Optional[str], Set[Subscriber]] = defaultdict(set)
+
+    async def append(self, redis: Redis, event_name: str, changes: List[dict]):
+        try:
+            async with redis.pipeline(transaction=False) as pipe:
+                for change in changes:
+                    pipe.xadd(
+                        settings.ORDER_FEED_STREAM,
+                        {"event": event_name, "data": json.dumps(change)},
+                        maxlen=settings.ORDER_FEED_MAXLEN,
+                        approximate=True,
+                    )
+                await pipe.execute()
+        except RedisError as e:
+            print(f"Error appending order status changes: {e}")
+
+    def dispatch(self, entry_id: str, event_name: str, change: dict):
+        for key in (None, change["user_id"]):
+            for subscriber in self.subscribers.get(key, ()):
+                if subscriber.overflowed or not subscriber.wants(change):
+                    continue
+                try:
+                    subscriber.queue.put_nowait((entry_id, event_name, change))
+                except asyncio.QueueFull:
+                    subscriber.overflowed = True
+                    subscriber.queue.get_nowait()
+                    subscriber.queue.put_nowait(None)
+
+    async def run(self):
+        """Tail the stream and dispatch new changes to this worker's subscribers."""
+        #   Own connection: blocking reads must not hit the socket timeout
+        redis = Redis.from_url(settings.REDIS_URL, decode_responses=True)
+        last_id = None
+        try:
+            while True:
+                try:
+                    if last_id is None:
+                        latest = await redis.xrevrange(
+                            settings.ORDER_FEED_STREAM, count=1
+                        )
+                        last_id = latest[0][0] if latest else "0-0"
+                    response = await redis.xread(
+                        {settings.ORDER_FEED_STREAM: last_id}, count=500, block=0
+                    )
+                    for _, entries in response:
+                        for entry_id, fields in entries:
+                            last_id = entry_id
+                            self.dispatch(
+                                entry_id, fields["event"], json.loads(fields["data"])
+                            )
+                except RedisError as e:
+                    print(f"Error reading order status changes: {e}")
+                    await asyncio.sleep(1)
+        finally:
+            await redis.aclose()
+
+    async def stream(
+        self,
+        redis: Redis,
+        user_id: Optional[str],
+        order_id: Optional[str] = None,
+        last_event_id: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """Server-sent events for one client, until it disconnects."""
+        subscriber = Subscriber(user_id, order_id)
+        #   Subscribe before replaying so nothing falls in between
+        self.subscribers[user_id].add(subscriber)
+        try:
+            yield f"retry: {settings.ORDER_FEED_RETRY_MS}\n\n"
+            seen = None
+            if last_event_id and ENTRY_ID.match(last_event_id):
+                missed, seen = await self._replay(redis, subscriber, last_event_id)
+                for message in missed:
+                    yield message
+            while True:
+                try:
+                    item = await asyncio.wait_for(
+                        subscriber.queue.get(), settings.ORDER_FEED_HEARTBEAT
+                    )
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                if item is None:  #   Overflowed; the client resumes from its last id
+                    return
+                entry_id, event_name, change = item
+                if seen is not None and entry_key(entry_id) <= seen:
+                    continue
+                yield sse(json.dumps(change), event=event_name, id=entry_id)
+        finally:
+            subscribers = self.subscribers[user_id]
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self.subscribers[user_id]
+
+    async def _replay(
+        self, redis: Redis, subscriber: Subscriber, last_event_id: str
+    ) -> Tuple[List[str], Optional[Tuple[int, int]]]:
+        """The events after `last_event_id`, and the id of the last one read."""
+        stream = settings.ORDER_FEED_STREAM
+        messages = []
+        oldest = await redis.xrange(stream, count=1)
+        if oldest and entry_key(oldest[0][0].decode()) > entry_key(last_event_id):
+            #   What followed the client's last event may have been trimmed
+            messages.append(sse("{}", event="reset"))
+        missed = await redis.xrange(stream, min=f"({last_event_id}", max="+")
+        for entry_id, fields in missed:
+            change = json.loads(fields[b"data"])
+            if subscriber.wants(change):
+                messages.append(
+                    sse(
+                        fields[b"data"].decode(),
+                        event=fields[b"event"].decode(),
+                        id=entry_id.decode(),
+                    )
+                )
+        seen = entry_key(missed[-1][0].decode()) if missed else None
+        return messages, seen
+
+
+order_feed = OrderFeed()
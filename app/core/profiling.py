@@ -0,0 +1,185 @@
+import asyncio
+import cProfile
+import os
+import random
+import re
+import time
+import uuid
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.core.deps import decode_access_token
+from app.core.routing import route_template
+from app.db.session import SessionLocal
+from app.models import ProfileInfo, User
+from app.repository.base import BaseRepository
+
+try:
+    from pyinstrument import Profiler
+    from pyinstrument.renderers import SpeedscopeRenderer
+except ImportError:  #   Sampling profiles are optional
+    Profiler = None
+
+SAMPLING_AVAILABLE = Profiler is not None
+#   20261019T142501-1520ms-GET-v1_orders_order_id-3f9a1c.speedscope.json
+PROFILE_NAME = re.compile(
+    r"^(?P<at>\d{8}T\d{6})-(?P<ms>\d+)ms-(?P<method>[A-Z]+)-(?P<route>\w*)"
+    r"-[0-9a-f]{6}\.(?:speedscope\.json|prof)$"
+)
+
+
+class RequestProfile:
+    """One request's profile: pyinstrument sampling, or cProfile when asked for
+    (or when pyinstrument is not installed).
+
+    Sampling follows the request's own task across awaits. cProfile records
+    every call on the event loop thread, including other requests running
+    meanwhile; its `.prof` output opens as a flamegraph in snakeviz/flameprof.
+    """
+
+    def __init__(self, sampling: bool):
+        if sampling and SAMPLING_AVAILABLE:
+            self.profiler = Profiler(
+                interval=settings.PROFILING_INTERVAL, async_mode="enabled"
+            )
+            self.extension = "speedscope.json"
+        else:
+            self.profiler = cProfile.Profile()
+            self.extension = "prof"
+
+    def start(self):
+        if isinstance(self.profiler, cProfile.Profile):
+            self.profiler.enable()
+        else:
+            self.profiler.start()
+
+    def stop(self):
+        if isinstance(self.profiler, cProfile.Profile):
+            self.profiler.disable()
+        else:
+            self.profiler.stop()
+
+    def save(self, path: str):
+        if isinstance(self.profiler, cProfile.Profile):
+            self.profiler.dump_stats(path)
+        else:
+            with open(path, "w") as file:
+                file.write(self.profiler.output(SpeedscopeRenderer()))
+
+
+class ProfilingMiddleware:
+    """Profile requests from admins that send `PROFILING_HEADER`, plus a random
+    `PROFILING_SAMPLE_RATE` share of all requests.
+
+    Only added when `PROFILING_ENABLED` is on, inside admission control and
+    rate limiting, so the admin check (a DB lookup unless the token carries
+    the `adm` claim) never runs for shed requests. The header value picks the
+    profiler (`deterministic` for cProfile, anything else samples). One
+    request is profiled at a time per worker; the others run untouched.
+    Profiles go to `PROFILING_DIR`, which keeps the newest `PROFILING_KEEP`.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.header = settings.PROFILING_HEADER.lower().encode("latin-1")
+        self.busy = False
+
+    async def __call__(self, scope, receive, send):
+        mode = await self._mode(scope) if scope["type"] == "http" else None
+        if mode is None or self.busy:
+            await self.app(scope, receive, send)
+            return
+
+        self.busy = True
+        profile = RequestProfile(sampling=mode != "deterministic")
+        started = time.perf_counter()
+        profile.start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profile.stop()
+            self.busy = False
+            elapsed = time.perf_counter() - started
+            try:
+                await asyncio.to_thread(save_profile, profile, scope, elapsed)
+            except OSError as e:
+                print(f"Error saving profile: {e}")
+
+    async def _mode(self, scope) -> Optional[str]:
+        requested = None
+        authorization = None
+        for name, value in scope["headers"]:
+            if name == self.header:
+                requested = value.decode("latin-1").strip().lower() or "sampling"
+            elif name == b"authorization":
+                authorization = value.decode("latin-1")
+        if requested is not None and await is_admin(authorization):
+            return requested
+        if settings.PROFILING_SAMPLE_RATE and (
+            random.random() < settings.PROFILING_SAMPLE_RATE
+        ):
+            return settings.PROFILING_MODE
+        return None
+
+
+async def is_admin(authorization: Optional[str]) -> bool:
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        token_data = decode_access_token(token)
+    except HTTPException:
+        return False
+    if settings.JWT_CLAIMS_ENABLED and token_data.adm is not None:
+        return token_data.adm
+    async with SessionLocal() as session:
+        user = await BaseRepository(User).get_by_item(
+            session=session, email=token_data.sub
+        )
+    return bool(user and user.is_admin)
+
+
+def save_profile(profile: RequestProfile, scope, elapsed: float):
+    os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+    route = re.sub(r"\W+", "_", route_template(scope)).strip("_")
+    name = (
+        f"{datetime.utcnow():%Y%m%dT%H%M%S}-{elapsed * 1000:.0f}ms-"
+        f"{scope['method']}-{route}-{uuid.uuid4().hex[:6]}.{profile.extension}"
+    )
+    profile.save(os.path.join(settings.PROFILING_DIR, name))
+    for stale in list_profiles()[settings.PROFILING_KEEP :]:
+        os.remove(os.path.join(settings.PROFILING_DIR, stale.name))
+
+
+def list_profiles() -> List[ProfileInfo]:
+    """Stored profiles, newest first."""
+    if not os.path.isdir(settings.PROFILING_DIR):
+        return []
+    profiles = []
+    for name in os.listdir(settings.PROFILING_DIR):
+        match = PROFILE_NAME.match(name)
+        if match is None:
+            continue
+        profiles.append(
+            ProfileInfo(
+                name=name,
+                created_at=datetime.strptime(match["at"], "%Y%m%dT%H%M%S"),
+                duration_ms=int(match["ms"]),
+                method=match["method"],
+                route=match["route"],
+                size=os.path.getsize(os.path.join(settings.PROFILING_DIR, name)),
+            )
+        )
+    profiles.sort(key=lambda profile: (profile.created_at, profile.name), reverse=True)
+    return profiles
+
+
+def profile_path(name: str) -> Optional[str]:
+    """Path of a stored profile, None for names that are not profiles."""
+    if PROFILE_NAME.match(name) is None:
+        return None
+    path = os.path.join(settings.PROFILING_DIR, name)
+    return path if os.path.isfile(path) else None
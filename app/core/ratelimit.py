@@ -0,0 +1,190 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional
+
+from jose import jwt
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from starlette.responses import JSONResponse
+
+from app.core.config import settings
+from app.core.routing import route_template
+
+#   Atomic token bucket. Uses the Redis clock so every worker agrees on time.
+#   Returns {allowed, remaining, retry_after_ms, reset_ms}.
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry = math.ceil((cost - tokens) / rate)
+end
+local reset = math.ceil((capacity - tokens) / rate)
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], reset + 1000)
+return {allowed, math.floor(tokens), retry, reset}
+"""
+
+
+class Budget(NamedTuple):
+    capacity: int
+    period: float  #   seconds to refill an empty bucket
+
+    @property
+    def rate_per_ms(self) -> float:
+        return self.capacity / (self.period * 1000)
+
+    @classmethod
+    def parse(cls, value: str) -> "Budget":
+        requests, seconds = value.split("/")
+        return cls(int(requests), float(seconds))
+
+
+class Decision(NamedTuple):
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float  #   seconds
+    reset: float  #   seconds until the bucket is full again
+
+
+class LocalBuckets:
+    """In-process token buckets used while Redis is unreachable.
+
+    Each worker keeps its own buckets, so the effective budget is multiplied
+    by the number of workers for as long as the fallback is active.
+    """
+
+    def __init__(self, max_keys: int = 10_000):
+        self.max_keys = max_keys
+        self.buckets: "OrderedDict[str, list]" = OrderedDict()
+
+    def hit(self, key: str, budget: Budget, cost: int = 1) -> Decision:
+        now = time.monotonic() * 1000
+        tokens, ts = self.buckets.pop(key, (budget.capacity, now))
+        tokens = min(budget.capacity, tokens + (now - ts) * budget.rate_per_ms)
+        allowed = tokens >= cost
+        retry = 0.0
+        if allowed:
+            tokens -= cost
+        else:
+            retry = (cost - tokens) / budget.rate_per_ms
+        self.buckets[key] = [tokens, now]
+        if len(self.buckets) > self.max_keys:
+            self.buckets.popitem(last=False)
+        reset = (budget.capacity - tokens) / budget.rate_per_ms
+        return Decision(
+            allowed, budget.capacity, math.floor(tokens), retry / 1000, reset / 1000
+        )
+
+
+class RateLimiter:
+    def __init__(self, redis: Redis):
+        self.redis = redis
+        self.script = redis.register_script(TOKEN_BUCKET_LUA)
+        self.local = LocalBuckets()
+        self.redis_down_until = 0.0
+
+    async def hit(self, key: str, budget: Budget, cost: int = 1) -> Decision:
+        if time.monotonic() >= self.redis_down_until:
+            try:
+                allowed, remaining, retry, reset = await self.script(
+                    keys=[f"ratelimit:{key}"],
+                    args=[budget.capacity, budget.rate_per_ms, cost],
+                )
+                return Decision(
+                    bool(allowed),
+                    budget.capacity,
+                    remaining,
+                    retry / 1000,
+                    reset / 1000,
+                )
+            except (RedisError, OSError, asyncio.TimeoutError):
+                #   Stop trying Redis for a while instead of paying a timeout per request
+                self.redis_down_until = (
+                    time.monotonic() + settings.RATE_LIMIT_REDIS_RETRY
+                )
+        return self.local.hit(key, budget, cost)
+
+
+def client_identity(scope) -> str:
+    """Rate-limit key: the JWT subject when a valid token is sent, else the IP."""
+    for name, value in scope["headers"]:
+        if name == b"authorization" and value[:7].lower() == b"bearer ":
+            try:
+                payload = jwt.decode(
+                    value[7:].decode(),
+                    settings.JWT_SECRET_KEY,
+                    algorithms=[settings.ALGORITHM],
+                )
+                if payload.get("sub"):
+                    return f"user:{payload['sub']}"
+            except (jwt.JWTError, UnicodeDecodeError):
+                pass
+            break
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+def rate_limit_headers(decision: Decision) -> Dict[str, str]:
+    return {
+        "RateLimit-Limit": str(decision.limit),
+        "RateLimit-Remaining": str(max(0, decision.remaining)),
+        "RateLimit-Reset": str(math.ceil(decision.reset)),
+    }
+
+
+class RateLimitMiddleware:
+    """Per-client, per-route token buckets configured by `RATE_LIMIT_ROUTES`."""
+
+    def __init__(self, app, redis: Redis):
+        self.app = app
+        self.limiter = RateLimiter(redis)
+        self.budgets: Dict[str, Budget] = {
+            route: Budget.parse(value)
+            for route, value in settings.RATE_LIMIT_ROUTES.items()
+        }
+
+    async def __call__(self, scope, receive, send):
+        budget: Optional[Budget] = None
+        if scope["type"] == "http" and self.budgets:
+            route = f"{scope['method']} {route_template(scope)}"
+            budget = self.budgets.get(route)
+        if budget is None:
+            await self.app(scope, receive, send)
+            return
+
+        decision = await self.limiter.hit(f"{route}:{client_identity(scope)}", budget)
+        headers = rate_limit_headers(decision)
+        if not decision.allowed:
+            headers["Retry-After"] = str(max(1, math.ceil(decision.retry_after)))
+            response = JSONResponse(
+                status_code=429,
+                content={"detail": "Too many requests, please slow down."},
+                headers=headers,
+            )
+            await response(scope, receive, send)
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (name.lower().encode(), value.encode())
+                    for name, value in headers.items()
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
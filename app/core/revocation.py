@@ -0,0 +1,72 @@
+import time
+from typing import Iterable, Optional
+
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.db.redis import redis_client
+from app.models.user import TokenPayload
+
+USER_KEY = "token:revoked:user:{}"
+GROUP_KEY = "token:revoked:group:{}"
+REFRESH_USED_KEY = "token:refresh:used:{}"
+REFRESH_FAMILY_KEY = "token:refresh:revoked:{}"
+
+
+async def revoke_tokens(user_ids: Iterable = (), group_ids: Iterable = ()):
+    """Reject the self-contained tokens issued so far to these users or groups.
+
+    Entries only live as long as such a token, after that every older token
+    has expired anyway, so the set stays small.
+    """
+    if not settings.JWT_CLAIMS_ENABLED:
+        return
+    keys = [USER_KEY.format(id) for id in user_ids]
+    keys += [GROUP_KEY.format(id) for id in group_ids]
+    if not keys:
+        return
+    now = int(time.time())
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.set(key, now, ex=settings.JWT_CLAIMS_EXPIRE_MINUTES * 60)
+            await pipe.execute()
+    except RedisError as e:
+        print(f"Error revoking tokens: {e}")
+
+
+async def is_revoked(payload: TokenPayload) -> Optional[bool]:
+    """None when Redis cannot tell, the caller must then check the database."""
+    keys = [USER_KEY.format(payload.uid)]
+    if payload.gid is not None:
+        keys.append(GROUP_KEY.format(payload.gid))
+    try:
+        revoked_at = await redis_client.mget(keys)
+    except RedisError:
+        return None
+    return any(
+        value is not None and (payload.iat or 0) <= int(value) for value in revoked_at
+    )
+
+
+async def use_refresh_token(payload: TokenPayload) -> bool:
+    """Spend a refresh token; False if it was spent before or its chain is revoked.
+
+    Presenting a spent token means it leaked, so the whole rotation chain is
+    revoked and the legitimate holder has to log in again as well. Entries
+    expire with the tokens. Raises RedisError when the store is unreachable.
+    """
+    used_key = REFRESH_USED_KEY.format(payload.jti)
+    family_key = REFRESH_FAMILY_KEY.format(payload.fam)
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.exists(family_key)
+        pipe.set(used_key, 1, nx=True, ex=max(payload.exp - int(time.time()), 1))
+        revoked, first_use = await pipe.execute()
+    if revoked:
+        return False
+    if not first_use:
+        await redis_client.set(
+            family_key, 1, ex=int(settings.REFRESH_TOKEN_EXPIRE_MINUTES) * 60
+        )
+        return False
+    return True
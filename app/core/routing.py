@@ -0,0 +1,17 @@
+from starlette.routing import Match
+
+
+def route_template(scope) -> str:
+    """Resolve the route template (e.g. /v1/orders/{order_id}) for a request.
+
+    Middlewares run before routing, so per-route settings are looked up by
+    matching the raw path against the application's routes.
+    """
+    app = scope.get("app")
+    if app is None:
+        return scope["path"]
+    for route in app.router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", scope["path"])
+    return scope["path"]
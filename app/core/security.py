@@ -1,8 +1,10 @@
 from passlib.context import CryptContext
 import os
+import time
+import uuid
 from app.core.config import settings
 from datetime import datetime, timedelta
-from typing import Union, Any
+from typing import Optional, Union, Any
 from jose import jwt
 
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
@@ -23,7 +25,10 @@ def verify_password(password: str, hashed_pass: str) -> bool:
 
 
 def create_access_token(
-    subject: Union[str, Any], provider: str = None, expires_delta: int = None
+    subject: Union[str, Any],
+    provider: str = None,
+    expires_delta: int = None,
+    claims: Optional[dict] = None,
 ) -> str:
     if expires_delta:
         expires = datetime.now() + expires_delta
@@ -33,13 +38,19 @@ def create_access_token(
     to_encode = {"exp": expires, "sub": str(subject)}
     if provider:
         to_encode = {"provider": provider, **to_encode}
+    if claims:
+        to_encode = {**to_encode, **claims}
     encoded_jwt = jwt.encode(to_encode, JWT_SECRET_KEY, ALGORITHM)
     return encoded_jwt
 
 
 def create_refresh_token(
-    subject: Union[str, Any], provider: str = None, expires_delta: int = None
+    subject: Union[str, Any],
+    provider: str = None,
+    expires_delta: int = None,
+    family: Optional[str] = None,
 ) -> str:
+    """Every refresh token is single use; rotated tokens keep the `family`."""
     if expires_delta:
         expires_delta = datetime.now() + expires_delta
     else:
@@ -47,8 +58,24 @@ def create_refresh_token(
             minutes=int(REFRESH_TOKEN_EXPIRE_MINUTES)
         )
 
-    to_encode = {"exp": expires_delta, "sub": str(subject)}
+    to_encode = {
+        "exp": expires_delta,
+        "sub": str(subject),
+        "jti": uuid.uuid4().hex,
+        "fam": family or uuid.uuid4().hex,
+    }
     if provider:
         to_encode = {"provider": provider, **to_encode}
     encoded_jwt = jwt.encode(to_encode, JWT_REFRESH_SECRET_KEY, ALGORITHM)
     return encoded_jwt
+
+
+def user_claims(user: Any, discount_percent: float = 0) -> dict:
+    """Claims that let an access token stand in for the user row."""
+    return {
+        "iat": int(time.time()),
+        "uid": str(user.id),
+        "adm": bool(user.is_admin),
+        "gid": str(user.group_id) if user.group_id else None,
+        "dsc": discount_percent,
+    }
@@ -1,15 +1,40 @@
 import os
+import asyncio
 import smtplib
 from celery import Celery
+from celery.signals import worker_process_init
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from dotenv import load_dotenv
 
+from app.core.config import settings
+from app.core.tracing import setup_tracing
+from app.db.session import standalone_session
+from app.repository.partitions import create_order_partitions
+from app.repository.report import refresh_sales_rollups
+
 load_dotenv()
 
 celery = Celery(__name__)
 celery.conf.broker_url = os.getenv("CELERY_BROKER_URL")
 celery.conf.result_backend = os.getenv("CELERY_RESULT_BACKEND")
+celery.conf.beat_schedule = {
+    "refresh-sales-rollups": {
+        "task": "app.core.tasks.refresh_sales_rollups_task",
+        "schedule": settings.ROLLUP_REFRESH_SECONDS,
+    },
+    "create-order-partitions": {
+        "task": "app.core.tasks.create_order_partitions_task",
+        "schedule": settings.ORDER_PARTITIONS_REFRESH_SECONDS,
+    },
+}
+
+
+@worker_process_init.connect
+def init_worker_tracing(**kwargs):
+    #   After the fork: the exporter's thread must start in the worker process
+    setup_tracing(f"{settings.PROJECT_NAME}-worker")
+
 
 print(os.getenv("CELERY_BROKER_URL"))
 print(os.getenv("CELERY_RESULT_BACKEND"))
@@ -38,3 +63,22 @@ def send_email_task(mail_subject: str, mail_body: str, customer_email: str):
             server.sendmail(smtp_user, customer_email, msg.as_string())
     except Exception as e:
         print(f"Error: {e}")
+
+
+@celery.task
+def refresh_sales_rollups_task():
+    async def refresh():
+        async with standalone_session() as session:
+            return await refresh_sales_rollups(session)
+
+    high_water = asyncio.run(refresh())
+    return high_water.isoformat()
+
+
+@celery.task
+def create_order_partitions_task():
+    async def create():
+        async with standalone_session() as session:
+            return await create_order_partitions(session)
+
+    return asyncio.run(create())
@@ -0,0 +1,181 @@
+import base64
+import functools
+import inspect
+import json
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+try:
+    from google.protobuf.json_format import MessageToDict
+    from opentelemetry import trace
+    from opentelemetry.exporter.otlp.proto.common.trace_encoder import encode_spans
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import (
+        BatchSpanProcessor,
+        SpanExporter,
+        SpanExportResult,
+    )
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+    from opentelemetry.trace import SpanKind, Status, StatusCode
+except ImportError:  #   Tracing is optional
+    trace = None
+
+TRACING_AVAILABLE = trace is not None
+TRACING_ON = settings.TRACING_ENABLED and TRACING_AVAILABLE
+_configured = False
+
+if TRACING_AVAILABLE:
+
+    class FileSpanExporter(SpanExporter):
+        """Append spans to a file as OTLP/JSON, one export request per line,
+        the format the collector's file exporter writes and its receiver reads."""
+
+        def __init__(self, path: str):
+            self.file = open(path, "a", encoding="utf-8")
+
+        def export(self, spans) -> "SpanExportResult":
+            request = MessageToDict(encode_spans(spans))
+            #   OTLP/JSON spells ids in hex where protobuf JSON uses base64
+            for resource in request.get("resourceSpans", ()):
+                for scope in resource.get("scopeSpans", ()):
+                    for span in scope.get("spans", ()):
+                        for key in ("traceId", "spanId", "parentSpanId"):
+                            if span.get(key):
+                                span[key] = base64.b64decode(span[key]).hex()
+            self.file.write(json.dumps(request) + "\n")
+            self.file.flush()
+            return SpanExportResult.SUCCESS
+
+        def shutdown(self):
+            self.file.close()
+
+
+def _exporter():
+    if settings.TRACING_EXPORTER == "file":
+        return FileSpanExporter(settings.TRACING_FILE)
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+    return OTLPSpanExporter(endpoint=settings.TRACING_OTLP_ENDPOINT)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._tracing_span = trace.get_tracer(__name__).start_span(
+        statement.split(None, 1)[0].upper() if statement else "SQL",
+        kind=SpanKind.CLIENT,
+        attributes={
+            "db.system": conn.dialect.name,
+            "db.statement": statement[: settings.TRACING_STATEMENT_LENGTH],
+        },
+    )
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    span = getattr(context, "_tracing_span", None)
+    if span is not None:
+        span.end()
+
+
+def _handle_error(exception_context):
+    span = getattr(exception_context.execution_context, "_tracing_span", None)
+    if span is not None:
+        span.record_exception(exception_context.original_exception)
+        span.set_status(Status(StatusCode.ERROR))
+        span.end()
+
+
+def setup_tracing(service: str, app=None):
+    """Install the tracer provider and the library instrumentations.
+
+    Routes (FastAPI), outbound HTTP (requests) and Celery tasks get spans, and
+    Celery carries the trace context to the worker in the task headers. SQL
+    statements get spans through engine events, for every engine including
+    the throwaway ones of `standalone_session`; parameters are not recorded.
+
+    `TRACING_SAMPLE_RATE` of new traces are kept and child spans follow their
+    parent's decision. Spans leave in batches from a bounded queue, so a slow
+    collector drops spans instead of piling them up.
+    """
+    global _configured
+    if not TRACING_ON:
+        return
+    if not _configured:
+        provider = TracerProvider(
+            resource=Resource.create({"service.name": service}),
+            sampler=ParentBased(TraceIdRatioBased(settings.TRACING_SAMPLE_RATE)),
+        )
+        provider.add_span_processor(
+            BatchSpanProcessor(
+                _exporter(), max_queue_size=settings.TRACING_MAX_QUEUE_SIZE
+            )
+        )
+        trace.set_tracer_provider(provider)
+
+        from opentelemetry.instrumentation.celery import CeleryInstrumentor
+        from opentelemetry.instrumentation.requests import RequestsInstrumentor
+
+        RequestsInstrumentor().instrument()
+        CeleryInstrumentor().instrument()
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+        _configured = True
+    if app is not None:
+        from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+
+        FastAPIInstrumentor.instrument_app(app)
+
+
+def shutdown_tracing():
+    """Flush the spans still queued, e.g. on shutdown."""
+    if _configured:
+        trace.get_tracer_provider().shutdown()
+
+
+def traced(name: Optional[str] = None):
+    """Run a coroutine function in its own span; a no-op when tracing is off."""
+
+    def decorator(function):
+        if not TRACING_ON:
+            return function
+        span_name = name or function.__qualname__
+
+        @functools.wraps(function)
+        async def wrapper(*args, **kwargs):
+            with trace.get_tracer(function.__module__).start_as_current_span(span_name):
+                return await function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def traced_methods(cls):
+    """Give every public coroutine method of `cls` a span named
+    `Class.method`, tagged with the model's table."""
+    if not TRACING_ON:
+        return cls
+    for attribute, function in list(vars(cls).items()):
+        if attribute.startswith("_") or not inspect.iscoroutinefunction(function):
+            continue
+        setattr(cls, attribute, _traced_method(cls.__name__, function))
+    return cls
+
+
+def _traced_method(owner: str, function):
+    span_name = f"{owner}.{function.__name__}"
+
+    @functools.wraps(function)
+    async def wrapper(self, *args, **kwargs):
+        tracer = trace.get_tracer(function.__module__)
+        with tracer.start_as_current_span(span_name) as span:
+            table = getattr(getattr(self, "model", None), "__tablename__", None)
+            if table is not None:
+                span.set_attribute("db.sql.table", table)
+            return await function(self, *args, **kwargs)
+
+    return wrapper
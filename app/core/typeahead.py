@@ -0,0 +1,133 @@
+import asyncio
+import re
+import sys
+import time
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+from uuid import UUID
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models import Product
+
+MAX_WORDS = 8  #   Only the first words of a long name are indexed
+
+
+def normalize(text: str) -> str:
+    return " ".join(re.findall(r"\w+", text.lower()))
+
+
+class PrefixIndex:
+    """Sorted-array prefix index over product names, one per worker.
+
+    Every name is stored once per word it contains (the name from that word
+    on), so "cot" finds both "cotton shirt" and "blue cotton shirt". Lookups
+    are a binary search plus a short scan.
+    """
+
+    def __init__(self):
+        self.keys: List[str] = []
+        self.ids: List[UUID] = []
+        self.names: Dict[UUID, str] = {}
+        self.ready = False
+        self.built_at = 0.0
+
+    @staticmethod
+    def _keys(name: str) -> List[str]:
+        words = normalize(name).split()[:MAX_WORDS]
+        return [" ".join(words[index:]) for index in range(len(words))]
+
+    def load(self, products: List[Tuple[UUID, str]]):
+        """Replace the whole index in one swap."""
+        entries = sorted((key, id) for id, name in products for key in self._keys(name))
+        self.keys = [key for key, _ in entries]
+        self.ids = [id for _, id in entries]
+        self.names = dict(products)
+        self.ready = True
+        self.built_at = time.time()
+
+    def add(self, id: UUID, name: str):
+        if id in self.names:
+            self.remove(id)
+        self.names[id] = name
+        for key in self._keys(name):
+            index = bisect_left(self.keys, key)
+            self.keys.insert(index, key)
+            self.ids.insert(index, id)
+
+    def remove(self, id: UUID):
+        name = self.names.pop(id, None)
+        if name is None:
+            return
+        for key in self._keys(name):
+            index = bisect_left(self.keys, key)
+            while index < len(self.keys) and self.keys[index] == key:
+                if self.ids[index] == id:
+                    del self.keys[index]
+                    del self.ids[index]
+                    break
+                index += 1
+
+    def suggest(self, prefix: str, k: int = 10) -> List[Tuple[UUID, str]]:
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        results: List[Tuple[UUID, str]] = []
+        seen = set()
+        index = bisect_left(self.keys, prefix)
+        while (
+            index < len(self.keys)
+            and len(results) < k
+            and self.keys[index].startswith(prefix)
+        ):
+            id = self.ids[index]
+            if id not in seen:
+                seen.add(id)
+                results.append((id, self.names[id]))
+            index += 1
+        return results
+
+    def memory_bytes(self) -> int:
+        """Approximate footprint of the index structures."""
+        size = sys.getsizeof(self.keys) + sys.getsizeof(self.ids)
+        size += sys.getsizeof(self.names)
+        size += sum(sys.getsizeof(key) for key in self.keys)
+        size += sum(sys.getsizeof(id) for id in self.names)
+        size += sum(sys.getsizeof(name) for name in self.names.values())
+        return size
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "products": len(self.names),
+            "entries": len(self.keys),
+            "memory_bytes": self.memory_bytes(),
+            "built_at": self.built_at,
+        }
+
+
+product_index = PrefixIndex()
+
+
+async def build_product_index(batch_size: int = 10_000):
+    """Rebuild `product_index` from a streaming scan of products."""
+    products = []
+    async with SessionLocal() as session:
+        result = await session.stream(
+            select(Product.id, Product.name).execution_options(yield_per=batch_size)
+        )
+        async for partition in result.partitions():
+            products.extend((id, name) for id, name in partition)
+    product_index.load(products)
+
+
+async def refresh_product_index():
+    """Periodically rebuild so edits made through other workers show up."""
+    while True:
+        await asyncio.sleep(settings.TYPEAHEAD_REFRESH_SECONDS)
+        try:
+            await build_product_index()
+        except Exception as e:
+            print(f"Error refreshing typeahead index: {e}")
@@ -0,0 +1,75 @@
+import asyncio
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import SessionLocal
+
+#   Writes every item of a batch in one session; returns, per item, its result
+#   or the exception that caller should get
+BatchWriter = Callable[[AsyncSession, List[Any]], Awaitable[List[Any]]]
+
+
+class GroupCommit:
+    """Gather concurrent writes for a short window and commit them together.
+
+    The first item of a batch waits at most `window` seconds for others (a
+    full batch of `size` goes at once), then `write` stores the whole batch in
+    one transaction, so the batch pays for a single WAL flush. Every caller
+    gets back its own result or its own exception. A caller that is cancelled
+    stops waiting, but its write still goes through with the batch.
+    """
+
+    def __init__(self, write: BatchWriter, window: float, size: int):
+        self.write = write
+        self.window = window
+        self.size = size
+        self.pending: List[Tuple[Any, asyncio.Future]] = []
+        self.timer: Optional[asyncio.Task] = None
+        self.flushes: set = set()
+
+    async def submit(self, item: Any) -> Any:
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((item, future))
+        if len(self.pending) >= self.size:
+            self.flush()
+        elif self.timer is None:
+            self.timer = asyncio.create_task(self._flush_later())
+        return await asyncio.shield(future)
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.window)
+        self.timer = None
+        self.flush()
+
+    def flush(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        batch, self.pending = self.pending, []
+        if batch:
+            task = asyncio.create_task(self._run(batch))
+            self.flushes.add(task)
+            task.add_done_callback(self.flushes.discard)
+
+    async def _run(self, batch: List[Tuple[Any, asyncio.Future]]):
+        try:
+            async with SessionLocal() as session:
+                results = await self.write(session, [item for item, _ in batch])
+        except Exception as e:
+            results = [e] * len(batch)
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+                #   Nobody may be waiting any more; do not warn about it
+                future.add_done_callback(lambda done: done.exception())
+            else:
+                future.set_result(result)
+
+    async def drain(self):
+        """Write what is still gathered and wait for running batches, e.g. on shutdown."""
+        self.flush()
+        if self.flushes:
+            await asyncio.gather(*self.flushes, return_exceptions=True)
@@ -0,0 +1,184 @@
+import json
+import time
+from collections import Counter, OrderedDict, defaultdict
+from datetime import timezone
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.core.config import settings
+from app.db.redis import redis_client
+
+#   Entries are "<version>\n<row json>"; an empty row is a tombstone. A row is
+#   only written over an entry whose version is not newer, so a reader that
+#   loaded the row before an update cannot put the old version back.
+SET_IF_NEWER = """
+local current = redis.call('GET', KEYS[1])
+if current then
+    local version = tonumber(string.match(current, '^[^\\n]*'))
+    if version and version > tonumber(ARGV[1]) then
+        return 0
+    end
+end
+redis.call('SET', KEYS[1], ARGV[1] .. '\\n' .. ARGV[2], 'EX', ARGV[3])
+return 1
+"""
+
+
+class RowCache:
+    """Read-through cache of single rows by primary key, for `get_by_id`.
+
+    Two tiers: a small per-worker LRU with a short TTL, then Redis. Rows are
+    versioned by `updated_at`; writes through `BaseRepository` leave a
+    tombstone carrying the new version, which keeps stale copies out of both
+    tiers. Other workers may serve their LRU copy for `ROW_CACHE_LOCAL_TTL`
+    seconds after a change.
+    """
+
+    def __init__(self, redis: Redis):
+        self.redis = redis
+        self.set_if_newer = redis.register_script(SET_IF_NEWER)
+        self.local: OrderedDict = OrderedDict()
+        self.counters: Dict[str, Counter] = defaultdict(Counter)
+        self.tables = set(settings.ROW_CACHE_MODELS)
+
+    def enabled(self, model: Any) -> bool:
+        return (
+            settings.ROW_CACHE_ENABLED
+            and getattr(model, "__tablename__", None) in self.tables
+        )
+
+    @staticmethod
+    def key(model: Any, id: Any) -> str:
+        return f"row:{model.__tablename__}:{id}"
+
+    @staticmethod
+    def version(row: Any) -> float:
+        updated_at = getattr(row, "updated_at", None)
+        if updated_at is None:
+            return time.time()
+        return updated_at.replace(tzinfo=timezone.utc).timestamp()
+
+    async def get(
+        self,
+        session: AsyncSession,
+        model: Any,
+        id: Any,
+        load: Optional[Callable[[], Awaitable[Any]]] = None,
+    ) -> Any:
+        """Cached row as a session-bound instance; misses go through `load`."""
+        table = model.__tablename__
+        key = self.key(model, id)
+
+        entry = self.local.get(key)
+        if entry is not None and entry[0] > time.monotonic() and entry[2] is not None:
+            self.local.move_to_end(key)
+            self.counters[table]["local_hits"] += 1
+            return await self._attach(session, model, entry[2])
+
+        try:
+            raw = await self.redis.get(key)
+        except RedisError:
+            raw = None
+        if raw:
+            version, _, body = raw.decode().partition("\n")
+            if body:
+                data = json.loads(body)
+                self._remember(key, float(version), data)
+                self.counters[table]["redis_hits"] += 1
+                return await self._attach(session, model, data)
+
+        self.counters[table]["misses"] += 1
+        row = await load() if load else await session.get(model, id)
+        if row is not None:
+            await self._store(key, row)
+        return row
+
+    async def invalidate(
+        self, model: Any, ids: Iterable, version: Optional[float] = None
+    ):
+        """Drop rows after a committed change, `version` being their new one.
+
+        Without a version (bulk or raw SQL changes) the rows are not cached
+        again until the tombstones expire.
+        """
+        if not self.enabled(model):
+            return
+        version = version or time.time() + settings.ROW_CACHE_TOMBSTONE_SECONDS
+        keys = [self.key(model, id) for id in ids]
+        for key in keys:
+            self._remember(key, version, None, settings.ROW_CACHE_TOMBSTONE_SECONDS)
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.set(
+                        key, f"{version}\n", ex=settings.ROW_CACHE_TOMBSTONE_SECONDS
+                    )
+                await pipe.execute()
+        except RedisError as e:
+            print(f"Error invalidating cached rows: {e}")
+
+    async def clear(self, model: Any):
+        """Drop every cached row of a model, after changes to unknown rows."""
+        if not self.enabled(model):
+            return
+        prefix = f"row:{model.__tablename__}:"
+        for key in [key for key in self.local if key.startswith(prefix)]:
+            del self.local[key]
+        try:
+            async for key in self.redis.scan_iter(match=f"{prefix}*", count=1000):
+                await self.redis.delete(key)
+        except RedisError as e:
+            print(f"Error clearing cached rows: {e}")
+
+    def stats(self) -> Dict[str, dict]:
+        report = {}
+        for table, counter in self.counters.items():
+            hits = counter["local_hits"] + counter["redis_hits"]
+            total = hits + counter["misses"]
+            report[table] = {
+                **counter,
+                "hit_ratio": round(hits / total, 4) if total else 0.0,
+            }
+        return report
+
+    @staticmethod
+    async def _attach(session: AsyncSession, model: Any, data: dict) -> Any:
+        #   Hand out a session-bound instance, as session.get() would, without a query
+        row = model.model_validate(data)
+        make_transient_to_detached(row)
+        return await session.merge(row, load=False)
+
+    def _remember(
+        self,
+        key: str,
+        version: float,
+        data: Optional[dict],
+        ttl: Optional[float] = None,
+    ):
+        entry: Optional[Tuple] = self.local.get(key)
+        if entry is not None and entry[0] > time.monotonic() and entry[1] > version:
+            return
+        expires = time.monotonic() + (ttl or settings.ROW_CACHE_LOCAL_TTL)
+        self.local[key] = (expires, version, data)
+        self.local.move_to_end(key)
+        while len(self.local) > settings.ROW_CACHE_LOCAL_SIZE:
+            self.local.popitem(last=False)
+
+    async def _store(self, key: str, row: Any):
+        version = self.version(row)
+        data = row.model_dump(mode="json")
+        self._remember(key, version, data)
+        try:
+            await self.set_if_newer(
+                keys=[key],
+                args=[version, json.dumps(data), settings.ROW_CACHE_TTL],
+            )
+        except RedisError:
+            pass
+
+
+row_cache = RowCache(redis_client)
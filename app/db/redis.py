@@ -0,0 +1,9 @@
+from redis.asyncio import Redis
+
+from app.core.config import settings
+
+redis_client = Redis.from_url(
+    settings.REDIS_URL,
+    socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+    socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+)
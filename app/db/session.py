@@ -1,5 +1,7 @@
+from contextlib import asynccontextmanager
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 
 from app.core.config import settings
 
@@ -8,6 +10,8 @@ engine = create_async_engine(
     echo=settings.POSTGRES_ECHO,
     future=True,
     pool_size=max(5, settings.POSTGRES_POOL_SIZE),
+    max_overflow=settings.POSTGRES_MAX_OVERFLOW,
+    pool_timeout=settings.POSTGRES_POOL_TIMEOUT,
 )
 
 SessionLocal = sessionmaker(
@@ -28,3 +32,15 @@ async def get_session():
             raise e
         finally:
             await session.close()
+
+
+@asynccontextmanager
+async def standalone_session():
+    """Session on a throwaway engine for code running outside the API's event
+    loop (Celery tasks, CLI commands)."""
+    standalone_engine = create_async_engine(settings.DATABASE_URI, poolclass=NullPool)
+    try:
+        async with AsyncSession(standalone_engine, expire_on_commit=False) as session:
+            yield session
+    finally:
+        await standalone_engine.dispose()
@@ -9,6 +9,36 @@ from app.models.order import (
     ShippingLabel,
     FulfillResponse,
 )
-from app.models.product import Product, ProductBase, UpdateProduct
-from app.models.user import Group, User
-from app.models.store import Store, StoreBase, ShippingMethod
+from app.models.inventory import (
+    ProductStockShard,
+    StockResponse,
+    StockUpdate,
+    StoreStock,
+)
+from app.models.product import (
+    Product,
+    ProductBase,
+    ProductImportResult,
+    ProductReprice,
+    ProductSearchResult,
+    ProductSuggestion,
+    UpdateProduct,
+)
+from app.models.user import CurrentUser, Group, User
+from app.models.store import (
+    NearestStore,
+    Store,
+    StoreBase,
+    StoreImportResult,
+    ShippingMethod,
+)
+from app.models.report import (
+    NO_GROUP,
+    GroupSales,
+    ProductSales,
+    RollupState,
+    SalesDaily,
+    SalesDailyGroup,
+    SalesDailyProduct,
+)
+from app.models.profile import ProfileInfo
@@ -22,3 +22,7 @@ class TimestampMixin(SQLModel):
 
 class DeleteResponse(SQLModel):
     deleted: int
+
+
+class UpdateResponse(SQLModel):
+    updated: int
@@ -0,0 +1,41 @@
+from uuid import UUID
+from typing import Optional
+from sqlalchemy import CheckConstraint
+from sqlmodel import Field, SQLModel
+
+
+class StoreStock(SQLModel, table=True):
+    __tablename__ = "store_stocks"
+    __table_args__ = (
+        CheckConstraint("quantity >= 0", name="ck_store_stocks_quantity"),
+    )
+
+    store_id: UUID = Field(..., foreign_key="stores.id", primary_key=True)
+    product_id: UUID = Field(..., foreign_key="products.id", primary_key=True)
+    quantity: int = 0
+
+
+class ProductStockShard(SQLModel, table=True):
+    """Stock of a best-seller split across rows so checkouts don't queue on one."""
+
+    __tablename__ = "product_stock_shards"
+    __table_args__ = (
+        CheckConstraint("quantity >= 0", name="ck_product_stock_shards_quantity"),
+    )
+
+    product_id: UUID = Field(..., foreign_key="products.id", primary_key=True)
+    shard: int = Field(..., primary_key=True)
+    quantity: int = 0
+
+
+class StockUpdate(SQLModel):
+    quantity: int = Field(..., ge=0)
+    shards: int = Field(1, ge=1, le=64)
+    store_id: Optional[UUID] = None
+
+
+class StockResponse(SQLModel):
+    product_id: UUID
+    store_id: Optional[UUID] = None
+    quantity: Optional[int] = None
+    shards: int = 1
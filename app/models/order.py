@@ -1,5 +1,6 @@
 from uuid import UUID
 from typing import Optional
+from sqlalchemy import DDL, ForeignKeyConstraint, event
 from sqlmodel import Field, SQLModel
 from datetime import datetime
 
@@ -15,23 +16,47 @@ class OrderBase(SQLModel):
 
 class Order(IdMixin, TimestampMixin, OrderBase, table=True):
     __tablename__ = "orders"
+    #   Monthly partitions are created by migrations 0006/0007 and Celery beat
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
 
+    #   Partition key, so part of the primary key (migration 0006)
+    created_at: datetime = Field(
+        default_factory=datetime.utcnow, primary_key=True, index=True, nullable=False
+    )
     user_id: UUID = Field(..., foreign_key="users.id")
     fulfill_status: Optional[str] = FulfillStatusEnum.unfulfilled
     fulfill_at: Optional[datetime] = None
     from_admin: bool
+    store_id: Optional[UUID] = Field(None, foreign_key="stores.id")
 
 
 class OrderProduct(SQLModel, table=True):
     __tablename__ = "order_products"
-
-    order_id: Optional[UUID] = Field(
-        default=None, foreign_key="orders.id", primary_key=True
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ["order_id", "order_created_at"], ["orders.id", "orders.created_at"]
+        ),
+        {"postgresql_partition_by": "RANGE (order_created_at)"},
     )
+
+    order_id: UUID = Field(primary_key=True)
     product_id: Optional[UUID] = Field(
         default=None, foreign_key="products.id", primary_key=True
     )
     quantity: int
+    #   Partition key, copied from the order
+    order_created_at: datetime = Field(primary_key=True)
+
+
+#   Rows outside the created months go to the default partitions (migration 0007)
+for table in (Order.__table__, OrderProduct.__table__):
+    event.listen(
+        table,
+        "after_create",
+        DDL(
+            f"CREATE TABLE {table.name}_default PARTITION OF {table.name} DEFAULT"
+        ).execute_if(dialect="postgresql"),
+    )
 
 
 class OrderProductRequest(SQLModel):
@@ -41,6 +66,7 @@ class OrderProductRequest(SQLModel):
 
 class OrderCreate(OrderBase):
     customer_email: Optional[str] = None
+    store_id: Optional[UUID] = None  #   Reserve stock from this store
     items: list[OrderProductRequest]
 
 
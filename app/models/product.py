@@ -1,21 +1,55 @@
-from typing import Optional
-from sqlmodel import SQLModel
+from typing import List, Optional
+from uuid import UUID
+from sqlalchemy import CheckConstraint, text
+from sqlmodel import Field, SQLModel
 
 from app.models.base import IdMixin, TimestampMixin
 
 
 class ProductBase(SQLModel):
+    sku: Optional[str] = Field(default=None, unique=True, index=True)
     name: str
     base_price: float
     description: Optional[str] = None
+    stock: Optional[int] = None  #   None: stock is not tracked
 
 
 class UpdateProduct(SQLModel):
+    sku: Optional[str] = None
     name: Optional[str] = None
     base_price: Optional[float] = None
     description: Optional[str] = None
 
 
+class ProductReprice(SQLModel):
+    product_ids: Optional[List[UUID]] = None
+    sku_prefix: Optional[str] = None
+    base_price: Optional[float] = None  #   New price
+    percent: Optional[float] = None  #   Relative change, -10 is 10% off
+
+
 class Product(IdMixin, TimestampMixin, ProductBase, table=True):
     __tablename__ = "products"
-    ...
+    __table_args__ = (CheckConstraint("stock >= 0", name="ck_products_stock"),)
+
+    #   Stock lives in product_stock_shards
+    stock_sharded: bool = Field(
+        default=False, sa_column_kwargs={"server_default": text("false")}
+    )
+
+
+class ProductSearchResult(SQLModel):
+    items: List[Product]
+    next_cursor: Optional[str] = None
+
+
+class ProductSuggestion(SQLModel):
+    id: UUID
+    name: str
+
+
+class ProductImportResult(SQLModel):
+    inserted: int = 0
+    updated: int = 0
+    rejected: int = 0
+    errors: List[str] = []  #   First rejected rows, with the reason
@@ -0,0 +1,11 @@
+from datetime import datetime
+from sqlmodel import SQLModel
+
+
+class ProfileInfo(SQLModel):
+    name: str
+    created_at: datetime
+    duration_ms: int
+    method: str
+    route: str
+    size: int
@@ -0,0 +1,54 @@
+from uuid import UUID
+from datetime import date, datetime
+from sqlmodel import Field, SQLModel
+
+#   Rollup key for customers that are not in any group
+NO_GROUP = UUID(int=0)
+
+
+class SalesDaily(SQLModel, table=True):
+    __tablename__ = "sales_daily"
+
+    day: date = Field(..., primary_key=True)
+    orders: int = 0
+    items: int = 0
+    revenue: float = 0
+
+
+class SalesDailyProduct(SQLModel, table=True):
+    __tablename__ = "sales_daily_products"
+
+    day: date = Field(..., primary_key=True)
+    product_id: UUID = Field(..., primary_key=True)
+    orders: int = 0
+    quantity: int = 0
+    revenue: float = 0  #   quantity * base_price at refresh time
+
+
+class SalesDailyGroup(SQLModel, table=True):
+    __tablename__ = "sales_daily_groups"
+
+    day: date = Field(..., primary_key=True)
+    group_id: UUID = Field(..., primary_key=True)
+    orders: int = 0
+    revenue: float = 0
+
+
+class RollupState(SQLModel, table=True):
+    __tablename__ = "rollup_state"
+
+    name: str = Field(..., primary_key=True)
+    high_water: datetime
+
+
+class ProductSales(SQLModel):
+    product_id: UUID
+    orders: int
+    quantity: int
+    revenue: float
+
+
+class GroupSales(SQLModel):
+    group_id: UUID
+    orders: int
+    revenue: float
@@ -1,4 +1,6 @@
-from sqlmodel import SQLModel
+from typing import Optional
+from uuid import UUID
+from sqlmodel import Field, SQLModel
 
 from app.models.base import IdMixin, TimestampMixin
 
@@ -7,6 +9,8 @@ class StoreBase(SQLModel):
     name: str
     address: str
     is_store: bool = True  #   warehouse or store
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
 
 
 class Store(IdMixin, TimestampMixin, StoreBase, table=True):
@@ -17,3 +21,19 @@ class Store(IdMixin, TimestampMixin, StoreBase, table=True):
 
 class ShippingMethod(SQLModel):
     shipping_method: str
+
+
+class NearestStore(SQLModel):
+    id: UUID
+    name: str
+    address: str
+    is_store: bool
+    latitude: float
+    longitude: float
+    distance_m: float
+
+
+class StoreImportResult(SQLModel):
+    updated: int = 0
+    created: int = 0
+    rejected: list[str] = []
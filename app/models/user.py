@@ -1,5 +1,5 @@
 from uuid import UUID
-from typing import Optional
+from typing import List, Optional
 from sqlmodel import Field, SQLModel
 from pydantic import BaseModel, Field
 
@@ -46,6 +46,11 @@ class UpdateGroup(SQLModel):
     discount_percent: Optional[float] = None
 
 
+class GroupReassign(SQLModel):
+    user_ids: Optional[List[UUID]] = None
+    from_group_id: Optional[UUID] = None
+
+
 class Group(IdMixin, TimestampMixin, GroupBase, table=True):
     __tablename__ = "groups"
     ...
@@ -60,3 +65,27 @@ class TokenSchema(SQLModel):
 class TokenPayload(BaseModel):
     sub: str = None
     exp: int = None
+    #   Claims of self-contained access tokens
+    iat: Optional[int] = None
+    uid: Optional[UUID] = None
+    adm: Optional[bool] = None
+    gid: Optional[UUID] = None
+    dsc: Optional[float] = None
+    #   Refresh tokens: token id and the rotation chain it belongs to
+    jti: Optional[str] = None
+    fam: Optional[str] = None
+    provider: Optional[str] = None
+
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+
+class CurrentUser(SQLModel):
+    """What authorization and pricing need to know about the caller."""
+
+    id: UUID
+    email: str
+    is_admin: bool = False
+    group_id: Optional[UUID] = None
+    discount_percent: float = 0
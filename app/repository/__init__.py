@@ -1,3 +1,25 @@
 from app.repository.user import get_user_group
 from app.repository.base import BaseRepository
-from app.repository.order import get_list_order, generate_shipping_label, get_user_order
+from app.repository.order import (
+    get_list_order,
+    list_order_statement,
+    generate_shipping_label,
+    get_user_order,
+    PendingOrder,
+    place_orders,
+    order_batcher,
+)
+from app.repository.inventory import reserve_stock, release_stock, set_stock, get_stock
+from app.repository.search import search_products
+from app.repository.store import get_nearest_stores, import_store_locations
+from app.repository.report import (
+    refresh_sales_rollups,
+    backfill_sales_rollups,
+    remove_order_from_rollups,
+    get_daily_sales,
+    get_product_sales,
+    get_group_sales,
+)
+from app.repository.export import iter_order_rows, iter_csv, iter_parquet
+from app.repository.catalog import import_products
+from app.repository.count import count_rows, set_total_count
@@ -2,12 +2,19 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException
 from datetime import datetime
 from typing import Any, List, Optional
-from sqlalchemy import select, func
+from sqlalchemy import delete, select, func, update
+from app.core.config import settings
+from app.core.tracing import traced_methods
+from app.db.cache import row_cache
+from app.db.singleflight import has_writes, single_flight
 from app.logging.logger import item_logger
 from sqlalchemy.sql.expression import desc
-from app.api.enums import ItemStatus
+from app.api.enums import CountMode, ItemStatus
+from app.repository.count import TotalCount, count_rows
+from app.repository.statements import filter_statement
 
 
+@traced_methods
 class BaseRepository:
     def __init__(self, model):
         self.model = model
@@ -21,24 +28,34 @@ class BaseRepository:
 
     async def count_by(self, session: AsyncSession, **kwargs) -> int:
         """Count all records by a filter"""
-        statement = select(func.count()).select_from(self.model).filter_by(**kwargs)
-        count = await session.execute(statement)
+        statement, params = filter_statement(self.model, "count", kwargs)
+        count = await session.execute(statement, params)
         count = count.scalar()
         return count
 
+    async def count(
+        self, session: AsyncSession, mode: CountMode = CountMode.exact, **kwargs
+    ) -> TotalCount:
+        """Count records by a filter, exactly, from planner estimates or from cache"""
+        statement = select(self.model).filter_by(**kwargs)
+        table = None if kwargs else self.model.__tablename__
+        return await count_rows(session, statement, mode, table=table)
+
     async def get_all(self, session: AsyncSession) -> Any:
         """Retrieve all records"""
-        statement = select(self.model)
-        items = await session.execute(statement)
-        items = items.scalars().all()
-        return items
+        #   Unbounded, so never shared: merging every row costs more than the query
+        items = await session.execute(select(self.model))
+        return items.scalars().all()
 
     async def get_all_by(self, session: AsyncSession, **kwargs) -> Any:
         """Retrieve all records"""
-        statement = select(self.model).filter_by(**kwargs)
-        items = await session.execute(statement)
-        items = items.scalars().all()
-        return items
+
+        async def query(session: AsyncSession):
+            statement, params = filter_statement(self.model, "select", kwargs)
+            items = await session.execute(statement, params)
+            return items.scalars().all()
+
+        return await self._coalesced(session, ("all", kwargs), query)
 
     async def get_all_paginated(
         self, session: AsyncSession, skip: int = 0, limit: int = 10
@@ -64,9 +81,21 @@ class BaseRepository:
         items = items.scalars().all()
         return items
 
-    async def get_by_id(self, session: AsyncSession, id: str) -> Any:
-        """Retrieve a record by id"""
-        item = await session.get(self.model, id)
+    async def get_by_id(
+        self, session: AsyncSession, id: str, cached: bool = True
+    ) -> Any:
+        """Retrieve a record by id, through the row cache for cached models"""
+
+        async def query(session: AsyncSession):
+            return await session.get(self.model, id)
+
+        async def load():
+            return await self._coalesced(session, ("id", {"id": id}), query)
+
+        if cached and row_cache.enabled(self.model):
+            item = await row_cache.get(session, self.model, id, load=load)
+        else:
+            item = await load()
         if item:
             return item
         else:
@@ -76,12 +105,51 @@ class BaseRepository:
 
     async def get_by_item(self, session: AsyncSession, **kwargs) -> Any:
         """Retrieve a record by id"""
-        statement = select(self.model).filter_by(**kwargs)
-        item = await session.execute(statement)
-        item = item.scalars().first()
+
+        async def query(session: AsyncSession):
+            statement, params = filter_statement(self.model, "select", kwargs)
+            item = await session.execute(statement, params)
+            return item.scalars().first()
+
+        item = await self._coalesced(session, ("item", kwargs), query)
         if item:
             return item
 
+    async def _coalesced(self, session: AsyncSession, key: tuple, query) -> Any:
+        """Run `query`, sharing one database call between identical concurrent reads.
+
+        The shared call uses its own session and every caller gets the rows
+        merged into theirs. Only sessions without a transaction take part:
+        they hold no connection, so a request never needs two at once, and
+        there is no snapshot or own writes the shared read could miss.
+        """
+        name, kwargs = key
+        key = (str(self.model), name, tuple(sorted(kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            key = None
+        if (
+            key is None
+            or not settings.SINGLE_FLIGHT_ENABLED
+            or session.in_transaction()
+            or has_writes(session)
+        ):
+            return await query(session)
+
+        async def shared():
+            async with AsyncSession(session.bind, expire_on_commit=False) as own:
+                return await query(own)
+
+        result = await single_flight.do(key, shared)
+        if not isinstance(self.model, type):  #   Column reads return plain values
+            return result
+        if isinstance(result, list):
+            return [await session.merge(item, load=False) for item in result]
+        if result is not None:
+            return await session.merge(result, load=False)
+        return None
+
     async def update_by_id(self, session: AsyncSession, id: str, **kwargs) -> Any:
         """Update a record by id"""
         item = await session.get(self.model, id)
@@ -91,8 +159,8 @@ class BaseRepository:
     async def check_exist(self, session: AsyncSession, **kwargs) -> Any:
         """Check if a record exists"""
         try:
-            statement = select(self.model).filter_by(**kwargs)
-            item = await session.execute(statement)
+            statement, params = filter_statement(self.model, "select", kwargs)
+            item = await session.execute(statement, params)
             item = item.scalar()
             return item
         except Exception as e:
@@ -124,6 +192,10 @@ class BaseRepository:
                 if value:
                     setattr(item, key, value)
             await session.commit()
+            if row_cache.enabled(self.model):
+                await row_cache.invalidate(
+                    self.model, [item.id], version=row_cache.version(item)
+                )
             # Log the item update
             if hasattr(item, "id"):
                 item_logger(item_id=item.id, status=ItemStatus.updated, message=kwargs)
@@ -165,6 +237,8 @@ class BaseRepository:
         try:
             await session.delete(item)
             await session.commit()
+            if row_cache.enabled(self.model):
+                await row_cache.invalidate(self.model, [item.id])
             # Log the item deletion
             if hasattr(item, "id"):
                 item_logger(item_id=item.id, status=ItemStatus.deleted, message=None)
@@ -197,6 +271,99 @@ class BaseRepository:
 
     async def delete_all(self, session: AsyncSession, **kwargs) -> Any:
         """Delete a list of record"""
-        statement = self.model.__table__.delete().filter_by(**kwargs)
-        await session.execute(statement)
-        await session.commit()
+        await self.delete_where(session, **kwargs)
+
+    async def update_where(
+        self,
+        session: AsyncSession,
+        *criteria,
+        values: dict,
+        chunk_size: Optional[int] = None,
+        **kwargs,
+    ) -> List:
+        """Update every matching record in one statement, returning their ids.
+
+        `values` may hold SQL expressions (e.g. `Product.base_price * 0.9`).
+        With `chunk_size` the rows are updated `chunk_size` ids at a time, one
+        transaction each, so huge sets do not hold their locks all at once.
+        """
+        return await self._run_where(
+            session,
+            lambda: update(self.model).values(**values),
+            criteria,
+            kwargs,
+            chunk_size,
+            ItemStatus.updated,
+        )
+
+    async def delete_where(
+        self,
+        session: AsyncSession,
+        *criteria,
+        chunk_size: Optional[int] = None,
+        **kwargs,
+    ) -> List:
+        """Delete every matching record in one statement, returning their ids."""
+        return await self._run_where(
+            session,
+            lambda: delete(self.model),
+            criteria,
+            kwargs,
+            chunk_size,
+            ItemStatus.deleted,
+        )
+
+    async def _run_where(
+        self, session, statement, criteria, kwargs, chunk_size, item_status
+    ) -> List:
+        ids = []
+        try:
+            if chunk_size is None:
+                ids = await self._execute_where(
+                    session, statement().where(*criteria).filter_by(**kwargs)
+                )
+                await session.commit()
+            else:
+                #   Walk the ids in order so rows that still match after being
+                #   updated are not picked up again
+                last_id = None
+                while True:
+                    batch = (
+                        select(self.model.id)
+                        .where(*criteria)
+                        .filter_by(**kwargs)
+                        .order_by(self.model.id)
+                        .limit(chunk_size)
+                    )
+                    if last_id is not None:
+                        batch = batch.where(self.model.id > last_id)
+                    chunk = (await session.scalars(batch)).all()
+                    if not chunk:
+                        break
+                    ids += await self._execute_where(
+                        session,
+                        statement().where(self.model.id.in_(chunk), *criteria),
+                    )
+                    await session.commit()
+                    last_id = chunk[-1]
+        except Exception as e:
+            await session.rollback()
+            item_logger(
+                status=ItemStatus.failed,
+                message=f"Error in bulk {item_status.value}: {e}",
+            )
+            raise HTTPException(
+                status_code=400, detail=f"Error in bulk {item_status.value}: {e}"
+            )
+        await row_cache.invalidate(self.model, ids)
+        item_logger(status=item_status, message={"count": len(ids)})
+        return ids
+
+    async def _execute_where(self, session: AsyncSession, statement) -> List:
+        #   Objects already loaded in the session are not refreshed
+        result = await session.execute(
+            statement.returning(*self.model.__table__.primary_key.columns),
+            execution_options={"synchronize_session": False},
+        )
+        rows = result.all()
+        return [row[0] if len(row) == 1 else tuple(row) for row in rows]
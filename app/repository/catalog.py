@@ -0,0 +1,164 @@
+import asyncio
+import csv
+import json
+from datetime import datetime
+from typing import IO, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from uuid_extensions import uuid7
+
+from app.db.cache import row_cache
+from app.models import Product, ProductBase, ProductImportResult
+
+MAX_ERRORS = 100  #   Rejected rows listed in the report; the rest are only counted
+STAGE_COLUMNS = ["line", "id", "sku", "name", "base_price", "description", "stock"]
+
+CREATE_STAGE = text("""
+    CREATE TEMPORARY TABLE product_import (
+        line INTEGER NOT NULL,
+        id UUID NOT NULL,
+        sku VARCHAR,
+        name VARCHAR NOT NULL,
+        base_price FLOAT NOT NULL,
+        description VARCHAR,
+        stock INTEGER
+    ) ON COMMIT DROP
+    """)
+
+#   Rows carrying a SKU match on it, the others on the product name. When a key
+#   appears several times in the file the last row wins. Columns left empty in
+#   the file keep their current value, and sharded stock is never overwritten.
+MERGE_STAGE = text("""
+    WITH staged AS (
+        SELECT DISTINCT ON (sku IS NULL, coalesce(sku, name)) *
+        FROM product_import
+        ORDER BY sku IS NULL, coalesce(sku, name), line DESC
+    ),
+    by_sku AS (
+        UPDATE products AS p SET
+            name = s.name,
+            base_price = s.base_price,
+            description = coalesce(s.description, p.description),
+            stock = CASE WHEN p.stock_sharded THEN p.stock
+                ELSE coalesce(s.stock, p.stock) END,
+            updated_at = :now
+        FROM staged AS s
+        WHERE s.sku IS NOT NULL AND p.sku = s.sku
+        RETURNING s.line, p.id
+    ),
+    by_name AS (
+        UPDATE products AS p SET
+            base_price = s.base_price,
+            description = coalesce(s.description, p.description),
+            stock = CASE WHEN p.stock_sharded THEN p.stock
+                ELSE coalesce(s.stock, p.stock) END,
+            updated_at = :now
+        FROM staged AS s
+        WHERE s.sku IS NULL AND p.name = s.name
+            AND p.id NOT IN (SELECT id FROM by_sku)
+        RETURNING s.line, p.id
+    ),
+    inserted AS (
+        INSERT INTO products (
+            id, sku, name, base_price, description, stock, stock_sharded,
+            created_at, updated_at
+        )
+        SELECT s.id, s.sku, s.name, s.base_price, s.description, s.stock, false,
+            :now, :now
+        FROM staged AS s
+        WHERE s.line NOT IN (SELECT line FROM by_sku UNION ALL SELECT line FROM by_name)
+        ON CONFLICT (sku) DO NOTHING
+        RETURNING id
+    )
+    SELECT
+        (SELECT count(*) FROM inserted) AS inserted,
+        (SELECT count(*) FROM by_sku) + (SELECT count(*) FROM by_name) AS updated
+    """)
+
+
+def parse_csv(file: IO[str]) -> Iterator[Tuple[int, dict]]:
+    for line, row in enumerate(csv.DictReader(file), start=2):
+        yield line, {
+            key: value for key, value in row.items() if value not in (None, "")
+        }
+
+
+def parse_ndjson(file: IO[str]) -> Iterator[Tuple[int, Optional[dict]]]:
+    for line, raw in enumerate(file, start=1):
+        if not raw.strip():
+            continue
+        try:
+            yield line, json.loads(raw)
+        except ValueError:
+            yield line, None
+
+
+def read_batches(
+    file: IO[str], ndjson: bool, batch_size: int, report: ProductImportResult
+) -> Iterator[List[Tuple]]:
+    """Validated staging rows, `batch_size` at a time. Rejected rows are counted
+    in `report`."""
+    batch: List[Tuple] = []
+    for line, row in (parse_ndjson if ndjson else parse_csv)(file):
+        try:
+            if not isinstance(row, dict):
+                raise ValueError("not a JSON object")
+            product = ProductBase.model_validate(row)
+            if product.stock is not None and product.stock < 0:
+                raise ValueError("stock must not be negative")
+        except (ValidationError, ValueError) as e:
+            report.rejected += 1
+            if len(report.errors) < MAX_ERRORS:
+                report.errors.append(f"line {line}: {e}")
+            continue
+        batch.append(
+            (
+                line,
+                uuid7(),
+                product.sku,
+                product.name,
+                product.base_price,
+                product.description,
+                product.stock,
+            )
+        )
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def import_products(
+    session: AsyncSession, file: IO[str], ndjson: bool = False, batch_size: int = 5000
+) -> ProductImportResult:
+    """Bulk load a product catalog from CSV or NDJSON in one transaction.
+
+    Rows are validated against `ProductBase` while the file is read and copied
+    batch by batch into a temporary staging table, which is then merged into
+    `products` with a single statement. Each batch is read and validated in a
+    worker thread, off the event loop.
+    """
+    report = ProductImportResult()
+
+    connection = await session.connection()
+    driver = (await connection.get_raw_connection()).driver_connection
+    await session.execute(CREATE_STAGE)
+
+    batches = read_batches(file, ndjson, batch_size, report)
+    while True:
+        batch = await asyncio.to_thread(next, batches, None)
+        if batch is None:
+            break
+        await driver.copy_records_to_table(
+            "product_import", records=batch, columns=STAGE_COLUMNS
+        )
+
+    result = await session.execute(MERGE_STAGE, {"now": datetime.utcnow()})
+    report.inserted, report.updated = result.one()
+    await session.commit()
+    if report.updated:
+        await row_cache.clear(Product)
+    return report
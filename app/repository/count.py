@@ -0,0 +1,112 @@
+import hashlib
+import json
+from typing import Any, NamedTuple, Optional
+
+from redis.exceptions import RedisError
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.enums import CountMode
+from app.core.config import settings
+from app.db.redis import redis_client
+
+
+class TotalCount(NamedTuple):
+    count: int
+    mode: CountMode
+
+
+#   Partitioned parents keep no statistics of their own: add up their partitions
+TABLE_ESTIMATE = text("""
+    SELECT CASE WHEN c.relkind = 'p' THEN (
+            SELECT sum(part.reltuples) FROM pg_inherits AS i
+            JOIN pg_class AS part ON part.oid = i.inhrelid
+            WHERE i.inhparent = c.oid
+        ) ELSE c.reltuples END::bigint
+    FROM pg_class AS c
+    WHERE c.oid = to_regclass(CAST(:table AS text))
+    """)
+
+
+def _sql(session: AsyncSession, statement) -> str:
+    return str(
+        statement.compile(
+            dialect=session.bind.dialect, compile_kwargs={"literal_binds": True}
+        )
+    )
+
+
+async def exact_count(session: AsyncSession, statement) -> int:
+    return await session.scalar(
+        select(func.count()).select_from(statement.order_by(None).subquery())
+    )
+
+
+async def table_estimate(session: AsyncSession, table: str) -> Optional[int]:
+    """Row count of `table` from planner statistics, None if never analyzed."""
+    estimate = await session.scalar(TABLE_ESTIMATE, {"table": table})
+    if estimate is None or estimate < 0:
+        return None
+    return estimate
+
+
+async def plan_estimate(session: AsyncSession, statement) -> int:
+    """Rows the planner expects `statement` to return, without running it."""
+    result = await session.execute(
+        text("EXPLAIN (FORMAT JSON) " + _sql(session, statement.order_by(None)))
+    )
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def cached_count(session: AsyncSession, statement) -> int:
+    """Exact count kept in Redis for `COUNT_CACHE_TTL` seconds."""
+    digest = hashlib.sha1(_sql(session, statement).encode()).hexdigest()
+    key = f"count:{digest}"
+    try:
+        cached = await redis_client.get(key)
+    except RedisError:
+        cached = None
+    if cached is not None:
+        return int(cached)
+    count = await exact_count(session, statement)
+    try:
+        await redis_client.set(key, count, ex=settings.COUNT_CACHE_TTL)
+    except RedisError:
+        pass
+    return count
+
+
+async def count_rows(
+    session: AsyncSession,
+    statement,
+    mode: CountMode = CountMode.exact,
+    table: Optional[str] = None,
+) -> TotalCount:
+    """Count the rows `statement` returns, exactly, estimated or from cache.
+
+    Estimates come from `pg_class.reltuples` when `table` is given (an
+    unfiltered scan), otherwise from the planner's row estimate. Estimates
+    below `COUNT_EXACT_THRESHOLD` are replaced by an exact count, where it
+    is cheap and a visible error would matter most.
+    """
+    if mode == CountMode.estimated:
+        if table is not None:
+            estimate = await table_estimate(session, table)
+        else:
+            estimate = await plan_estimate(session, statement)
+        if estimate is not None and estimate >= settings.COUNT_EXACT_THRESHOLD:
+            return TotalCount(count=estimate, mode=CountMode.estimated)
+        mode = CountMode.exact
+    if mode == CountMode.cached:
+        return TotalCount(
+            count=await cached_count(session, statement), mode=CountMode.cached
+        )
+    return TotalCount(count=await exact_count(session, statement), mode=mode)
+
+
+def set_total_count(response: Any, total: TotalCount):
+    response.headers["X-Total-Count"] = str(total.count)
+    response.headers["X-Total-Count-Mode"] = total.mode.value
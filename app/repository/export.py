@@ -0,0 +1,159 @@
+import csv
+import io
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Order, OrderProduct, Product, User
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  #   Parquet export is optional
+    pa = pq = None
+
+PARQUET_AVAILABLE = pq is not None
+
+EXPORT_COLUMNS = [
+    ("order_id", Order.id),
+    ("created_at", Order.created_at),
+    ("customer_email", User.email),
+    ("customer_name", User.name),
+    ("total_price", Order.total_price),
+    ("shipping_method", Order.shipping_method),
+    ("shipping_location", Order.shipping_location),
+    ("fulfill_status", Order.fulfill_status),
+    ("fulfill_at", Order.fulfill_at),
+    ("from_admin", Order.from_admin),
+    ("product_id", OrderProduct.product_id),
+    ("product_name", Product.name),
+    ("quantity", OrderProduct.quantity),
+]
+HEADER = [name for name, _ in EXPORT_COLUMNS]
+
+
+def export_statement(start: Optional[datetime], end: Optional[datetime]):
+    statement = (
+        select(*(column.label(name) for name, column in EXPORT_COLUMNS))
+        .join(User, Order.user_id == User.id)
+        .join(
+            OrderProduct,
+            (Order.id == OrderProduct.order_id)
+            & (Order.created_at == OrderProduct.order_created_at),
+        )
+        .outerjoin(Product, OrderProduct.product_id == Product.id)
+        .order_by(Order.created_at, Order.id)
+    )
+    #   Bound both tables so each is pruned to the requested months
+    if start is not None:
+        statement = statement.where(
+            Order.created_at >= start, OrderProduct.order_created_at >= start
+        )
+    if end is not None:
+        statement = statement.where(
+            Order.created_at < end, OrderProduct.order_created_at < end
+        )
+    return statement
+
+
+async def iter_order_rows(
+    session: AsyncSession,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    chunk_size: int = 10_000,
+) -> AsyncIterator[Sequence]:
+    """Yield order line items `chunk_size` rows at a time from a server-side cursor."""
+    result = await session.stream(
+        export_statement(start, end).execution_options(yield_per=chunk_size)
+    )
+    async for partition in result.partitions():
+        yield partition
+
+
+async def iter_csv(chunks: AsyncIterator[Sequence], gzip: bool = False):
+    """Encode row chunks as CSV, optionally gzip-compressed on the fly."""
+    compressor = zlib.compressobj(wbits=31) if gzip else None
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(HEADER)
+    async for rows in chunks:
+        writer.writerows(rows)
+        data = buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+        yield compressor.compress(data) if compressor else data
+    data = buffer.getvalue().encode()
+    if compressor:
+        data = compressor.compress(data) + compressor.flush()
+    if data:
+        yield data
+
+
+def parquet_schema():
+    return pa.schema(
+        [
+            ("order_id", pa.string()),
+            ("created_at", pa.timestamp("us")),
+            ("customer_email", pa.string()),
+            ("customer_name", pa.string()),
+            ("total_price", pa.float64()),
+            ("shipping_method", pa.string()),
+            ("shipping_location", pa.string()),
+            ("fulfill_status", pa.string()),
+            ("fulfill_at", pa.timestamp("us")),
+            ("from_admin", pa.bool_()),
+            ("product_id", pa.string()),
+            ("product_name", pa.string()),
+            ("quantity", pa.int64()),
+        ]
+    )
+
+
+class StreamSink(io.RawIOBase):
+    """Write-only file that hands out what was written so far.
+
+    Keeps counting the absolute position so the Parquet writer's offsets stay
+    right after the buffer is drained.
+    """
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+async def iter_parquet(chunks: AsyncIterator[Sequence], compression: str = "snappy"):
+    """Encode row chunks as Parquet, one row group per chunk."""
+    if pq is None:
+        raise RuntimeError("Parquet export requires pyarrow: pip install pyarrow")
+    schema = parquet_schema()
+    sink = StreamSink()
+    writer = pq.ParquetWriter(sink, schema, compression=compression)
+    try:
+        async for rows in chunks:
+            columns: List[list] = [list(values) for values in zip(*rows)]
+            for index in (0, 10):  #   UUID columns
+                columns[index] = [str(value) for value in columns[index]]
+            writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
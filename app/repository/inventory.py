@@ -0,0 +1,271 @@
+from collections import defaultdict
+from typing import Dict, Iterable, Optional
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy import delete, func, or_, select, text, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.cache import row_cache
+from app.models import Product, ProductStockShard, StockResponse, StoreStock
+
+#   Reserve every tracked, unsharded product of an order in one statement and
+#   report what happened to each requested product.
+RESERVE_PRODUCTS = text("""
+    WITH wanted AS (
+        SELECT * FROM unnest(CAST(:ids AS uuid[]), CAST(:quantities AS integer[]))
+            AS w(product_id, quantity)
+    ),
+    reserved AS (
+        UPDATE products AS p SET stock = p.stock - w.quantity
+        FROM wanted AS w
+        WHERE p.id = w.product_id
+            AND p.stock IS NOT NULL
+            AND NOT p.stock_sharded
+            AND p.stock >= w.quantity
+        RETURNING p.id
+    )
+    SELECT p.id, p.stock_sharded, r.id IS NOT NULL AS reserved,
+        p.stock IS NULL AND NOT p.stock_sharded AS untracked
+    FROM wanted AS w
+    JOIN products AS p ON p.id = w.product_id
+    LEFT JOIN reserved AS r ON r.id = p.id
+    """)
+
+RESERVE_STORE = text("""
+    WITH wanted AS (
+        SELECT * FROM unnest(CAST(:ids AS uuid[]), CAST(:quantities AS integer[]))
+            AS w(product_id, quantity)
+    )
+    UPDATE store_stocks AS s SET quantity = s.quantity - w.quantity
+    FROM wanted AS w
+    WHERE s.store_id = :store_id
+        AND s.product_id = w.product_id
+        AND s.quantity >= w.quantity
+    RETURNING s.product_id
+    """)
+
+#   Take stock from any shard nobody else holds; concurrent checkouts of the same
+#   best-seller land on different rows instead of waiting on each other.
+RESERVE_SHARD = text("""
+    UPDATE product_stock_shards AS s SET quantity = s.quantity - :quantity
+    WHERE (s.product_id, s.shard) = (
+        SELECT product_id, shard FROM product_stock_shards
+        WHERE product_id = :product_id AND quantity >= :quantity
+        ORDER BY random()
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING s.shard
+    """)
+
+#   No free shard holds the whole quantity (all locked, or the order is larger
+#   than any shard): lock every shard, in a fixed order so concurrent callers
+#   queue instead of deadlocking, and take the quantity from as few of them as
+#   the running sum needs, fullest first. Reserves nothing when the shards
+#   together hold too little.
+RESERVE_SHARDS_SPREAD = text("""
+    WITH locked AS (
+        SELECT shard, quantity FROM product_stock_shards
+        WHERE product_id = :product_id AND quantity > 0
+        ORDER BY shard
+        FOR UPDATE
+    ),
+    running AS (
+        SELECT shard, quantity,
+            sum(quantity) OVER (ORDER BY quantity DESC, shard) AS upto
+        FROM locked
+    ),
+    taken AS (
+        SELECT shard, LEAST(quantity, :quantity - (upto - quantity)) AS quantity
+        FROM running
+        WHERE upto - quantity < :quantity
+            AND (SELECT sum(quantity) FROM locked) >= :quantity
+    )
+    UPDATE product_stock_shards AS s SET quantity = s.quantity - t.quantity
+    FROM taken AS t
+    WHERE s.product_id = :product_id AND s.shard = t.shard
+    RETURNING s.shard
+    """)
+
+RELEASE_SHARD = text("""
+    UPDATE product_stock_shards AS s SET quantity = s.quantity + :quantity
+    WHERE (s.product_id, s.shard) = (
+        SELECT product_id, shard FROM product_stock_shards
+        WHERE product_id = :product_id
+        ORDER BY random()
+        LIMIT 1
+    )
+    """)
+
+
+def _group_items(items: Iterable) -> Dict[UUID, int]:
+    quantities: Dict[UUID, int] = defaultdict(int)
+    for item in items:
+        quantities[item.product_id] += item.quantity
+    return quantities
+
+
+async def _fail(session: AsyncSession, status_code: int, detail: str, rollback: bool):
+    if rollback:
+        await session.rollback()
+    raise HTTPException(status_code=status_code, detail=detail)
+
+
+async def reserve_stock(
+    session: AsyncSession,
+    items: Iterable,
+    store_id: Optional[UUID] = None,
+    rollback: bool = True,
+):
+    """Take the ordered quantities out of stock without committing.
+
+    The reservation is committed together with the order. Raises 404 for unknown
+    products and 409 when there is not enough stock, after rolling back (unless
+    `rollback` is off, for callers that reserve inside a savepoint).
+    """
+    quantities = _group_items(items)
+    params = {"ids": list(quantities), "quantities": list(quantities.values())}
+
+    if store_id is not None:
+        result = await session.execute(RESERVE_STORE, {**params, "store_id": store_id})
+        reserved = {row.product_id for row in result}
+        for product_id in quantities:
+            if product_id not in reserved:
+                await _fail(
+                    session,
+                    409,
+                    f"Product #{product_id} is out of stock at store #{store_id}!",
+                    rollback,
+                )
+        return
+
+    rows = {row.id: row for row in await session.execute(RESERVE_PRODUCTS, params)}
+    for product_id, quantity in quantities.items():
+        row = rows.get(product_id)
+        if row is None:
+            await _fail(
+                session, 404, f"Product #{product_id} is not available now!", rollback
+            )
+        if row.reserved or row.untracked:
+            continue
+        shard_params = {"product_id": product_id, "quantity": quantity}
+        if row.stock_sharded and (
+            (await session.execute(RESERVE_SHARD, shard_params)).first()
+            or (await session.execute(RESERVE_SHARDS_SPREAD, shard_params)).first()
+        ):
+            continue
+        await _fail(session, 409, f"Product #{product_id} is out of stock!", rollback)
+
+
+async def release_stock(
+    session: AsyncSession, items: Iterable, store_id: Optional[UUID] = None
+):
+    """Put the quantities of a cancelled order back, without committing."""
+    quantities = _group_items(items)
+    if store_id is not None:
+        for product_id, quantity in quantities.items():
+            await session.execute(
+                update(StoreStock)
+                .where(
+                    StoreStock.store_id == store_id,
+                    StoreStock.product_id == product_id,
+                )
+                .values(quantity=StoreStock.quantity + quantity)
+            )
+        return
+
+    result = await session.execute(
+        select(Product.id, Product.stock_sharded).where(
+            Product.id.in_(list(quantities)),
+            or_(Product.stock.is_not(None), Product.stock_sharded),
+        )
+    )
+    for product_id, sharded in result.all():
+        quantity = quantities[product_id]
+        if sharded:
+            await session.execute(
+                RELEASE_SHARD, {"product_id": product_id, "quantity": quantity}
+            )
+        else:
+            await session.execute(
+                update(Product)
+                .where(Product.id == product_id)
+                .values(stock=Product.stock + quantity)
+            )
+
+
+async def set_stock(
+    session: AsyncSession,
+    product_id: UUID,
+    quantity: int,
+    shards: int = 1,
+    store_id: Optional[UUID] = None,
+) -> StockResponse:
+    """Overwrite the stock of a product, optionally split over `shards` rows."""
+    if store_id is not None:
+        statement = insert(StoreStock).values(
+            store_id=store_id, product_id=product_id, quantity=quantity
+        )
+        await session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[StoreStock.store_id, StoreStock.product_id],
+                set_={"quantity": statement.excluded.quantity},
+            )
+        )
+        await session.commit()
+        return StockResponse(
+            product_id=product_id, store_id=store_id, quantity=quantity
+        )
+
+    await session.execute(
+        delete(ProductStockShard).where(ProductStockShard.product_id == product_id)
+    )
+    if shards > 1:
+        base, extra = divmod(quantity, shards)
+        await session.execute(
+            insert(ProductStockShard),
+            [
+                {
+                    "product_id": product_id,
+                    "shard": shard,
+                    "quantity": base + (1 if shard < extra else 0),
+                }
+                for shard in range(shards)
+            ],
+        )
+    await session.execute(
+        update(Product)
+        .where(Product.id == product_id)
+        .values(
+            stock=None if shards > 1 else quantity,
+            stock_sharded=shards > 1,
+        )
+    )
+    await session.commit()
+    await row_cache.invalidate(Product, [product_id])
+    return StockResponse(product_id=product_id, quantity=quantity, shards=shards)
+
+
+async def get_stock(
+    session: AsyncSession, product: Product, store_id: Optional[UUID] = None
+) -> StockResponse:
+    if store_id is not None:
+        quantity = await session.scalar(
+            select(StoreStock.quantity).where(
+                StoreStock.store_id == store_id, StoreStock.product_id == product.id
+            )
+        )
+        return StockResponse(
+            product_id=product.id, store_id=store_id, quantity=quantity or 0
+        )
+    if not product.stock_sharded:
+        return StockResponse(product_id=product.id, quantity=product.stock)
+    result = await session.execute(
+        select(func.sum(ProductStockShard.quantity), func.count()).where(
+            ProductStockShard.product_id == product.id
+        )
+    )
+    quantity, shards = result.one()
+    return StockResponse(product_id=product.id, quantity=quantity, shards=shards)
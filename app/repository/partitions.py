@@ -0,0 +1,74 @@
+from datetime import date, datetime
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+
+#   Months currently attached to `orders`, from the partition names; the
+#   default partition has no month
+LIST_PARTITIONS = text("""
+    SELECT c.relname FROM pg_inherits AS i
+    JOIN pg_class AS c ON c.oid = i.inhrelid
+    WHERE i.inhparent = to_regclass('orders')
+    AND c.relname <> 'orders_default'
+    ORDER BY c.relname
+    """)
+
+
+def month_start(day: date) -> date:
+    return date(day.year, day.month, 1)
+
+
+def add_months(day: date, months: int) -> date:
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+async def create_order_partitions(
+    session: AsyncSession,
+    first: Optional[date] = None,
+    last: Optional[date] = None,
+) -> int:
+    """Create the monthly partitions from `first` to `last` that are missing.
+
+    Defaults to the current month through `ORDER_PARTITIONS_AHEAD` months
+    ahead. Returns how many months were created.
+    """
+    today = datetime.utcnow().date()
+    first = month_start(first or today)
+    last = last or add_months(today, settings.ORDER_PARTITIONS_AHEAD)
+    created = await session.scalar(
+        text("SELECT create_order_partitions(:first, :last)"),
+        {"first": first, "last": last},
+    )
+    await session.commit()
+    return created
+
+
+async def list_order_partitions(session: AsyncSession) -> List[date]:
+    result = await session.execute(LIST_PARTITIONS)
+    return [
+        datetime.strptime(name, "orders_y%Ym%m").date() for name in result.scalars()
+    ]
+
+
+async def archive_order_partitions(
+    session: AsyncSession, before: date, schema: Optional[str] = None
+) -> List[date]:
+    """Detach every month older than `before` and move it to the archive schema.
+
+    Each month is detached in its own transaction.
+    """
+    archived = []
+    for month in await list_order_partitions(session):
+        if month >= month_start(before):
+            break
+        await session.execute(
+            text("SELECT archive_order_partition(:month, :schema)"),
+            {"month": month, "schema": schema or settings.ORDER_ARCHIVE_SCHEMA},
+        )
+        await session.commit()
+        archived.append(month)
+    return archived
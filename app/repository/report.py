@@ -0,0 +1,244 @@
+from datetime import date, datetime, timedelta
+from typing import List
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.expression import desc
+
+from app.core.config import settings
+from app.models import (
+    NO_GROUP,
+    GroupSales,
+    ProductSales,
+    RollupState,
+    SalesDaily,
+    SalesDailyGroup,
+    SalesDailyProduct,
+)
+
+ROLLUP_NAME = "sales"
+EPOCH = datetime(1970, 1, 1)
+
+#   Each statement folds the orders created in (:low, :high] into the rollups
+WINDOW_ORDERS = """
+    WITH window_orders AS (
+        SELECT id, created_at, created_at::date AS day, total_price, user_id
+        FROM orders
+        WHERE created_at > :low AND created_at <= :high
+    )
+"""
+
+ROLLUP_DAILY = text(WINDOW_ORDERS + """
+    INSERT INTO sales_daily (day, orders, items, revenue)
+    SELECT w.day, count(*), coalesce(sum(lines.items), 0), sum(w.total_price)
+    FROM window_orders AS w
+    LEFT JOIN LATERAL (
+        SELECT sum(quantity) AS items FROM order_products
+        WHERE order_id = w.id AND order_created_at = w.created_at
+    ) AS lines ON true
+    GROUP BY w.day
+    ON CONFLICT (day) DO UPDATE SET
+        orders = sales_daily.orders + excluded.orders,
+        items = sales_daily.items + excluded.items,
+        revenue = sales_daily.revenue + excluded.revenue
+    """)
+
+ROLLUP_PRODUCTS = text(WINDOW_ORDERS + """
+    INSERT INTO sales_daily_products (day, product_id, orders, quantity, revenue)
+    SELECT w.day, op.product_id, count(*), sum(op.quantity),
+        sum(op.quantity * coalesce(p.base_price, 0))
+    FROM window_orders AS w
+    JOIN order_products AS op
+        ON op.order_id = w.id AND op.order_created_at = w.created_at
+        AND op.order_created_at > :low AND op.order_created_at <= :high
+    LEFT JOIN products AS p ON p.id = op.product_id
+    GROUP BY w.day, op.product_id
+    ON CONFLICT (day, product_id) DO UPDATE SET
+        orders = sales_daily_products.orders + excluded.orders,
+        quantity = sales_daily_products.quantity + excluded.quantity,
+        revenue = sales_daily_products.revenue + excluded.revenue
+    """)
+
+ROLLUP_GROUPS = text(WINDOW_ORDERS + """
+    INSERT INTO sales_daily_groups (day, group_id, orders, revenue)
+    SELECT w.day, coalesce(u.group_id, CAST(:no_group AS uuid)), count(*),
+        sum(w.total_price)
+    FROM window_orders AS w
+    JOIN users AS u ON u.id = w.user_id
+    GROUP BY w.day, coalesce(u.group_id, CAST(:no_group AS uuid))
+    ON CONFLICT (day, group_id) DO UPDATE SET
+        orders = sales_daily_groups.orders + excluded.orders,
+        revenue = sales_daily_groups.revenue + excluded.revenue
+    """)
+
+
+#   Take one already rolled-up order back out, before its rows are deleted
+UNROLL_DAILY = text("""
+    UPDATE sales_daily SET
+        orders = orders - 1,
+        items = items - coalesce((
+            SELECT sum(quantity) FROM order_products
+            WHERE order_id = :order_id AND order_created_at = :created_at
+        ), 0),
+        revenue = revenue - :total_price
+    WHERE day = CAST(:created_at AS date)
+    """)
+
+UNROLL_PRODUCTS = text("""
+    UPDATE sales_daily_products AS s SET
+        orders = s.orders - 1,
+        quantity = s.quantity - op.quantity,
+        revenue = s.revenue - op.quantity * coalesce(p.base_price, 0)
+    FROM order_products AS op
+    LEFT JOIN products AS p ON p.id = op.product_id
+    WHERE op.order_id = :order_id AND op.order_created_at = :created_at
+        AND s.day = CAST(:created_at AS date) AND s.product_id = op.product_id
+    """)
+
+UNROLL_GROUPS = text("""
+    UPDATE sales_daily_groups AS s SET
+        orders = s.orders - 1,
+        revenue = s.revenue - :total_price
+    FROM users AS u
+    WHERE u.id = :user_id AND s.day = CAST(:created_at AS date)
+        AND s.group_id = coalesce(u.group_id, CAST(:no_group AS uuid))
+    """)
+
+
+async def _lock_state(session: AsyncSession) -> RollupState:
+    """Row-lock the high-water mark so concurrent refreshes run one at a time."""
+    await session.execute(
+        insert(RollupState)
+        .values(name=ROLLUP_NAME, high_water=EPOCH)
+        .on_conflict_do_nothing()
+    )
+    result = await session.execute(
+        select(RollupState)
+        .where(RollupState.name == ROLLUP_NAME)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    return result.scalar_one()
+
+
+async def refresh_sales_rollups(
+    session: AsyncSession, step: timedelta = timedelta(days=31)
+) -> datetime:
+    """Fold orders created since the high-water mark into the rollups.
+
+    Orders younger than `ROLLUP_LAG_SECONDS` are left for the next run, so
+    rows whose transaction commits late are not skipped. Large gaps are
+    processed `step` at a time, one transaction each.
+    """
+    high = datetime.utcnow() - timedelta(seconds=settings.ROLLUP_LAG_SECONDS)
+    while True:
+        state = await _lock_state(session)
+        low = state.high_water
+        if low == EPOCH:
+            #   Nothing rolled up yet: start from the oldest order
+            oldest = await session.scalar(text("SELECT min(created_at) FROM orders"))
+            low = oldest - timedelta(microseconds=1) if oldest else high
+        if low >= high:
+            await session.commit()
+            return low
+        upper = min(high, low + step)
+        params = {"low": low, "high": upper}
+        await session.execute(ROLLUP_DAILY, params)
+        await session.execute(ROLLUP_PRODUCTS, params)
+        await session.execute(ROLLUP_GROUPS, {**params, "no_group": NO_GROUP})
+        state.high_water = upper
+        await session.commit()
+
+
+async def remove_order_from_rollups(session: AsyncSession, order) -> bool:
+    """Subtract an order about to be deleted from the rollups, without committing.
+
+    Only orders below the high-water mark were added; the rest are simply
+    never seen by the next refresh. The high-water mark is share-locked so a
+    refresh cannot fold the order in meanwhile. Product revenue and the
+    group use the current price and group, as a refresh would; after those
+    changed, only a backfill restores the exact figures.
+    """
+    high_water = await session.scalar(
+        select(RollupState.high_water)
+        .where(RollupState.name == ROLLUP_NAME)
+        .with_for_update(read=True)
+    )
+    if high_water is None or order.created_at > high_water:
+        return False
+    params = {
+        "order_id": order.id,
+        "created_at": order.created_at,
+        "total_price": order.total_price,
+    }
+    await session.execute(UNROLL_DAILY, params)
+    await session.execute(UNROLL_PRODUCTS, params)
+    await session.execute(
+        UNROLL_GROUPS, {**params, "user_id": order.user_id, "no_group": NO_GROUP}
+    )
+    return True
+
+
+async def backfill_sales_rollups(session: AsyncSession, since: date = None) -> datetime:
+    """Rebuild the rollups from `since` (or from scratch) up to now."""
+    state = await _lock_state(session)
+    for model in (SalesDaily, SalesDailyProduct, SalesDailyGroup):
+        statement = delete(model)
+        if since is not None:
+            statement = statement.where(model.day >= since)
+        await session.execute(statement)
+    if since is None:
+        state.high_water = EPOCH
+    else:
+        start = datetime.combine(since, datetime.min.time()) - timedelta(microseconds=1)
+        state.high_water = min(state.high_water, start)
+    await session.commit()
+    return await refresh_sales_rollups(session)
+
+
+async def get_daily_sales(
+    session: AsyncSession, start: date, end: date
+) -> List[SalesDaily]:
+    result = await session.execute(
+        select(SalesDaily)
+        .where(SalesDaily.day >= start, SalesDaily.day <= end)
+        .order_by(SalesDaily.day)
+    )
+    return result.scalars().all()
+
+
+async def get_product_sales(
+    session: AsyncSession, start: date, end: date, limit: int = 50
+) -> List[ProductSales]:
+    revenue = func.sum(SalesDailyProduct.revenue).label("revenue")
+    result = await session.execute(
+        select(
+            SalesDailyProduct.product_id,
+            func.sum(SalesDailyProduct.orders).label("orders"),
+            func.sum(SalesDailyProduct.quantity).label("quantity"),
+            revenue,
+        )
+        .where(SalesDailyProduct.day >= start, SalesDailyProduct.day <= end)
+        .group_by(SalesDailyProduct.product_id)
+        .order_by(desc(revenue))
+        .limit(limit)
+    )
+    return [ProductSales(**row._mapping) for row in result]
+
+
+async def get_group_sales(
+    session: AsyncSession, start: date, end: date
+) -> List[GroupSales]:
+    revenue = func.sum(SalesDailyGroup.revenue).label("revenue")
+    result = await session.execute(
+        select(
+            SalesDailyGroup.group_id,
+            func.sum(SalesDailyGroup.orders).label("orders"),
+            revenue,
+        )
+        .where(SalesDailyGroup.day >= start, SalesDailyGroup.day <= end)
+        .group_by(SalesDailyGroup.group_id)
+        .order_by(desc(revenue))
+    )
+    return [GroupSales(**row._mapping) for row in result]
@@ -0,0 +1,67 @@
+import base64
+import json
+import re
+from typing import List, Optional, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy import REAL, cast, func, literal_column, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.expression import desc
+
+from app.models import Product
+
+#   Text search configuration of products.search_vector (see migrations)
+SEARCH_CONFIG = "english"
+search_vector = literal_column("products.search_vector")
+
+
+def build_tsquery(text: str) -> Optional[str]:
+    """AND the words of `text` together, the last one as a prefix (typeahead)."""
+    words = re.findall(r"\w+", text.lower())
+    if not words:
+        return None
+    return " & ".join(words[:-1] + [f"{words[-1]}:*"])
+
+
+def encode_cursor(rank: float, id) -> str:
+    raw = json.dumps([rank, str(id)]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[float, UUID]:
+    try:
+        rank, id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(rank), UUID(id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+async def search_products(
+    session: AsyncSession, text: str, limit: int = 20, cursor: Optional[str] = None
+) -> Tuple[List[Product], Optional[str]]:
+    """Rank products matching `text`; returns a page and the next cursor."""
+    query = build_tsquery(text)
+    if query is None:
+        return [], None
+    tsquery = func.to_tsquery(literal_column(f"'{SEARCH_CONFIG}'::regconfig"), query)
+    rank = func.ts_rank_cd(search_vector, tsquery)
+
+    statement = (
+        select(Product, rank.label("rank"))
+        .where(search_vector.op("@@")(tsquery))
+        .order_by(desc(rank), desc(Product.id))
+        .limit(limit + 1)
+    )
+    if cursor:
+        last_rank, last_id = decode_cursor(cursor)
+        statement = statement.where(
+            tuple_(rank, Product.id) < tuple_(cast(last_rank, REAL), last_id)
+        )
+
+    rows = (await session.execute(statement)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].rank, rows[-1].Product.id)
+    return [row.Product for row in rows], next_cursor
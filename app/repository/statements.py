@@ -0,0 +1,57 @@
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import and_, bindparam, func, inspect, select
+from sqlalchemy.sql import Select
+
+from app.core.config import settings
+
+#   Column name and whether it is compared to None (`IS NULL` takes no parameter)
+Shape = Tuple[Tuple[str, bool], ...]
+
+
+def _entity(model):
+    """The mapped class behind a model or a single column (`User.email`)."""
+    return model if isinstance(model, type) else model.class_
+
+
+@lru_cache(maxsize=1024)
+def _template(model, kind: str, shape: Shape) -> Optional[Select]:
+    entity = _entity(model)
+    columns = inspect(entity).column_attrs
+    if any(key not in columns for key, _ in shape):
+        return None  #   Relationships and other filters keep the generic path
+    criteria = [
+        (
+            getattr(entity, key).is_(None)
+            if is_none
+            else getattr(entity, key) == bindparam(key)
+        )
+        for key, is_none in shape
+    ]
+    if kind == "count":
+        statement = select(func.count()).select_from(entity)
+    else:
+        statement = select(model)
+    return statement.where(and_(*criteria)) if criteria else statement
+
+
+def filter_statement(model, kind: str, kwargs: Dict[str, Any]) -> Tuple[Select, dict]:
+    """`select(model).filter_by(**kwargs)` (or its count) and its parameters.
+
+    Statements are built once per model, kind and set of filter keys, and the
+    same object is executed again with new values. Its cache key is memoized
+    on it, so SQLAlchemy's compiled cache is hit without walking the
+    statement again. Filters that are not plain columns are built every time.
+    """
+    if settings.STATEMENT_CACHE_ENABLED:
+        shape = tuple(sorted((key, value is None) for key, value in kwargs.items()))
+        statement = _template(model, kind, shape)
+        if statement is not None:
+            params = {key: value for key, value in kwargs.items() if value is not None}
+            return statement, params
+    if kind == "count":
+        statement = select(func.count()).select_from(_entity(model))
+    else:
+        statement = select(model)
+    return statement.filter_by(**kwargs), {}
@@ -0,0 +1,112 @@
+import asyncio
+import csv
+from typing import IO, Iterator, List
+
+from pydantic import ValidationError
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import NearestStore, Store, StoreBase, StoreImportResult
+
+#   KNN ordering on the GiST index of stores.location
+NEAREST_STORES = text("""
+    WITH origin AS (
+        SELECT ST_SetSRID(ST_MakePoint(:longitude, :latitude), 4326)::geography AS point
+    )
+    SELECT s.id, s.name, s.address, s.is_store, s.latitude, s.longitude,
+        ST_Distance(s.location, origin.point) AS distance_m
+    FROM stores AS s, origin
+    WHERE s.location IS NOT NULL AND s.is_store = :is_store
+    ORDER BY s.location <-> origin.point
+    LIMIT :limit
+    """)
+
+#   Geocode existing stores by address in one statement
+UPDATE_LOCATIONS = text("""
+    UPDATE stores AS s SET latitude = w.latitude, longitude = w.longitude
+    FROM unnest(
+        CAST(:addresses AS varchar[]),
+        CAST(:latitudes AS float8[]),
+        CAST(:longitudes AS float8[])
+    ) AS w(address, latitude, longitude)
+    WHERE s.address = w.address
+    RETURNING s.address
+    """)
+
+
+async def get_nearest_stores(
+    session: AsyncSession,
+    latitude: float,
+    longitude: float,
+    is_store: bool = True,
+    limit: int = 5,
+) -> List[NearestStore]:
+    result = await session.execute(
+        NEAREST_STORES,
+        {
+            "latitude": latitude,
+            "longitude": longitude,
+            "is_store": is_store,
+            "limit": limit,
+        },
+    )
+    return [NearestStore(**row._mapping) for row in result]
+
+
+def read_stores(
+    file: IO[str], batch_size: int, report: StoreImportResult
+) -> Iterator[List[StoreBase]]:
+    """Validated stores, `batch_size` at a time. Rejected rows go to `report`."""
+    batch: List[StoreBase] = []
+    for line, row in enumerate(csv.DictReader(file), start=2):
+        try:
+            store = StoreBase.model_validate(
+                {key: value for key, value in row.items() if value not in (None, "")}
+            )
+            if store.latitude is None or store.longitude is None:
+                raise ValueError("latitude and longitude are required")
+        except (ValidationError, ValueError) as e:
+            report.rejected.append(f"line {line}: {e}")
+            continue
+        batch.append(store)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def import_store_locations(
+    session: AsyncSession, file: IO[str], batch_size: int = 1000
+) -> StoreImportResult:
+    """Load coordinates from a CSV (name,address,latitude,longitude[,is_store]).
+
+    Rows whose address matches an existing store update its coordinates, the
+    others create a new store. No geocoding service is called. Each batch is
+    read and validated in a worker thread, off the event loop.
+    """
+    report = StoreImportResult()
+    batches = read_stores(file, batch_size, report)
+    while True:
+        batch = await asyncio.to_thread(next, batches, None)
+        if batch is None:
+            break
+        addresses = [store.address for store in batch]
+        updated = await session.execute(
+            UPDATE_LOCATIONS,
+            {
+                "addresses": addresses,
+                "latitudes": [store.latitude for store in batch],
+                "longitudes": [store.longitude for store in batch],
+            },
+        )
+        matched = {row.address for row in updated}
+        new_stores = [dict(store) for store in batch if store.address not in matched]
+        if new_stores:
+            await session.execute(
+                insert(Store), [Store(**data).model_dump() for data in new_stores]
+            )
+        report.updated += len(matched)
+        report.created += len(new_stores)
+    await session.commit()
+    return report
@@ -0,0 +1,101 @@
+"""Order placement throughput with and without group commit.
+
+Places orders from many concurrent callers, first committing each order on
+its own, then through `GroupCommit` with each of the given windows, and
+reports orders per second against the per-order latency that batching adds.
+
+    python -m benchmarks.group_commit --orders 5000 --concurrency 128 --windows 0.002 0.005 0.01
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from uuid import uuid4
+
+from app.db.batching import GroupCommit
+from app.db.session import SessionLocal, engine
+from app.db.utils import create_db_and_tables
+from app.models import OrderCreate, Product, User
+from app.models.order import OrderProductRequest
+from app.repository import BaseRepository, PendingOrder, place_orders
+
+
+async def setup():
+    async with SessionLocal() as session:
+        user = await BaseRepository(User).create(
+            session=session,
+            name="group-commit-bench",
+            phone="0",
+            address="-",
+            email=f"group-commit-{uuid4().hex[:8]}@example.com",
+            password="-",
+        )
+        #   No stock tracked: measure the writes, not contention on one row
+        product = await BaseRepository(Product).create(
+            session=session,
+            name=f"group-commit-bench-{uuid4().hex[:8]}",
+            base_price=1.0,
+        )
+    order = OrderCreate(
+        shipping_method="pickup",
+        shipping_location="-",
+        total_price=1.0,
+        items=[OrderProductRequest(product_id=product.id, quantity=1)],
+    )
+    return PendingOrder(user.id, False, order)
+
+
+async def place_alone(pending: PendingOrder):
+    async with SessionLocal() as session:
+        (result,) = await place_orders(session, [pending])
+    if isinstance(result, Exception):
+        raise result
+
+
+async def scenario(name: str, place, pending: PendingOrder, args):
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            await place(pending)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(args.orders)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(
+        f"{name:<24} {args.orders / elapsed:>8.0f} orders/s   "
+        f"p50 {statistics.median(latencies) * 1000:6.1f} ms   p99 {p99 * 1000:6.1f} ms"
+    )
+
+
+async def run(args):
+    await create_db_and_tables(engine)
+    pending = await setup()
+    await scenario("commit per order", place_alone, pending, args)
+    for window in args.windows:
+        batcher = GroupCommit(place_orders, window, args.batch_size)
+        await scenario(
+            f"group commit {window * 1000:g} ms", batcher.submit, pending, args
+        )
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=128)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument(
+        "--windows", type=float, nargs="+", default=[0.001, 0.005, 0.01, 0.02]
+    )
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Concurrent checkout benchmark for stock reservation.
+
+Hammers one product with more concurrent single-unit checkouts than it has
+stock, once with a single stock row and once with sharded stock, and checks
+that exactly `stock` checkouts succeed (no overselling) and nothing goes
+negative. A last run orders `--bulk-quantity` units at a time from shards
+that each hold fewer, so every checkout has to draw on several shards.
+Exits 1 on any inconsistency.
+
+    python -m benchmarks.inventory --stock 2000 --checkouts 3000 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from uuid import uuid4
+
+from fastapi import HTTPException
+
+from app.db.session import SessionLocal, engine
+from app.db.utils import create_db_and_tables
+from app.models import Product
+from app.models.order import OrderProductRequest
+from app.repository import BaseRepository, get_stock, reserve_stock, set_stock
+
+
+async def checkout(product_id, quantity: int, semaphore: asyncio.Semaphore) -> bool:
+    async with semaphore, SessionLocal() as session:
+        try:
+            await reserve_stock(
+                session=session,
+                items=[OrderProductRequest(product_id=product_id, quantity=quantity)],
+            )
+        except HTTPException:
+            return False
+        await session.commit()
+        return True
+
+
+async def scenario(name: str, shards: int, args, quantity: int = 1) -> bool:
+    async with SessionLocal() as session:
+        product = await BaseRepository(Product).create(
+            session=session, name=f"inventory-bench-{uuid4().hex[:8]}", base_price=1.0
+        )
+        await set_stock(
+            session=session, product_id=product.id, quantity=args.stock, shards=shards
+        )
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    started = time.perf_counter()
+    results = await asyncio.gather(
+        *(checkout(product.id, quantity, semaphore) for _ in range(args.checkouts))
+    )
+    elapsed = time.perf_counter() - started
+
+    async with SessionLocal() as session:
+        product = await BaseRepository(Product).get_by_id(
+            session=session, id=product.id
+        )
+        stock = await get_stock(session=session, product=product)
+
+    sold = sum(results)
+    expected = min(args.stock // quantity, args.checkouts)
+    ok = sold == expected and stock.quantity == args.stock - sold * quantity
+    print(
+        f"{name:<16} sold {sold}/{args.checkouts} (expected {expected}), "
+        f"left {stock.quantity}, {args.checkouts / elapsed:.0f} checkouts/s "
+        f"{'OK' if ok else 'OVERSOLD/INCONSISTENT'}"
+    )
+    return ok
+
+
+async def run(args) -> bool:
+    await create_db_and_tables(engine)
+    ok = await scenario("single row", 1, args)
+    ok &= await scenario(f"{args.shards} shards", args.shards, args)
+    #   Each shard holds less than one checkout takes
+    bulk_shards = max(2, args.stock // max(1, args.bulk_quantity - 1))
+    ok &= await scenario(
+        f"{bulk_shards} shards x{args.bulk_quantity}",
+        bulk_shards,
+        args,
+        quantity=args.bulk_quantity,
+    )
+    await engine.dispose()
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stock", type=int, default=1000)
+    parser.add_argument("--checkouts", type=int, default=1500)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--shards", type=int, default=16)
+    parser.add_argument("--bulk-quantity", type=int, default=5)
+    if not asyncio.run(run(parser.parse_args())):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""In-process load test for the API.
+
+Boots the FastAPI app against the Postgres/Redis configured in `.env`, drives a
+realistic mix of user journeys and reports throughput and latency percentiles
+per route. ShipEngine and SMTP are stubbed so no external calls are made.
+
+    python -m benchmarks.loadtest --users 50 --duration 60
+    python -m benchmarks.loadtest --save-baseline
+    python -m benchmarks.loadtest --tolerance 0.2   # exit 1 on regression
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List
+from unittest import mock
+from uuid import uuid4
+
+import httpx
+
+from app.api.main import app
+from app.db.session import engine
+from app.db.utils import create_db_and_tables
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+PERCENTILES = (50, 95, 99)
+
+SHIP_PAYLOAD = {
+    "ship_to": {
+        "name": "Load Test",
+        "phone": "555-555-5555",
+        "address_line1": "1 Benchmark Way",
+        "city_locality": "San Jose",
+    },
+    "ship_from": {
+        "company_name": "pyapp",
+        "name": "Warehouse",
+        "phone": "555-555-5555",
+        "address_line1": "2 Warehouse Rd",
+        "city_locality": "San Jose",
+    },
+    "packages": [{"weight": {"value": 12.0}}],
+}
+
+
+class Recorder:
+    """Collect per-route latencies in seconds."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def call(
+        self, client: httpx.AsyncClient, method: str, route: str, url: str, **kwargs
+    ) -> httpx.Response:
+        started = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.samples[f"{method} {route}"].append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            self.errors[f"{method} {route}"] += 1
+        return response
+
+
+def percentile(values: List[float], pct: int) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(recorder: Recorder, elapsed: float) -> Dict[str, Dict[str, float]]:
+    report = {}
+    for route, values in sorted(recorder.samples.items()):
+        report[route] = {
+            "count": len(values),
+            "errors": recorder.errors.get(route, 0),
+            "rps": len(values) / elapsed,
+            **{f"p{pct}_ms": percentile(values, pct) * 1000 for pct in PERCENTILES},
+        }
+    return report
+
+
+@contextmanager
+def external_stubs():
+    """Replace ShipEngine and the Celery mail task with local fakes."""
+    with mock.patch(
+        "app.api.routes.v1.order.generate_shipping_label",
+        return_value=("https://labels.invalid/label.pdf", "9400000000000000000000"),
+    ), mock.patch("app.core.tasks.send_email_task.delay"):
+        yield
+
+
+async def seed_catalog(client: httpx.AsyncClient, products: int) -> Dict:
+    suffix = uuid4().hex[:8]
+    group = await client.post(
+        "/v1/groups", json={"name": f"loadtest-{suffix}", "discount_percent": 0.1}
+    )
+    group.raise_for_status()
+    product_ids = []
+    for index in range(products):
+        product = await client.post(
+            "/v1/products",
+            json={
+                "name": f"loadtest-{suffix}-{index}",
+                "base_price": round(random.uniform(1, 500), 2),
+                "description": "Generated by benchmarks.loadtest",
+            },
+        )
+        product.raise_for_status()
+        product_ids.append(product.json()["id"])
+    return {"group_id": group.json()["id"], "product_ids": product_ids}
+
+
+async def user_journey(
+    client: httpx.AsyncClient, recorder: Recorder, catalog: Dict, deadline: float
+):
+    """One virtual user: sign up once, then shop until the deadline."""
+    email = f"loadtest-{uuid4().hex}@example.com"
+    password = "loadtest-password"
+    await recorder.call(
+        client,
+        "POST",
+        "/v1/users/signup",
+        "/v1/users/signup",
+        json={
+            "name": "Load Test",
+            "phone": "555-555-5555",
+            "address": "1 Benchmark Way",
+            "email": email,
+            "password": password,
+            "group_id": catalog["group_id"],
+        },
+    )
+    while time.perf_counter() < deadline:
+        login = await recorder.call(
+            client,
+            "POST",
+            "/v1/users/login",
+            "/v1/users/login",
+            data={"username": email, "password": password},
+        )
+        if login.status_code != 200:
+            return
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+        for _ in range(random.randint(2, 6)):
+            await recorder.call(client, "GET", "/v1/products", "/v1/products")
+            if time.perf_counter() >= deadline:
+                return
+
+        items = []
+        for product_id in random.sample(
+            catalog["product_ids"], k=random.randint(1, 3)
+        ):
+            discount = await recorder.call(
+                client,
+                "POST",
+                "/v1/products/discount-price",
+                "/v1/products/discount-price",
+                json={"product_id": product_id},
+                headers=headers,
+            )
+            quantity = random.randint(1, 4)
+            if discount.status_code == 200:
+                await recorder.call(
+                    client,
+                    "POST",
+                    "/v1/products/price",
+                    "/v1/products/price",
+                    json={
+                        "discount_price": discount.json()["price"],
+                        "quantity": quantity,
+                    },
+                )
+            items.append({"product_id": product_id, "quantity": quantity})
+
+        order = await recorder.call(
+            client,
+            "POST",
+            "/v1/orders",
+            "/v1/orders",
+            json={
+                "shipping_method": random.choice(["freeship", "pickup"]),
+                "shipping_location": "1 Benchmark Way",
+                "total_price": 100.0,
+                "items": items,
+            },
+            headers=headers,
+        )
+        if order.status_code == 201 and random.random() < 0.5:
+            await recorder.call(
+                client,
+                "POST",
+                "/v1/orders/{order_id}/fulfill",
+                f"/v1/orders/{order.json()['id']}/fulfill",
+                json=SHIP_PAYLOAD,
+            )
+
+
+async def run(users: int, duration: float, products: int) -> Dict:
+    await create_db_and_tables(engine)
+    transport = httpx.ASGITransport(app=app)
+    recorder = Recorder()
+    with external_stubs():
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://loadtest", timeout=60
+        ) as client:
+            catalog = await seed_catalog(client, products)
+            started = time.perf_counter()
+            deadline = started + duration
+            await asyncio.gather(
+                *(
+                    user_journey(client, recorder, catalog, deadline)
+                    for _ in range(users)
+                )
+            )
+            elapsed = time.perf_counter() - started
+    await engine.dispose()
+    return summarize(recorder, elapsed)
+
+
+def compare(report: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Return a description of every route/percentile slower than allowed."""
+    regressions = []
+    for route, stats in report.items():
+        reference = baseline.get(route)
+        if not reference:
+            continue
+        for pct in PERCENTILES:
+            key = f"p{pct}_ms"
+            limit = reference[key] * (1 + tolerance)
+            if stats[key] > limit:
+                regressions.append(
+                    f"{route} {key}: {stats[key]:.1f}ms > {limit:.1f}ms "
+                    f"(baseline {reference[key]:.1f}ms)"
+                )
+        if stats["rps"] < reference["rps"] * (1 - tolerance):
+            regressions.append(
+                f"{route} rps: {stats['rps']:.1f} < baseline {reference['rps']:.1f}"
+            )
+    return regressions
+
+
+def print_report(report: Dict):
+    header = f"{'route':<38}{'count':>8}{'err':>6}{'rps':>9}"
+    header += "".join(f"{f'p{pct}(ms)':>10}" for pct in PERCENTILES)
+    print(header)
+    for route, stats in report.items():
+        line = f"{route:<38}{stats['count']:>8}{stats['errors']:>6}{stats['rps']:>9.1f}"
+        line += "".join(f"{stats[f'p{pct}_ms']:>10.1f}" for pct in PERCENTILES)
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--products", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    report = asyncio.run(run(args.users, args.duration, args.products))
+    print_report(report)
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2, sort_keys=True))
+        print(f"Baseline written to {args.baseline}")
+        return
+    if not args.baseline.exists():
+        print("No baseline stored; run with --save-baseline to create one.")
+        return
+    regressions = compare(report, json.loads(args.baseline.read_text()), args.tolerance)
+    if regressions:
+        print("Regressions:")
+        print("\n".join(f"  {line}" for line in regressions))
+        sys.exit(1)
+    print(f"No regressions beyond {args.tolerance:.0%}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Per-request overhead of the rate limiter.
+
+Measures `RateLimiter.hit` against the configured Redis and the in-process
+fallback, plus the full middleware around a no-op ASGI app. Exits 1 if the
+mean overhead of any path is above the budget (1ms by default).
+
+    python -m benchmarks.ratelimit --requests 20000
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from typing import Awaitable, Callable, List
+
+from app.core.ratelimit import Budget, LocalBuckets, RateLimiter, RateLimitMiddleware
+from app.db.redis import redis_client
+
+ROUTE = "POST /v1/users/login"
+
+
+async def measure(call: Callable[[int], Awaitable], requests: int) -> List[float]:
+    samples = []
+    for index in range(requests):
+        started = time.perf_counter()
+        await call(index)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def noop_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def run(requests: int, clients: int) -> dict:
+    budget = Budget(1_000_000, 60)
+    limiter = RateLimiter(redis_client)
+    local = LocalBuckets()
+    await redis_client.ping()
+
+    middleware = RateLimitMiddleware(noop_app, redis_client)
+    middleware.budgets = {ROUTE: budget}
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    def scope(index: int) -> dict:
+        return {
+            "type": "http",
+            "method": "POST",
+            "path": "/v1/users/login",
+            "headers": [],
+            "client": (f"10.0.{index % clients // 256}.{index % 256}", 0),
+        }
+
+    async def via_redis(index):
+        await limiter.hit(f"bench:{index % clients}", budget)
+
+    async def via_local(index):
+        local.hit(f"bench:{index % clients}", budget)
+
+    async def via_middleware(index):
+        await middleware(scope(index), receive, send)
+
+    results = {
+        "redis": await measure(via_redis, requests),
+        "local fallback": await measure(via_local, requests),
+        "middleware (redis)": await measure(via_middleware, requests),
+    }
+    await redis_client.aclose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=10_000)
+    parser.add_argument("--clients", type=int, default=1_000)
+    parser.add_argument("--budget-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.requests, args.clients))
+    failed = False
+    for name, samples in results.items():
+        samples.sort()
+        mean = statistics.fmean(samples) * 1000
+        p99 = samples[int(len(samples) * 0.99) - 1] * 1000
+        print(f"{name:<20} mean {mean:.3f}ms  p99 {p99:.3f}ms")
+        failed |= mean > args.budget_ms
+    if failed:
+        print(f"Mean overhead above {args.budget_ms}ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
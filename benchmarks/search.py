@@ -0,0 +1,122 @@
+"""Latency of `search_products` as the catalog grows.
+
+Grows a synthetic catalog through the given sizes (loaded with `COPY`) and
+runs random one- to three-word queries at each size, the last word truncated
+to exercise prefix matching. Rows are tagged and removed afterwards unless
+`--keep` is given.
+
+    python -m benchmarks.search --sizes 10000 100000 1000000
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import datetime
+
+import asyncpg
+
+from app.core.config import settings
+from app.db.session import SessionLocal, engine
+from app.db.utils import create_db_and_tables
+from app.repository import search_products
+from benchmarks.seed import chunked, uuid7_at
+
+TAG = "search-bench"
+WORDS = (
+    "organic cotton linen wool denim leather steel bamboo ceramic glass walnut "
+    "oak marble copper velvet silk canvas rubber vintage modern classic rustic "
+    "compact portable wireless smart ergonomic waterproof insulated foldable "
+    "shirt jacket sneaker backpack wallet lamp chair table kettle mug bottle "
+    "blanket pillow speaker headphones keyboard charger notebook pen watch "
+    "sunglasses umbrella tent stove knife pan candle vase mirror rug basket"
+).split()
+
+
+def product_rows(rng: random.Random, count: int):
+    now = datetime(2024, 1, 1)
+    for _ in range(count):
+        name = " ".join(rng.choices(WORDS, k=3))
+        description = f"{TAG} " + " ".join(rng.choices(WORDS, k=12))
+        yield (uuid7_at(now, rng), now, now, name, 10.0, description)
+
+
+def random_query(rng: random.Random) -> str:
+    words = rng.choices(WORDS, k=rng.randint(1, 3))
+    words[-1] = words[-1][: rng.randint(2, len(words[-1]))]
+    return " ".join(words)
+
+
+async def measure(rng: random.Random, queries: int, pages: int):
+    samples = []
+    async with SessionLocal() as session:
+        for _ in range(queries):
+            text, cursor = random_query(rng), None
+            for _ in range(pages):
+                started = time.perf_counter()
+                _, cursor = await search_products(
+                    session=session, text=text, limit=20, cursor=cursor
+                )
+                samples.append(time.perf_counter() - started)
+                if cursor is None:
+                    break
+    samples.sort()
+    return samples
+
+
+async def run(args):
+    await create_db_and_tables(engine)
+    rng = random.Random(args.seed)
+    dsn = settings.DATABASE_URI.replace("postgresql+asyncpg", "postgresql")
+    conn = await asyncpg.connect(dsn)
+    loaded = 0
+    try:
+        for size in sorted(args.sizes):
+            rows = product_rows(rng, size - loaded)
+            for chunk in chunked(rows):
+                await conn.copy_records_to_table(
+                    "products",
+                    records=chunk,
+                    columns=[
+                        "id",
+                        "created_at",
+                        "updated_at",
+                        "name",
+                        "base_price",
+                        "description",
+                    ],
+                )
+            loaded = size
+            await conn.execute("ANALYZE products")
+
+            samples = await measure(rng, args.queries, args.pages)
+            print(
+                f"{size:>9} products: p50 "
+                f"{statistics.median(samples) * 1000:.2f}ms  p95 "
+                f"{samples[int(len(samples) * 0.95) - 1] * 1000:.2f}ms  p99 "
+                f"{samples[int(len(samples) * 0.99) - 1] * 1000:.2f}ms"
+            )
+    finally:
+        if not args.keep:
+            await conn.execute(
+                "DELETE FROM products WHERE description LIKE $1", f"{TAG} %"
+            )
+        await conn.close()
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--pages", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--keep", action="store_true")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
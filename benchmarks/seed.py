@@ -0,0 +1,292 @@
+"""Deterministic synthetic dataset for benchmarking.
+
+Generates groups, users, products, orders and order_products with realistic
+shapes (Zipf product popularity, skewed group membership and discounts, order
+volume growing over time) and loads them with Postgres `COPY` through asyncpg.
+The same `--seed` always produces the same rows, ids included.
+
+    python -m benchmarks.seed --users 1000000 --products 200000 --orders 5000000
+"""
+
+import argparse
+import asyncio
+import bisect
+import itertools
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, List, Sequence, Tuple
+from uuid import UUID
+
+import asyncpg
+
+from app.api.enums import FulfillStatus, ShippingMethod
+from app.core.config import settings
+from app.core.security import get_hashed_password
+from app.db.utils import create_db_and_tables
+from app.db.session import engine
+
+CHUNK_SIZE = 100_000
+GROUPS = [
+    ("starter", 0.0, 60),
+    ("member", 0.05, 25),
+    ("professional", 0.1, 10),
+    ("vip", 0.2, 4),
+    ("partner", 0.35, 1),
+]  # name, discount_percent, relative weight of users
+
+
+def uuid7_at(moment: datetime, rng: random.Random) -> UUID:
+    """Time-ordered uuid7 whose random bits come from `rng`."""
+    unix_ms = int(moment.replace(tzinfo=timezone.utc).timestamp() * 1000) & (
+        (1 << 48) - 1
+    )
+    value = unix_ms << 80
+    value |= 0x7 << 76
+    value |= rng.getrandbits(12) << 64
+    value |= 0b10 << 62
+    value |= rng.getrandbits(62)
+    return UUID(int=value)
+
+
+def chunked(rows: Iterator[Tuple], size: int = CHUNK_SIZE) -> Iterator[List[Tuple]]:
+    while True:
+        chunk = list(itertools.islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class Generator:
+    def __init__(self, seed: int, start: datetime, end: datetime):
+        self.rng = random.Random(seed)
+        self.start = start
+        self.end = end
+        self.span = (end - start).total_seconds()
+        self.group_ids: List[UUID] = []
+        self.user_ids: List[UUID] = []
+        self.user_discounts: List[float] = []
+        self.product_ids: List[UUID] = []
+        self.product_prices: List[float] = []
+        self.popularity: List[float] = []
+
+    def moment(self, growth: bool = False) -> datetime:
+        """Random timestamp in range; with `growth`, later times are likelier."""
+        u = self.rng.random()
+        return self.start + timedelta(seconds=self.span * (u**0.5 if growth else u))
+
+    def groups(self) -> Iterator[Tuple]:
+        for name, discount, _ in GROUPS:
+            created = self.start
+            group_id = uuid7_at(created, self.rng)
+            self.group_ids.append(group_id)
+            yield (group_id, created, created, f"seed-{name}", discount)
+
+    def users(self, count: int, password: str) -> Iterator[Tuple]:
+        weights = [weight for *_, weight in GROUPS]
+        for index in range(count):
+            created = self.moment()
+            user_id = uuid7_at(created, self.rng)
+            group = self.rng.choices(range(len(GROUPS)), weights=weights)[0]
+            self.user_ids.append(user_id)
+            self.user_discounts.append(GROUPS[group][1])
+            yield (
+                user_id,
+                created,
+                created,
+                f"User {index}",
+                f"555-{index % 10_000_000:07d}",
+                f"{self.rng.randint(1, 9999)} Synthetic St",
+                f"user{index}@seed.example.com",
+                index == 0,
+                self.group_ids[group],
+                password,
+            )
+
+    def products(self, count: int, zipf_s: float) -> Iterator[Tuple]:
+        ranks = list(range(1, count + 1))
+        self.rng.shuffle(ranks)
+        total = 0.0
+        for index, rank in enumerate(ranks):
+            created = self.moment()
+            product_id = uuid7_at(created, self.rng)
+            price = round(self.rng.lognormvariate(3.5, 1.0), 2)
+            total += 1 / rank**zipf_s
+            self.product_ids.append(product_id)
+            self.product_prices.append(price)
+            self.popularity.append(total)
+            yield (
+                product_id,
+                created,
+                created,
+                f"Product {index}",
+                price,
+                f"Synthetic product {index}",
+            )
+
+    def pick_products(self, lines: int) -> Sequence[int]:
+        total = self.popularity[-1]
+        picked = set()
+        while len(picked) < lines:
+            picked.add(bisect.bisect_left(self.popularity, self.rng.random() * total))
+        return picked
+
+    def orders(self, count: int) -> Iterator[Tuple[Tuple, List[Tuple]]]:
+        max_lines = min(8, len(self.product_ids))
+        for _ in range(count):
+            created = self.moment(growth=True)
+            order_id = uuid7_at(created, self.rng)
+            user = self.rng.randrange(len(self.user_ids))
+            lines, subtotal = [], 0.0
+            n_lines = min(max_lines, int(self.rng.expovariate(0.6)) + 1)
+            for product in self.pick_products(n_lines):
+                quantity = min(20, int(self.rng.expovariate(0.7)) + 1)
+                subtotal += self.product_prices[product] * quantity
+                lines.append((order_id, self.product_ids[product], quantity, created))
+            fulfilled = (
+                self.end - created > timedelta(days=2) and self.rng.random() < 0.9
+            )
+            method = self.rng.choices(
+                [ShippingMethod.freeship.value, ShippingMethod.pickup.value],
+                weights=[7, 3],
+            )[0]
+            order = (
+                order_id,
+                created,
+                created,
+                method,
+                f"{self.rng.randint(1, 9999)} Synthetic St",
+                round(subtotal * (1 - self.user_discounts[user]), 2),
+                self.user_ids[user],
+                (
+                    FulfillStatus.fulfilled if fulfilled else FulfillStatus.unfulfilled
+                ).value,
+                (
+                    created + timedelta(hours=self.rng.uniform(1, 48))
+                    if fulfilled
+                    else None
+                ),
+                self.rng.random() < 0.05,
+            )
+            yield order, lines
+
+
+async def copy(conn: asyncpg.Connection, table: str, columns: List[str], rows) -> int:
+    total = 0
+    for chunk in chunked(iter(rows)):
+        await conn.copy_records_to_table(table, records=chunk, columns=columns)
+        total += len(chunk)
+    return total
+
+
+async def seed(args):
+    await create_db_and_tables(engine)
+    await engine.dispose()
+
+    generator = Generator(args.seed, args.start, args.end)
+    dsn = settings.DATABASE_URI.replace("postgresql+asyncpg", "postgresql")
+    conn = await asyncpg.connect(dsn)
+    try:
+        if args.truncate:
+            await conn.execute(
+                "TRUNCATE order_products, orders, products, users, groups CASCADE"
+            )
+        #   Partitioned orders (migration 0006) need the seeded months to exist
+        if await conn.fetchval("SELECT to_regproc('create_order_partitions')"):
+            await conn.execute(
+                "SELECT create_order_partitions($1, $2)",
+                args.start.date(),
+                args.end.date(),
+            )
+        started = time.perf_counter()
+        timestamps = ["id", "created_at", "updated_at"]
+
+        async with conn.transaction():
+            count = await copy(
+                conn,
+                "groups",
+                timestamps + ["name", "discount_percent"],
+                generator.groups(),
+            )
+            print(f"groups: {count}")
+
+            password = get_hashed_password("password")
+            count = await copy(
+                conn,
+                "users",
+                timestamps
+                + [
+                    "name",
+                    "phone",
+                    "address",
+                    "email",
+                    "is_admin",
+                    "group_id",
+                    "password",
+                ],
+                generator.users(args.users, password),
+            )
+            print(f"users: {count}")
+
+            count = await copy(
+                conn,
+                "products",
+                timestamps + ["name", "base_price", "description"],
+                generator.products(args.products, args.zipf),
+            )
+            print(f"products: {count}")
+
+            order_columns = timestamps + [
+                "shipping_method",
+                "shipping_location",
+                "total_price",
+                "user_id",
+                "fulfill_status",
+                "fulfill_at",
+                "from_admin",
+            ]
+            orders = lines = 0
+            for chunk in chunked(generator.orders(args.orders)):
+                await conn.copy_records_to_table(
+                    "orders",
+                    records=[order for order, _ in chunk],
+                    columns=order_columns,
+                )
+                line_rows = [line for _, order_lines in chunk for line in order_lines]
+                await conn.copy_records_to_table(
+                    "order_products",
+                    records=line_rows,
+                    columns=["order_id", "product_id", "quantity", "order_created_at"],
+                )
+                orders += len(chunk)
+                lines += len(line_rows)
+                print(f"orders: {orders}, order_products: {lines}", end="\r")
+            print()
+
+        await conn.execute("ANALYZE groups, users, products, orders, order_products")
+        print(f"Done in {time.perf_counter() - started:.1f}s")
+    finally:
+        await conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--products", type=int, default=20_000)
+    parser.add_argument("--orders", type=int, default=500_000)
+    parser.add_argument("--zipf", type=float, default=1.1, help="popularity skew")
+    parser.add_argument(
+        "--start", type=datetime.fromisoformat, default=datetime(2022, 1, 1)
+    )
+    parser.add_argument(
+        "--end", type=datetime.fromisoformat, default=datetime(2024, 1, 1)
+    )
+    parser.add_argument(
+        "--truncate", action="store_true", help="empty the tables before loading"
+    )
+    asyncio.run(seed(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
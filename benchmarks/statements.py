@@ -0,0 +1,95 @@
+"""Per-call overhead of BaseRepository's keyword filters with and without the statement cache.
+
+First times statement preparation alone (building the statement and deriving
+its cache key, which SQLAlchemy's compiled cache is looked up by), then whole
+`get_by_item`, `count_by` and `check_exist` calls against the database, each
+with `STATEMENT_CACHE_ENABLED` off and on.
+
+    python -m benchmarks.statements --calls 20000
+"""
+
+import argparse
+import asyncio
+import time
+from uuid import uuid4
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db.session import SessionLocal, engine
+from app.db.utils import create_db_and_tables
+from app.models import User
+from app.repository import BaseRepository
+from app.repository.statements import filter_statement
+
+
+def prepare_plain(email: str):
+    select(User).filter_by(email=email)._generate_cache_key()
+
+
+def prepare_cached(email: str):
+    statement, _ = filter_statement(User, "select", {"email": email})
+    statement._generate_cache_key()
+
+
+def report(name: str, cached: bool, elapsed: float, calls: int):
+    label = "cached" if cached else "plain"
+    print(f"{name:<14} {label:<7} {elapsed / calls * 1e6:>9.1f} us/call")
+
+
+def time_prepare(args):
+    for cached, prepare in ((False, prepare_plain), (True, prepare_cached)):
+        settings.STATEMENT_CACHE_ENABLED = cached
+        started = time.perf_counter()
+        for i in range(args.calls):
+            prepare(f"user{i}@example.com")
+        report("prepare", cached, time.perf_counter() - started, args.calls)
+
+
+async def time_queries(args):
+    await create_db_and_tables(engine)
+    repository = BaseRepository(User)
+    async with SessionLocal() as session:
+        user = await repository.create(
+            session=session,
+            name="statements-bench",
+            phone="0",
+            address="-",
+            email=f"statements-{uuid4().hex[:8]}@example.com",
+            password="-",
+        )
+        calls = {
+            "get_by_item": lambda: repository.get_by_item(session, email=user.email),
+            "count_by": lambda: repository.count_by(session, email=user.email),
+            "check_exist": lambda: repository.check_exist(session, email=user.email),
+        }
+        for name, call in calls.items():
+            for cached in (False, True):
+                settings.STATEMENT_CACHE_ENABLED = cached
+                for _ in range(args.warmup):
+                    await call()
+                started = time.perf_counter()
+                for _ in range(args.calls):
+                    await call()
+                report(name, cached, time.perf_counter() - started, args.calls)
+        await repository.delete(session, user)
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--warmup", type=int, default=500)
+    parser.add_argument(
+        "--prepare-only", action="store_true", help="skip the database round trips"
+    )
+    args = parser.parse_args()
+    #   Measure the statements, not the sharing of identical reads
+    settings.SINGLE_FLIGHT_ENABLED = False
+    time_prepare(args)
+    if not args.prepare_only:
+        asyncio.run(time_queries(args))
+
+
+if __name__ == "__main__":
+    main()
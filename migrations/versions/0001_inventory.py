@@ -0,0 +1,68 @@
+"""inventory tracking
+
+Revision ID: 0001_inventory
+Revises:
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlmodel
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0001_inventory"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    #   Tables may already exist from create_all() on startup, so stay idempotent
+    op.execute("ALTER TABLE products ADD COLUMN IF NOT EXISTS stock INTEGER")
+    op.execute(
+        "ALTER TABLE products ADD COLUMN IF NOT EXISTS "
+        "stock_sharded BOOLEAN NOT NULL DEFAULT false"
+    )
+    #   Tables made by create_all before the model declared the default
+    op.execute("ALTER TABLE products ALTER COLUMN stock_sharded SET DEFAULT false")
+    op.execute("""
+        DO $$ BEGIN
+            ALTER TABLE products
+                ADD CONSTRAINT ck_products_stock CHECK (stock >= 0);
+        EXCEPTION WHEN duplicate_object THEN NULL;
+        END $$
+        """)
+    op.execute(
+        "ALTER TABLE orders ADD COLUMN IF NOT EXISTS "
+        "store_id UUID REFERENCES stores (id)"
+    )
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS store_stocks (
+            store_id UUID NOT NULL REFERENCES stores (id),
+            product_id UUID NOT NULL REFERENCES products (id),
+            quantity INTEGER NOT NULL,
+            PRIMARY KEY (store_id, product_id),
+            CONSTRAINT ck_store_stocks_quantity CHECK (quantity >= 0)
+        )
+        """)
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS product_stock_shards (
+            product_id UUID NOT NULL REFERENCES products (id),
+            shard INTEGER NOT NULL,
+            quantity INTEGER NOT NULL,
+            PRIMARY KEY (product_id, shard),
+            CONSTRAINT ck_product_stock_shards_quantity CHECK (quantity >= 0)
+        )
+        """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS product_stock_shards")
+    op.execute("DROP TABLE IF EXISTS store_stocks")
+    op.execute("ALTER TABLE orders DROP COLUMN IF EXISTS store_id")
+    op.execute("ALTER TABLE products DROP CONSTRAINT IF EXISTS ck_products_stock")
+    op.execute("ALTER TABLE products DROP COLUMN IF EXISTS stock_sharded")
+    op.execute("ALTER TABLE products DROP COLUMN IF EXISTS stock")
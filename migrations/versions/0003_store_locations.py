@@ -0,0 +1,47 @@
+"""store locations
+
+Revision ID: 0003_store_locations
+Revises: 0002_product_search
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlmodel
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0003_store_locations"
+down_revision: Union[str, None] = "0002_product_search"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS postgis")
+    op.execute("ALTER TABLE stores ADD COLUMN IF NOT EXISTS latitude FLOAT")
+    op.execute("ALTER TABLE stores ADD COLUMN IF NOT EXISTS longitude FLOAT")
+    #   Derived from latitude/longitude so the ORM never has to write geography
+    op.execute("""
+        ALTER TABLE stores ADD COLUMN IF NOT EXISTS location geography(Point, 4326)
+        GENERATED ALWAYS AS (
+            CASE WHEN latitude IS NOT NULL AND longitude IS NOT NULL
+                THEN ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)::geography
+            END
+        ) STORED
+        """)
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_stores_location "
+        "ON stores USING gist (location)"
+    )
+    op.execute("CREATE INDEX IF NOT EXISTS ix_stores_address ON stores (address)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_stores_address")
+    op.execute("DROP INDEX IF EXISTS ix_stores_location")
+    op.execute("ALTER TABLE stores DROP COLUMN IF EXISTS location")
+    op.execute("ALTER TABLE stores DROP COLUMN IF EXISTS longitude")
+    op.execute("ALTER TABLE stores DROP COLUMN IF EXISTS latitude")
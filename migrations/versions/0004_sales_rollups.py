@@ -0,0 +1,65 @@
+"""sales rollups
+
+Revision ID: 0004_sales_rollups
+Revises: 0003_store_locations
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlmodel
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0004_sales_rollups"
+down_revision: Union[str, None] = "0003_store_locations"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS sales_daily (
+            day DATE PRIMARY KEY,
+            orders INTEGER NOT NULL,
+            items INTEGER NOT NULL,
+            revenue FLOAT NOT NULL
+        )
+        """)
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS sales_daily_products (
+            day DATE NOT NULL,
+            product_id UUID NOT NULL,
+            orders INTEGER NOT NULL,
+            quantity INTEGER NOT NULL,
+            revenue FLOAT NOT NULL,
+            PRIMARY KEY (day, product_id)
+        )
+        """)
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS sales_daily_groups (
+            day DATE NOT NULL,
+            group_id UUID NOT NULL,
+            orders INTEGER NOT NULL,
+            revenue FLOAT NOT NULL,
+            PRIMARY KEY (day, group_id)
+        )
+        """)
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS rollup_state (
+            name VARCHAR PRIMARY KEY,
+            high_water TIMESTAMP WITHOUT TIME ZONE NOT NULL
+        )
+        """)
+    #   The incremental refresh scans orders by created_at
+    op.execute("CREATE INDEX IF NOT EXISTS ix_orders_created_at ON orders (created_at)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_orders_created_at")
+    op.execute("DROP TABLE IF EXISTS rollup_state")
+    op.execute("DROP TABLE IF EXISTS sales_daily_groups")
+    op.execute("DROP TABLE IF EXISTS sales_daily_products")
+    op.execute("DROP TABLE IF EXISTS sales_daily")
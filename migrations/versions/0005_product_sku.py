@@ -0,0 +1,32 @@
+"""product sku
+
+Revision ID: 0005_product_sku
+Revises: 0004_sales_rollups
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlmodel
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0005_product_sku"
+down_revision: Union[str, None] = "0004_sales_rollups"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE products ADD COLUMN IF NOT EXISTS sku VARCHAR")
+    op.execute("CREATE UNIQUE INDEX IF NOT EXISTS ix_products_sku ON products (sku)")
+    #   Catalog imports match rows without a SKU by product name
+    op.execute("CREATE INDEX IF NOT EXISTS ix_products_name ON products (name)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_products_name")
+    op.execute("DROP INDEX IF EXISTS ix_products_sku")
+    op.execute("ALTER TABLE products DROP COLUMN IF EXISTS sku")
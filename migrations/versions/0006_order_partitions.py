@@ -0,0 +1,225 @@
+"""order partitions
+
+Revision ID: 0006_order_partitions
+Revises: 0005_product_sku
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlmodel
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0006_order_partitions"
+down_revision: Union[str, None] = "0005_product_sku"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+#   Monthly partitions are named orders_y2026m10 / order_products_y2026m10.
+#   Creating a month that exists is a no-op, so the beat task can call this daily.
+CREATE_PARTITIONS = """
+    CREATE OR REPLACE FUNCTION create_order_partitions(first_month date, last_month date)
+    RETURNS integer LANGUAGE plpgsql AS $$
+    DECLARE
+        month date := date_trunc('month', first_month);
+        suffix text;
+        created integer := 0;
+    BEGIN
+        WHILE month <= last_month LOOP
+            suffix := to_char(month, '"y"YYYY"m"MM');
+            IF to_regclass('orders_' || suffix) IS NULL THEN
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF orders FOR VALUES FROM (%L) TO (%L)',
+                    'orders_' || suffix, month, month + interval '1 month'
+                );
+                created := created + 1;
+            END IF;
+            IF to_regclass('order_products_' || suffix) IS NULL THEN
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF order_products '
+                    'FOR VALUES FROM (%L) TO (%L)',
+                    'order_products_' || suffix, month, month + interval '1 month'
+                );
+            END IF;
+            month := month + interval '1 month';
+        END LOOP;
+        RETURN created;
+    END $$
+    """
+
+#   Detach one month from both tables and move it to `archive_schema`, where it
+#   can be dumped and dropped. The line items are detached first and lose their
+#   foreign key to the partitioned orders table, which would otherwise block
+#   detaching the orders; they get one to the archived orders instead.
+ARCHIVE_PARTITION = """
+    CREATE OR REPLACE FUNCTION archive_order_partition(
+        month date, archive_schema text DEFAULT 'archive'
+    )
+    RETURNS boolean LANGUAGE plpgsql AS $$
+    DECLARE
+        suffix text := to_char(date_trunc('month', month), '"y"YYYY"m"MM');
+        orders_part regclass := to_regclass('orders_' || suffix);
+        lines_part regclass := to_regclass('order_products_' || suffix);
+        fkey record;
+    BEGIN
+        IF orders_part IS NULL THEN
+            RETURN false;
+        END IF;
+        EXECUTE format('CREATE SCHEMA IF NOT EXISTS %I', archive_schema);
+        IF lines_part IS NOT NULL THEN
+            EXECUTE format('ALTER TABLE order_products DETACH PARTITION %s', lines_part);
+            FOR fkey IN
+                SELECT conname FROM pg_constraint
+                WHERE conrelid = lines_part AND confrelid = 'orders'::regclass
+            LOOP
+                EXECUTE format(
+                    'ALTER TABLE %s DROP CONSTRAINT %I', lines_part, fkey.conname
+                );
+            END LOOP;
+        END IF;
+        EXECUTE format('ALTER TABLE orders DETACH PARTITION %s', orders_part);
+        EXECUTE format('ALTER TABLE %s SET SCHEMA %I', orders_part, archive_schema);
+        IF lines_part IS NOT NULL THEN
+            EXECUTE format('ALTER TABLE %s SET SCHEMA %I', lines_part, archive_schema);
+            EXECUTE format(
+                'ALTER TABLE %I.%I ADD FOREIGN KEY (order_id, order_created_at) '
+                'REFERENCES %I.%I (id, created_at)',
+                archive_schema, 'order_products_' || suffix,
+                archive_schema, 'orders_' || suffix
+            );
+        END IF;
+        RETURN true;
+    END $$
+    """
+
+ORDER_COLUMNS = (
+    "id, created_at, updated_at, shipping_method, shipping_location, total_price, "
+    "user_id, fulfill_status, fulfill_at, from_admin, store_id"
+)
+
+
+def is_partitioned() -> bool:
+    return bool(
+        op.get_bind().scalar(
+            sa.text(
+                "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table "
+                "WHERE partrelid = to_regclass('orders'))"
+            )
+        )
+    )
+
+
+def add_constraints() -> None:
+    op.execute("ALTER TABLE orders ADD PRIMARY KEY (id, created_at)")
+    op.execute("CREATE INDEX ix_orders_id ON orders (id)")
+    op.execute("CREATE INDEX ix_orders_created_at ON orders (created_at)")
+    op.execute("ALTER TABLE orders ADD FOREIGN KEY (user_id) REFERENCES users (id)")
+    op.execute("ALTER TABLE orders ADD FOREIGN KEY (store_id) REFERENCES stores (id)")
+    op.execute(
+        "ALTER TABLE order_products ADD PRIMARY KEY "
+        "(order_id, product_id, order_created_at)"
+    )
+    op.execute(
+        "ALTER TABLE order_products ADD FOREIGN KEY (order_id, order_created_at) "
+        "REFERENCES orders (id, created_at)"
+    )
+    op.execute(
+        "ALTER TABLE order_products ADD FOREIGN KEY (product_id) "
+        "REFERENCES products (id)"
+    )
+
+
+def upgrade() -> None:
+    op.execute(
+        "ALTER TABLE order_products ADD COLUMN IF NOT EXISTS order_created_at TIMESTAMP"
+    )
+    if not is_partitioned():
+        #   Rebuild both tables as partitioned copies, in this one transaction.
+        #   Line items carry their order's created_at so they partition alike.
+        op.execute("""
+            UPDATE order_products AS op SET order_created_at = o.created_at
+            FROM orders AS o
+            WHERE o.id = op.order_id AND op.order_created_at IS NULL
+            """)
+        op.execute("ALTER TABLE order_products RENAME TO order_products_unpartitioned")
+        op.execute("ALTER TABLE orders RENAME TO orders_unpartitioned")
+        op.execute("""
+            CREATE TABLE orders (LIKE orders_unpartitioned INCLUDING DEFAULTS)
+            PARTITION BY RANGE (created_at)
+            """)
+        op.execute("""
+            CREATE TABLE order_products (
+                LIKE order_products_unpartitioned INCLUDING DEFAULTS
+            ) PARTITION BY RANGE (order_created_at)
+            """)
+        op.execute(
+            "ALTER TABLE order_products ALTER COLUMN order_created_at SET NOT NULL"
+        )
+        op.execute(CREATE_PARTITIONS)
+        op.execute("""
+            SELECT create_order_partitions(
+                coalesce(min(created_at), localtimestamp)::date,
+                (localtimestamp + interval '3 months')::date
+            ) FROM orders_unpartitioned
+            """)
+        op.execute(
+            f"INSERT INTO orders ({ORDER_COLUMNS}) "
+            f"SELECT {ORDER_COLUMNS} FROM orders_unpartitioned"
+        )
+        op.execute("""
+            INSERT INTO order_products (order_id, product_id, quantity, order_created_at)
+            SELECT order_id, product_id, quantity, order_created_at
+            FROM order_products_unpartitioned
+            """)
+        op.execute("DROP TABLE order_products_unpartitioned")
+        op.execute("DROP TABLE orders_unpartitioned")
+        add_constraints()
+    op.execute(CREATE_PARTITIONS)
+    op.execute(ARCHIVE_PARTITION)
+    op.execute("ANALYZE orders, order_products")
+
+
+def downgrade() -> None:
+    op.execute("DROP FUNCTION IF EXISTS archive_order_partition(date, text)")
+    if is_partitioned():
+        op.execute("ALTER TABLE order_products RENAME TO order_products_partitioned")
+        op.execute("ALTER TABLE orders RENAME TO orders_partitioned")
+        op.execute("CREATE TABLE orders (LIKE orders_partitioned INCLUDING DEFAULTS)")
+        op.execute(
+            f"INSERT INTO orders ({ORDER_COLUMNS}) "
+            f"SELECT {ORDER_COLUMNS} FROM orders_partitioned"
+        )
+        op.execute("""
+            CREATE TABLE order_products (
+                order_id UUID NOT NULL,
+                product_id UUID NOT NULL,
+                quantity INTEGER NOT NULL
+            )
+            """)
+        op.execute("""
+            INSERT INTO order_products (order_id, product_id, quantity)
+            SELECT order_id, product_id, quantity FROM order_products_partitioned
+            """)
+        #   Dropping the parents drops every attached partition with them
+        op.execute("DROP TABLE order_products_partitioned")
+        op.execute("DROP TABLE orders_partitioned")
+        op.execute("ALTER TABLE orders ADD PRIMARY KEY (id)")
+        op.execute("CREATE INDEX ix_orders_id ON orders (id)")
+        op.execute("CREATE INDEX ix_orders_created_at ON orders (created_at)")
+        op.execute("ALTER TABLE orders ADD FOREIGN KEY (user_id) REFERENCES users (id)")
+        op.execute(
+            "ALTER TABLE orders ADD FOREIGN KEY (store_id) REFERENCES stores (id)"
+        )
+        op.execute("ALTER TABLE order_products ADD PRIMARY KEY (order_id, product_id)")
+        op.execute(
+            "ALTER TABLE order_products ADD FOREIGN KEY (order_id) "
+            "REFERENCES orders (id)"
+        )
+        op.execute(
+            "ALTER TABLE order_products ADD FOREIGN KEY (product_id) "
+            "REFERENCES products (id)"
+        )
+    op.execute("DROP FUNCTION IF EXISTS create_order_partitions(date, date)")
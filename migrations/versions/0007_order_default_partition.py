@@ -0,0 +1,117 @@
+"""order default partition
+
+Revision ID: 0007_order_default_partition
+Revises: 0006_order_partitions
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlmodel
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0007_order_default_partition"
+down_revision: Union[str, None] = "0006_order_partitions"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+#   As in 0006, but a month created after its orders landed in the default
+#   partition takes them over: they are copied into a standalone table, removed
+#   from the default partition (line items first, for their foreign key) and the
+#   table is attached. Without a default partition this is 0006's function.
+CREATE_PARTITIONS = """
+    CREATE OR REPLACE FUNCTION create_order_partitions(first_month date, last_month date)
+    RETURNS integer LANGUAGE plpgsql AS $$
+    DECLARE
+        month date := date_trunc('month', first_month);
+        next_month date;
+        suffix text;
+        has_default boolean := to_regclass('orders_default') IS NOT NULL;
+        new_orders boolean;
+        new_lines boolean;
+        created integer := 0;
+    BEGIN
+        WHILE month <= last_month LOOP
+            suffix := to_char(month, '"y"YYYY"m"MM');
+            next_month := month + interval '1 month';
+            new_orders := to_regclass('orders_' || suffix) IS NULL;
+            new_lines := to_regclass('order_products_' || suffix) IS NULL;
+            IF new_orders THEN
+                EXECUTE format(
+                    'CREATE TABLE %I (LIKE orders INCLUDING DEFAULTS)',
+                    'orders_' || suffix
+                );
+                IF has_default THEN
+                    EXECUTE format(
+                        'INSERT INTO %I SELECT * FROM orders_default '
+                        'WHERE created_at >= %L AND created_at < %L',
+                        'orders_' || suffix, month, next_month
+                    );
+                END IF;
+                created := created + 1;
+            END IF;
+            IF new_lines THEN
+                EXECUTE format(
+                    'CREATE TABLE %I (LIKE order_products INCLUDING DEFAULTS)',
+                    'order_products_' || suffix
+                );
+                IF has_default THEN
+                    EXECUTE format(
+                        'INSERT INTO %I SELECT * FROM order_products_default '
+                        'WHERE order_created_at >= %L AND order_created_at < %L',
+                        'order_products_' || suffix, month, next_month
+                    );
+                    DELETE FROM order_products_default
+                    WHERE order_created_at >= month AND order_created_at < next_month;
+                END IF;
+            END IF;
+            IF new_orders AND has_default THEN
+                DELETE FROM orders_default
+                WHERE created_at >= month AND created_at < next_month;
+            END IF;
+            IF new_orders THEN
+                EXECUTE format(
+                    'ALTER TABLE orders ATTACH PARTITION %I '
+                    'FOR VALUES FROM (%L) TO (%L)',
+                    'orders_' || suffix, month, next_month
+                );
+            END IF;
+            IF new_lines THEN
+                EXECUTE format(
+                    'ALTER TABLE order_products ATTACH PARTITION %I '
+                    'FOR VALUES FROM (%L) TO (%L)',
+                    'order_products_' || suffix, month, next_month
+                );
+            END IF;
+            month := next_month;
+        END LOOP;
+        RETURN created;
+    END $$
+    """
+
+
+def upgrade() -> None:
+    #   Orders outside the created months (beat lagging, clock skew, restored
+    #   data) land here instead of failing; creating their month moves them out
+    op.execute("CREATE TABLE IF NOT EXISTS orders_default PARTITION OF orders DEFAULT")
+    op.execute(
+        "CREATE TABLE IF NOT EXISTS order_products_default "
+        "PARTITION OF order_products DEFAULT"
+    )
+    op.execute(CREATE_PARTITIONS)
+
+
+def downgrade() -> None:
+    #   Give the stray orders their months, then drop the empty default partitions
+    op.execute("""
+        SELECT create_order_partitions(min(created_at)::date, max(created_at)::date)
+        FROM orders_default HAVING count(*) > 0
+        """)
+    #   Detached first: the line items' foreign key references every partition
+    op.execute("ALTER TABLE order_products DETACH PARTITION order_products_default")
+    op.execute("ALTER TABLE orders DETACH PARTITION orders_default")
+    op.execute("DROP TABLE order_products_default")
+    op.execute("DROP TABLE orders_default")
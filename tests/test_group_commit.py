@@ -0,0 +1,119 @@
+import asyncio
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import func, select
+
+import app.db.batching
+from app.db.batching import GroupCommit
+from app.models import Order, OrderCreate, Product, User
+from app.models.order import OrderProductRequest
+from app.repository.order import PendingOrder, place_orders
+
+
+@pytest.fixture
+def batcher(session_factory, monkeypatch):
+    monkeypatch.setattr(app.db.batching, "SessionLocal", session_factory)
+    return GroupCommit(place_orders, window=0.05, size=10)
+
+
+@pytest.fixture
+async def customer(session):
+    user = User(name="customer", phone="0", address="-", email="c@example.com")
+    user.password = "-"
+    session.add(user)
+    await session.commit()
+    return user
+
+
+@pytest.fixture
+async def product(session):
+    product = Product(name="product", base_price=10, stock=5)
+    session.add(product)
+    await session.commit()
+    return product
+
+
+def pending(user_id, product, quantity):
+    data = OrderCreate(
+        shipping_method="freeship",
+        shipping_location="-",
+        total_price=10 * quantity,
+        items=[OrderProductRequest(product_id=product.id, quantity=quantity)],
+    )
+    return PendingOrder(user_id, False, data)
+
+
+async def submit_all(batcher, orders):
+    return await asyncio.gather(
+        *(batcher.submit(order) for order in orders), return_exceptions=True
+    )
+
+
+async def stored(session, product):
+    await session.refresh(product)
+    count = await session.scalar(select(func.count()).select_from(Order))
+    return count, product.stock
+
+
+async def test_out_of_stock_order_fails_alone(batcher, session, customer, product):
+    results = await submit_all(
+        batcher,
+        [
+            pending(customer.id, product, 2),
+            pending(customer.id, product, 10),
+            pending(customer.id, product, 3),
+        ],
+    )
+
+    assert isinstance(results[0], Order) and isinstance(results[2], Order)
+    assert isinstance(results[1], HTTPException)
+    assert results[1].status_code == 409
+    assert await stored(session, product) == (2, 0)
+
+
+async def test_failed_commit_is_retried_order_by_order(
+    batcher, session, customer, product
+):
+    #   Reserved fine, but its unknown customer breaks the batch's commit
+    results = await submit_all(
+        batcher,
+        [
+            pending(customer.id, product, 1),
+            pending(uuid4(), product, 1),
+            pending(customer.id, product, 1),
+        ],
+    )
+
+    assert isinstance(results[0], Order) and isinstance(results[2], Order)
+    assert isinstance(results[1], HTTPException)
+    assert results[1].status_code == 400
+    #   The failed order's reservation was rolled back with it
+    assert await stored(session, product) == (2, 3)
+
+
+async def test_cancelled_caller_still_gets_its_order_written(
+    batcher, session, customer, product
+):
+    waiting = asyncio.create_task(batcher.submit(pending(customer.id, product, 1)))
+    await asyncio.sleep(0)
+    #   The client goes away before the batch is written
+    waiting.cancel()
+    other = await submit_all(batcher, [pending(customer.id, product, 1)])
+    await batcher.drain()
+
+    assert waiting.cancelled()
+    assert isinstance(other[0], Order)
+    assert await stored(session, product) == (2, 3)
+
+
+async def test_writer_error_reaches_every_caller():
+    async def broken(session, items):
+        raise RuntimeError("database is gone")
+
+    batcher = GroupCommit(broken, window=0.01, size=10)
+
+    results = await submit_all(batcher, ["first", "second", "third"])
+
+    assert [type(result) for result in results] == [RuntimeError] * 3
@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from httpx import ASGITransport, AsyncClient
+
+from app.core.idempotency import IdempotencyMiddleware
+
+
+@pytest.fixture
+def calls():
+    return []
+
+
+@pytest.fixture
+async def client(redis, calls):
+    app = FastAPI()
+
+    @app.post("/v1/orders")
+    async def create_order(request: Request):
+        body = await request.json()
+        calls.append(body)
+        await asyncio.sleep(body.get("delay", 0))
+        return JSONResponse(
+            status_code=body.get("status", 201), content={"call": len(calls)}
+        )
+
+    app.add_middleware(IdempotencyMiddleware, redis=redis)
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+def post(client, body, key="key-1"):
+    return client.post("/v1/orders", json=body, headers={"Idempotency-Key": key})
+
+
+async def test_replays_stored_response(client, calls):
+    first = await post(client, {"total": 1})
+    second = await post(client, {"total": 1})
+
+    assert len(calls) == 1
+    assert second.status_code == first.status_code == 201
+    assert second.json() == first.json() == {"call": 1}
+    assert second.headers["idempotent-replayed"] == "true"
+    assert "idempotent-replayed" not in first.headers
+
+
+async def test_concurrent_duplicates_run_once(client, calls):
+    responses = await asyncio.gather(
+        *(post(client, {"total": 1, "delay": 0.1}) for _ in range(5))
+    )
+
+    assert len(calls) == 1
+    assert {response.json()["call"] for response in responses} == {1}
+
+
+async def test_key_reused_with_another_body_conflicts(client, calls):
+    await post(client, {"total": 1})
+    response = await post(client, {"total": 2})
+
+    assert response.status_code == 422
+    assert len(calls) == 1
+
+
+async def test_server_errors_are_not_stored(client, calls):
+    first = await post(client, {"total": 1, "status": 500})
+    second = await post(client, {"total": 1, "status": 500})
+
+    assert first.status_code == second.status_code == 500
+    assert len(calls) == 2
+
+
+async def test_other_keys_and_requests_without_one_run(client, calls):
+    await post(client, {"total": 1}, key="key-1")
+    await post(client, {"total": 1}, key="key-2")
+    await client.post("/v1/orders", json={"total": 1})
+    await client.post("/v1/orders", json={"total": 1})
+
+    assert len(calls) == 4
@@ -0,0 +1,103 @@
+import asyncio
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import func, select, text
+
+from app.models import Product, ProductStockShard
+from app.repository.inventory import reserve_stock, set_stock
+
+
+def item(product, quantity):
+    return SimpleNamespace(product_id=product.id, quantity=quantity)
+
+
+async def add_product(session, stock=None):
+    product = Product(name=f"product-{uuid4().hex[:8]}", base_price=10, stock=stock)
+    session.add(product)
+    await session.commit()
+    return product
+
+
+async def shard_quantities(session, product):
+    result = await session.execute(
+        select(ProductStockShard.quantity)
+        .where(ProductStockShard.product_id == product.id)
+        .order_by(ProductStockShard.shard)
+    )
+    return list(result.scalars())
+
+
+@pytest.fixture
+async def sharded(session):
+    product = await add_product(session)
+    await set_stock(session, product_id=product.id, quantity=12, shards=3)
+    return product
+
+
+async def test_reserves_from_one_shard(session, sharded):
+    await reserve_stock(session, items=[item(sharded, 3)])
+    await session.commit()
+
+    quantities = await shard_quantities(session, sharded)
+    assert sorted(quantities) == [1, 4, 4]
+
+
+async def test_spreads_order_larger_than_any_shard(session, sharded):
+    await reserve_stock(session, items=[item(sharded, 10)])
+    await session.commit()
+
+    assert sum(await shard_quantities(session, sharded)) == 2
+
+
+async def test_spread_waits_for_locked_shards(session_factory, session, sharded):
+    async with session_factory() as other:
+        await other.execute(
+            text(
+                "SELECT shard FROM product_stock_shards "
+                "WHERE product_id = :product_id FOR UPDATE"
+            ),
+            {"product_id": sharded.id},
+        )
+        reserving = asyncio.create_task(
+            reserve_stock(session, items=[item(sharded, 2)])
+        )
+        await asyncio.sleep(0.2)
+        #   Every shard is taken: no 409, the order queues for the locks
+        assert not reserving.done()
+        await other.commit()
+    await reserving
+    await session.commit()
+
+    assert sum(await shard_quantities(session, sharded)) == 10
+
+
+async def test_out_of_stock_takes_nothing(session, sharded):
+    with pytest.raises(HTTPException) as error:
+        await reserve_stock(session, items=[item(sharded, 13)])
+
+    assert error.value.status_code == 409
+    #   Rolled back, so nothing was taken and the product must be reloaded
+    await session.refresh(sharded)
+    assert await shard_quantities(session, sharded) == [4, 4, 4]
+
+
+async def test_unsharded_and_unknown_products(session):
+    product = await add_product(session, stock=5)
+
+    await reserve_stock(session, items=[item(product, 2), item(product, 3)])
+    await session.commit()
+    await session.refresh(product)
+    assert product.stock == 0
+
+    with pytest.raises(HTTPException) as error:
+        await reserve_stock(session, items=[item(product, 1)])
+    assert error.value.status_code == 409
+
+    with pytest.raises(HTTPException) as error:
+        await reserve_stock(
+            session, items=[SimpleNamespace(product_id=uuid4(), quantity=1)]
+        )
+    assert error.value.status_code == 404
@@ -0,0 +1,106 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import text
+
+from app.models import Order, OrderProduct, Product, User
+from app.repository.order import get_list_order, get_user_order
+from app.repository.partitions import list_order_partitions
+
+MARCH = datetime(2025, 3, 14, 9, 30)
+APRIL = datetime(2025, 4, 2, 18, 0)
+
+
+@pytest.fixture
+async def partitioned(session):
+    #   March has its own partitions; April only the default ones
+    for table in ("orders", "order_products"):
+        await session.execute(
+            text(
+                f"CREATE TABLE {table}_y2025m03 PARTITION OF {table} "
+                "FOR VALUES FROM ('2025-03-01') TO ('2025-04-01')"
+            )
+        )
+    await session.commit()
+
+
+@pytest.fixture
+async def customer(session):
+    user = User(name="customer", phone="0", address="-", email="c@example.com")
+    user.password = "-"
+    session.add(user)
+    await session.commit()
+    return user
+
+
+@pytest.fixture
+async def products(session):
+    items = [Product(name=f"product-{i}", base_price=10) for i in range(2)]
+    session.add_all(items)
+    await session.commit()
+    return items
+
+
+async def add_order(session, user, products, created_at, quantities):
+    order = Order(
+        user_id=user.id,
+        total_price=10,
+        shipping_method="freeship",
+        shipping_location="-",
+        from_admin=False,
+        created_at=created_at,
+    )
+    session.add(order)
+    session.add_all(
+        OrderProduct(
+            order_id=order.id,
+            order_created_at=order.created_at,
+            product_id=product.id,
+            quantity=quantity,
+        )
+        for product, quantity in zip(products, quantities)
+    )
+    await session.commit()
+    return order
+
+
+async def test_orders_land_in_their_month(session, partitioned, customer, products):
+    march = await add_order(session, customer, products, MARCH, [1, 2])
+    april = await add_order(session, customer, products, APRIL, [3, 4])
+
+    result = await session.execute(
+        text("SELECT id, tableoid::regclass::text AS part FROM orders")
+    )
+    assert dict(result.all()) == {
+        march.id: "orders_y2025m03",
+        april.id: "orders_default",
+    }
+    assert await list_order_partitions(session) == [MARCH.date().replace(day=1)]
+
+
+async def test_list_sums_line_items_per_order(session, partitioned, customer, products):
+    march = await add_order(session, customer, products, MARCH, [1, 2])
+    april = await add_order(session, customer, products, APRIL, [3, 4])
+
+    rows = await get_list_order(session, customer)
+
+    assert [(row.id, row.created_at, row.total_quantity) for row in rows] == [
+        (april.id, APRIL, 7),
+        (march.id, MARCH, 3),
+    ]
+    assert {row.email for row in rows} == {customer.email}
+    assert [row.id for row in await get_list_order(session, customer, skip=1)] == [
+        march.id
+    ]
+
+
+async def test_get_order_with_and_without_created_at(
+    session, partitioned, customer, products
+):
+    march = await add_order(session, customer, products, MARCH, [1])
+
+    assert (await get_user_order(session, march.id)).Order.id == march.id
+    found = await get_user_order(session, march.id, created_at=MARCH)
+    assert found.Order.id == march.id
+    assert found.User.id == customer.id
+    assert await get_user_order(session, march.id, created_at=APRIL) is None
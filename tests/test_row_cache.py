@@ -0,0 +1,127 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.cache import RowCache
+from app.models import Product
+
+UPDATED_AT = datetime(2026, 1, 1, 12, 0)
+
+
+@pytest.fixture
+def cache(redis, monkeypatch):
+    monkeypatch.setattr(settings, "ROW_CACHE_ENABLED", True)
+    return RowCache(redis)
+
+
+@pytest.fixture
+async def session():
+    #   Cached rows are merged without loading, so no database is needed
+    async with AsyncSession() as session:
+        yield session
+
+
+@pytest.fixture
+def product():
+    return Product(name="original", base_price=10, updated_at=UPDATED_AT)
+
+
+def version(product):
+    return RowCache.version(product)
+
+
+def updated(product, name, seconds=1):
+    return Product(
+        id=product.id,
+        name=name,
+        base_price=product.base_price,
+        updated_at=product.updated_at + timedelta(seconds=seconds),
+    )
+
+
+class Loader:
+    """The database read behind the cache, counting how often it is reached."""
+
+    def __init__(self, row, before_return=None):
+        self.row = row
+        self.before_return = before_return
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        if self.before_return:
+            await self.before_return()
+        return self.row
+
+
+async def test_second_read_is_served_from_cache(cache, session, product):
+    load = Loader(product)
+
+    await cache.get(session, Product, product.id, load=load)
+    row = await cache.get(session, Product, product.id, load=load)
+
+    assert load.calls == 1
+    assert row.name == "original"
+
+
+async def test_invalidation_hides_cached_row(cache, session, product):
+    await cache.get(session, Product, product.id, load=Loader(product))
+    newer = updated(product, "renamed")
+    await cache.invalidate(Product, [product.id], version=version(newer))
+
+    load = Loader(newer)
+    row = await cache.get(session, Product, product.id, load=load)
+
+    assert load.calls == 1
+    assert row.name == "renamed"
+
+
+async def test_stale_read_cannot_overwrite_newer_version(cache, session, product):
+    newer = updated(product, "renamed")
+
+    async def update_commits_meanwhile():
+        await cache.invalidate(Product, [product.id], version=version(newer))
+
+    #   The read started before the update and returns the old row after it
+    stale = Loader(product, before_return=update_commits_meanwhile)
+    await cache.get(session, Product, product.id, load=stale)
+
+    #   Neither the local tier nor Redis kept the old row
+    fresh = Loader(newer)
+    row = await cache.get(session, Product, product.id, load=fresh)
+    assert fresh.calls == 1
+    assert row.name == "renamed"
+
+    other_worker = RowCache(cache.redis)
+    load = Loader(newer)
+    row = await other_worker.get(session, Product, product.id, load=load)
+    assert load.calls == 0
+    assert row.name == "renamed"
+
+
+async def test_older_row_never_replaces_newer_in_redis(cache, session, product):
+    newer = updated(product, "renamed")
+    await cache.get(session, Product, product.id, load=Loader(newer))
+
+    #   A worker whose slow read returns the old row after the new one was cached
+    other_worker = RowCache(cache.redis)
+    await other_worker.get(session, Product, product.id, load=Loader(product))
+
+    load = Loader(product)
+    row = await RowCache(cache.redis).get(session, Product, product.id, load=load)
+    assert load.calls == 0
+    assert row.name == "renamed"
+
+
+async def test_unversioned_invalidation_blocks_caching(cache, session, product):
+    #   Bulk and raw SQL changes do not know the new version
+    await cache.invalidate(Product, [product.id])
+
+    newer = updated(product, "renamed")
+    load = Loader(newer)
+    await cache.get(session, Product, product.id, load=load)
+    await cache.get(session, Product, product.id, load=load)
+
+    assert load.calls == 2